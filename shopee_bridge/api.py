@@ -11,7 +11,11 @@ Webhook endpoints (`webhook_live`, `webhook_test`) implement a fast ingest patte
  - Verify signature using the appropriate push key.
  - Derive an idempotency key (stable hash) from core event attributes.
  - Insert a Shopee Webhook Inbox row (status=queued, signature_valid=True/False).
- - Enqueue async processing (short queue) and return immediately.
+ - Enqueue async processing (short queue; batch drain or per-event job) and return immediately.
+ - With site_config ``shopee_webhook_ingest = "stream"`` the three steps above are
+   deferred: the raw delivery is appended to a Redis stream on the (non-evicting)
+   RQ queue Redis and materialized into inbox rows in batches by
+   jobs.ingest_webhook.
 
 NOTE: This file must remain intentionally thin to ease maintenance, testing, and
 security auditing. Heavy logic belongs in dedicated service / job modules.
@@ -20,7 +24,6 @@ security auditing. Heavy logic belongs in dedicated service / job modules.
 from __future__ import annotations
 
 from typing import Any, Dict, List, Optional
-import json, hashlib
 import frappe
 
 from . import auth
@@ -92,81 +95,37 @@ def test_shopee_connection() -> Dict[str, Any]:
 		return _error(e)
 
 
-def _derive_idempotency(payload: Dict[str, Any]) -> str:
-	# Pick common distinguishing fields (fallback to full payload hash)
-	parts: List[str] = []
-	for key in ["event_type", "order_sn", "return_sn", "status", "update_time"]:
-		val = payload.get(key)
-		if val is not None:
-			parts.append(str(val))
-	if not parts:
-		parts.append(json.dumps(payload, sort_keys=True))
-	raw = "|".join(parts)
-	return hashlib.sha1(raw.encode("utf-8")).hexdigest()  # noqa: S324 (non‑crypto uniqueness ok)
-
-
 def _process_webhook(source_env: str) -> Dict[str, Any]:
+	from .jobs import ingest_webhook, process_webhook  # local import
+
 	req = frappe.request
 	raw_body: bytes = req.data or b""
 	headers = {k: v for k, v in (req.headers or {}).items()}
-	try:
-		settings = _get_settings()
-		enabled_flag = (
-			settings.webhook_live_enabled if source_env == "live" else settings.webhook_test_enabled
-		)
-		if not enabled_flag:
-			raise frappe.PermissionError(f"Webhook {source_env} disabled")
-		push_key_field = (
-			"live_partner_push_key" if source_env == "live" else "test_partner_push_key"
-		)
-		push_key = settings.get_password(push_key_field)
-		if not push_key:
-			raise frappe.ValidationError(f"Missing {push_key_field}")
-		# Verify signature (raises on mismatch)
-		# Build full URL for Push Authorization verification
-		full_url = f"{req.scheme}://{req.host}{req.path}"
-		auth.verify_webhook_signature(
-			path=req.path, raw_body=raw_body, headers=headers, push_key=push_key, full_url=full_url
-		)
-		signature_valid = 1
-	except Exception as sig_exc:
-		# Signature invalid or config issue: still record inbox for audit (signature_valid=0)
-		signature_valid = 0
-		sig_err = str(sig_exc)
-	# Parse JSON payload
-	try:
-		payload_json = raw_body.decode("utf-8") if raw_body else "{}"
-		payload = json.loads(payload_json or "{}")
-	except Exception:
-		payload = {}
-		payload_json = "{}"
-	# Compute idempotency key
-	idem_key = _derive_idempotency(payload)
+	# Build full URL for Push Authorization verification
+	full_url = f"{req.scheme}://{req.host}{req.path}"
+	# Fast path: append raw delivery to the ingest stream and ack; verification
+	# and the inbox insert happen in ingest_webhook.materialize.
+	if ingest_webhook.ingest_mode() == "stream":
+		try:
+			entry_id = ingest_webhook.append(source_env, raw_body, headers, req.path, full_url)
+			return _result({"stream_id": entry_id, "deferred": True})
+		except Exception as st_exc:  # Redis unavailable: fall back to direct insert
+			frappe.log_error(message=str(st_exc), title="Shopee Webhook Stream Error")
+	# Verify signature; invalid or config issue still records inbox for audit (signature_valid=0)
+	signature_valid, sig_err = ingest_webhook.verify_push(source_env, req.path, raw_body, headers, full_url)
+	fields = ingest_webhook.inbox_fields(source_env, raw_body, signature_valid)
 	# Insert inbox doc
 	try:
-		inbox = frappe.get_doc({
-			"doctype": "Shopee Webhook Inbox",
-			"event_type": payload.get("event_type") or payload.get("type") or "unknown",
-			"source_env": source_env,
-			"idempotency_key": idem_key,
-			"signature_valid": signature_valid,
-			"status": "queued",
-			"payload_hash": hashlib.sha1(payload_json.encode("utf-8")).hexdigest(),  # noqa: S324
-			"payload_json": payload_json,
-		}).insert(ignore_permissions=True)
+		inbox = frappe.get_doc({"doctype": "Shopee Webhook Inbox", **fields}).insert(ignore_permissions=True)
 		frappe.db.commit()
 	except Exception as ins_exc:
 		return _error(ins_exc)
 	# Enqueue async processing (even if signature invalid we may want to inspect)
 	try:
-		frappe.enqueue(
-			"shopee_bridge.jobs.process_webhook.run",
-			inbox=inbox.name,
-			queue="short",
-		)
+		process_webhook.enqueue_processing(inbox.name)
 	except Exception as q_exc:  # pragma: no cover
 		frappe.log_error(message=str(q_exc), title="Shopee Webhook Enqueue Error")
-	resp = {"inbox": inbox.name, "idempotency_key": idem_key, "signature_valid": bool(signature_valid)}
+	resp = {"inbox": inbox.name, "idempotency_key": fields["idempotency_key"], "signature_valid": bool(signature_valid)}
 	if signature_valid == 0:
 		resp["warning"] = sig_err  # expose minimal diagnostic
 	return _result(resp)
@@ -361,6 +320,17 @@ def sync_escrow_batch(batch_id: str) -> Dict[str, Any]:
 		return _error(e)
 
 
+@frappe.whitelist()
+def get_backfill_progress(company: str, fiscal_year: str) -> Dict[str, Any]:
+	"""Percent-complete / ETA of a checkpointed fiscal year backfill."""
+	try:
+		from .services import fiscal
+		progress = fiscal.backfill_progress(fiscal.backfill_run_key(company, fiscal_year))
+		return _result({"progress": progress})
+	except Exception as e:
+		return _error(e)
+
+
 # === WEBHOOK API ===
 
 @frappe.whitelist()
@@ -418,10 +388,14 @@ def get_health_status() -> Dict[str, Any]:
 			"creation": [">=", one_hour_ago]
 		})
 		
+		from .jobs import ingest_webhook, process_webhook
+
 		health_data = {
 			"token_valid": token_valid,
 			"recent_errors": recent_errors,
 			"pending_webhooks": pending_webhooks,
+			"webhooks_coalesced_total": process_webhook.coalesced_total(),
+			"webhook_stream": ingest_webhook.stream_backlog(),
 			"settings_configured": bool(settings.partner_id and settings.partner_key),
 			"timestamp": frappe.utils.now()
 		}
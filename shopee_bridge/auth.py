@@ -14,6 +14,8 @@ import hmac
 import hashlib
 import urllib.parse
 import secrets
+import os
+import threading
 import frappe
 
 """Shopee Bridge authentication utilities.
@@ -89,9 +91,123 @@ def _settings() -> frappe.model.document.Document:
 
 
 def _base_url(env: str) -> str:
+    override = frappe.conf.get("shopee_api_base_url")
+    if override:  # site_config: local stand-in (benchmarks) or egress proxy
+        return str(override).rstrip("/")
     return PROD_BASE_URL if env.lower() in ("live", "production") else TEST_BASE_URL
 
 
+# ---------------------------------------------------------------------------
+# Signing context cache
+# ---------------------------------------------------------------------------
+# sign_request used to load the full Settings doc and decrypt partner_key from
+# __Auth for every call. The context below is built once per worker and reused
+# until `invalidate_settings_cache()` bumps a version stamp in Redis (token
+# refresh / exchange, Settings save, 401 rotation), so other workers pick the
+# change up on their next signature. If Redis is unreachable the context is
+# still rebuilt every SIGNING_CONTEXT_TTL seconds. Workers serve many sites of
+# a bench, so contexts are cached per `frappe.local.site`.
+SIGNING_VERSION_KEY = "shopee_bridge:signing_version"
+SIGNING_CONTEXT_TTL = 300
+
+
+class SigningContext:
+    """Credentials + precomputed HMAC key needed to sign shop-level API calls."""
+
+    __slots__ = (
+        "partner_id", "access_token", "shop_id", "environment", "base_url", "version", "site", "loaded_at", "_mac"
+    )
+
+    def __init__(self, partner_id, access_token, shop_id, environment, partner_key: str, version, site: str = ""):
+        self.partner_id = partner_id
+        self.access_token = access_token
+        self.shop_id = shop_id
+        self.environment = environment or "Test"
+        self.base_url = _base_url(self.environment)
+        self.version = version
+        self.site = site
+        self.loaded_at = time.monotonic()
+        # Keyed HMAC state: copy() per signature skips re-deriving the key pads.
+        self._mac = hmac.new(partner_key.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def sign(self, base_string: str) -> str:
+        mac = self._mac.copy()
+        mac.update(base_string.encode("utf-8"))
+        return mac.hexdigest()
+
+
+_signing_lock = threading.Lock()
+_signing_ctx: Dict[str, SigningContext] = {}  # site -> context
+
+
+def _current_site() -> str:
+    return getattr(frappe.local, "site", None) or ""
+
+
+def _signing_version() -> Optional[bytes]:
+    try:
+        cache = frappe.cache()
+        return cache.get(cache.make_key(SIGNING_VERSION_KEY))
+    except Exception:
+        return None
+
+
+def invalidate_settings_cache() -> None:
+    """Drop cached Shopee Settings and signing context of the current site in every worker."""
+    with _signing_lock:
+        _signing_ctx.pop(_current_site(), None)
+    try:
+        frappe.cache().delete_value("Shopee Settings")
+    except Exception:
+        pass
+    try:
+        cache = frappe.cache()
+        cache.incr(cache.make_key(SIGNING_VERSION_KEY))
+    except Exception:
+        pass
+
+
+def get_signing_context() -> SigningContext:
+    """Return the current site's cached signing context, rebuilding it when stale.
+
+    Raises:
+        AuthRequired: if partner_id / access_token / shop_id / partner_key missing.
+    """
+    site = _current_site()
+    version = _signing_version()
+    with _signing_lock:
+        ctx = _signing_ctx.get(site)
+        if (
+            ctx is not None
+            and ctx.site == site
+            and ctx.version == version
+            and time.monotonic() - ctx.loaded_at < SIGNING_CONTEXT_TTL
+        ):
+            return ctx
+        settings = _settings()
+        partner_id = getattr(settings, "partner_id", None)
+        access_token = getattr(settings, "access_token", None)
+        shop_id = getattr(settings, "shop_id", None)
+        if not all([partner_id, access_token, shop_id]):
+            raise AuthRequired("Missing partner_id / access_token / shop_id")
+        partner_key = settings.get_password("partner_key")
+        if not partner_key:
+            raise AuthRequired("Missing partner_key")
+        ctx = SigningContext(partner_id, access_token, shop_id, settings.environment, partner_key, version, site)
+        _signing_ctx[site] = ctx
+        return ctx
+
+
+def _reset_signing_after_fork() -> None:  # pragma: no cover - forked workers only
+    global _signing_ctx, _signing_lock
+    _signing_lock = threading.Lock()
+    _signing_ctx = {}
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_signing_after_fork)
+
+
 def _mask_secret(value: Optional[str], show: int = 4) -> str:
     if not value:
         return "<empty>"
@@ -314,7 +430,7 @@ def complete_token_exchange(code: str, shop_id: Union[str, int] = None, main_acc
             settings.merchant_id = str(returned_merchant_id)
         settings.save(ignore_permissions=True)
         frappe.db.commit()
-        frappe.cache().delete_value("Shopee Settings")
+        invalidate_settings_cache()
         frappe.logger().info(f"[Shopee] OAuth completed - shop_id: {settings.shop_id}, merchant_id: {getattr(settings, 'merchant_id', 'N/A')}")
         return {
             "success": True,
@@ -491,29 +607,23 @@ def sign_request(
     Raises:
         AuthRequired: if essential credentials missing.
     """
-    settings = _settings()
-    partner_id = getattr(settings, "partner_id", None)
-    access_token = getattr(settings, "access_token", None)
-    shop_id = getattr(settings, "shop_id", None)
-    if not all([partner_id, access_token, shop_id]):
-        raise AuthRequired("Missing partner_id / access_token / shop_id")
-    partner_key = settings.get_password("partner_key")
+    ctx = get_signing_context()
     timestamp = int(time.time())
-    base_string = f"{partner_id}{path}{timestamp}{access_token}{shop_id}"
-    signature = hmac_sha256(base_string, partner_key)
+    base_string = f"{ctx.partner_id}{path}{timestamp}{ctx.access_token}{ctx.shop_id}"
+    signature = ctx.sign(base_string)
     # Base query pieces required by Shopee
     base_qs = {
-        "partner_id": partner_id,
+        "partner_id": ctx.partner_id,
         "timestamp": timestamp,
-        "access_token": access_token,
-        "shop_id": shop_id,
+        "access_token": ctx.access_token,
+        "shop_id": ctx.shop_id,
         "sign": signature,
     }
     # Merge user params (user params should not override required ones)
     merged = {**params, **base_qs}
     qs = urllib.parse.urlencode(merged, doseq=True)
-    url = f"{_base_url(settings.environment)}{path}?{qs}"
-    headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
+    url = f"{ctx.base_url}{path}?{qs}"
+    headers = {"Authorization": f"Bearer {ctx.access_token}", "Content-Type": "application/json"}
     return {"url": url, "headers": headers, "meta": {"timestamp": timestamp, "signature_base": base_string}}
 
 def verify_webhook_signature(
@@ -521,7 +631,8 @@ def verify_webhook_signature(
     raw_body: bytes,
     headers: Dict[str, str],
     push_key: str,
-    full_url: str = None
+    full_url: str = None,
+    received_at: float = None
 ) -> bool:
     """Validate a Shopee webhook request.
 
@@ -537,6 +648,9 @@ def verify_webhook_signature(
         headers: Incoming HTTP headers (case-sensitive keys expected as provided by Frappe).
         push_key: Shared secret key from Shopee dashboard (test or live push key).
         full_url: Full URL including protocol and domain (required for Push Authorization).
+        received_at: Epoch seconds the request was received, used as the
+            reference for the legacy timestamp drift check (default now).
+            Pass it when verifying a delivery after the fact.
     Returns:
         True if signature valid.
     Raises:
@@ -551,7 +665,7 @@ def verify_webhook_signature(
     # Fallback to legacy signature verification method
     signature_header = headers.get(WEBHOOK_SIGNATURE_HEADER)
     if signature_header:
-        return _verify_legacy_signature(raw_body, push_key, signature_header, headers)
+        return _verify_legacy_signature(raw_body, push_key, signature_header, headers, received_at)
     
     raise SignatureMismatch("Missing both Authorization and X-Shopee-Signature headers")
 
@@ -596,7 +710,13 @@ def _verify_push_authorization(full_url: str, raw_body: bytes, push_key: str, au
         raise SignatureMismatch(f"Push Authorization verification failed: {str(e)}")
 
 
-def _verify_legacy_signature(raw_body: bytes, push_key: str, signature_header: str, headers: Dict[str, str]) -> bool:
+def _verify_legacy_signature(
+    raw_body: bytes,
+    push_key: str,
+    signature_header: str,
+    headers: Dict[str, str],
+    received_at: float = None
+) -> bool:
     """Verify legacy webhook signature method.
     
     Legacy method uses raw body HMAC-SHA256 with push key.
@@ -607,6 +727,7 @@ def _verify_legacy_signature(raw_body: bytes, push_key: str, signature_header: s
         push_key: Partner key for HMAC generation
         signature_header: X-Shopee-Signature header value
         headers: All request headers
+        received_at: Reference time for the drift check (default now)
     Returns:
         True if signature valid
     Raises:
@@ -621,7 +742,7 @@ def _verify_legacy_signature(raw_body: bytes, push_key: str, signature_header: s
     if ts_header:
         try:
             ts = int(ts_header)
-            now = int(time.time())
+            now = int(time.time() if received_at is None else received_at)
             if abs(now - ts) > WEBHOOK_ALLOWED_DRIFT_SECONDS:
                 raise SignatureMismatch("Webhook timestamp drift too large")
         except SignatureMismatch:
@@ -670,7 +791,7 @@ def refresh_access_token() -> Dict[str, Any]:
         settings.token_expires_at = _utc_naive(expires_in)
         settings.save(ignore_permissions=True)
         frappe.db.commit()
-        frappe.cache().delete_value("Shopee Settings")
+        invalidate_settings_cache()
         frappe.logger().info("[Shopee] Access token refreshed successfully")
         return {
             "success": True,
@@ -829,6 +950,8 @@ __all__ = [
     "refresh_token_via_api",
     "refresh_access_token",
     "sign_request",
+    "get_signing_context",
+    "invalidate_settings_cache",
     "verify_webhook_signature",
     "schedule_token_renewal_cron",
     "get_shop_info",
@@ -0,0 +1,5 @@
+"""Throughput benchmarks for the Shopee Bridge sync pipelines.
+
+Runs outside a bench: `frappe_stub` stands in for `frappe` and `fake_shopee`
+serves the Shopee endpoints locally. See `run` for usage.
+"""
@@ -0,0 +1,320 @@
+"""Local Shopee Open API stand-in for benchmarks.
+
+Serves the order, returns and escrow endpoints used by the sync pipelines with
+deterministic synthetic data. Latency, page size caps, 429 injection and
+payload size are configurable per server; per-path call / 429 counters are
+kept so the harness can report API calls per order.
+
+Signatures are not checked: the benchmark measures the bridge, not auth.
+"""
+
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlparse
+import json
+import random
+import threading
+import time
+
+
+class FakeShopeeConfig:
+	"""Tunables for `FakeShopee`.
+
+	Args:
+		orders: Orders returned by get_order_list for any window.
+		update_step_s: When > 0, order ``i`` has ``update_time`` =
+			``UPDATE_TIME_BASE + i * update_step_s`` and get_order_list only
+			lists orders inside ``[time_from, time_to]`` (dense-window tests).
+		returns: Returns returned by get_return_list for any window.
+		latency_ms: Base server-side latency per request.
+		jitter_ms: Uniform extra latency in [0, jitter_ms].
+		max_page_size: Server cap on list page size (Shopee: 100).
+		items_per_order: Line items per order detail.
+		payload_bytes: Filler bytes added to every order / return / escrow body.
+		rate_429: Probability (0..1) that a request is answered with 429.
+		retry_after: Retry-After header value sent with injected 429s.
+		seed: RNG seed for 429 injection.
+		escrow_batch: Serve get_escrow_detail_batch (404 when False).
+		escrow_batch_miss_every: Leave every Nth order out of batch escrow
+			responses (0 = none) to exercise the per-order fallback.
+	"""
+
+	def __init__(
+		self,
+		orders: int = 1000,
+		returns: int = 200,
+		latency_ms: float = 20.0,
+		jitter_ms: float = 5.0,
+		max_page_size: int = 100,
+		items_per_order: int = 3,
+		payload_bytes: int = 512,
+		rate_429: float = 0.0,
+		retry_after: float = 0.05,
+		seed: int = 7,
+		update_step_s: int = 0,
+		escrow_batch: bool = True,
+		escrow_batch_miss_every: int = 0,
+	):
+		self.orders = int(orders)
+		self.returns = int(returns)
+		self.latency_ms = float(latency_ms)
+		self.jitter_ms = float(jitter_ms)
+		self.max_page_size = max(int(max_page_size), 1)
+		self.items_per_order = int(items_per_order)
+		self.payload_bytes = int(payload_bytes)
+		self.rate_429 = float(rate_429)
+		self.retry_after = float(retry_after)
+		self.seed = seed
+		self.update_step_s = max(int(update_step_s), 0)
+		self.escrow_batch = bool(escrow_batch)
+		self.escrow_batch_miss_every = max(int(escrow_batch_miss_every), 0)
+
+	def as_dict(self) -> Dict[str, Any]:
+		return dict(vars(self))
+
+
+UPDATE_TIME_BASE = 1_700_000_600
+
+
+def order_sn(i: int) -> str:
+	return f"BENCH{i:08d}"
+
+
+def _order(sn: str, cfg: FakeShopeeConfig) -> Dict[str, Any]:
+	idx = int(sn[5:]) if sn[5:].isdigit() else 0
+	items = [
+		{
+			"item_id": 1000 + n,
+			"item_sku": f"SKU-{n}",
+			"model_sku": f"SKU-{n}-M",
+			"item_name": f"Bench item {n}",
+			"model_quantity_purchased": 1 + (idx + n) % 3,
+			"model_discounted_price": 10000 + 500 * n,
+			"model_original_price": 12000 + 500 * n,
+		}
+		for n in range(cfg.items_per_order)
+	]
+	return {
+		"order_sn": sn,
+		"order_status": ("READY_TO_SHIP", "COMPLETED", "SHIPPED")[idx % 3],
+		"create_time": 1_700_000_000 + idx,
+		"update_time": UPDATE_TIME_BASE + idx * (cfg.update_step_s or 1),
+		"currency": "IDR",
+		"total_amount": sum(i["model_discounted_price"] * i["model_quantity_purchased"] for i in items),
+		"buyer_username": f"buyer{idx % 97}",
+		"item_list": items,
+		"note": "x" * cfg.payload_bytes,
+	}
+
+
+def _escrow(sn: str, cfg: FakeShopeeConfig) -> Dict[str, Any]:
+	idx = int(sn[5:]) if sn[5:].isdigit() else 0
+	return {
+		"order_sn": sn,
+		"payout_batch_id": f"PB{idx // 50:05d}",
+		"order_income": {
+			"escrow_amount": 30000 + idx % 1000,
+			"commission_fee": 1500,
+			"service_fee": 600,
+			"seller_transaction_fee": 300,
+			"actual_shipping_fee": 9000,
+			"buyer_total_amount": 42000 + idx % 1000,
+		},
+		"note": "x" * cfg.payload_bytes,
+	}
+
+
+class FakeShopee:
+	"""Threaded HTTP server emulating the Shopee endpoints the pipelines call.
+
+	Usage::
+
+		with FakeShopee(FakeShopeeConfig(orders=500)) as srv:
+			frappe.conf["shopee_api_base_url"] = srv.base_url
+			...
+			srv.stats()
+	"""
+
+	def __init__(self, config: FakeShopeeConfig | None = None):
+		self.config = config or FakeShopeeConfig()
+		self._rng = random.Random(self.config.seed)
+		self._lock = threading.Lock()
+		self.calls: Dict[str, int] = {}
+		self.throttled: Dict[str, int] = {}
+		self._server: ThreadingHTTPServer | None = None
+		self._thread: threading.Thread | None = None
+
+	@property
+	def base_url(self) -> str:
+		host, port = self._server.server_address[:2]  # type: ignore[union-attr]
+		return f"http://{host}:{port}"
+
+	def start(self) -> "FakeShopee":
+		fake = self
+
+		class _Handler(BaseHTTPRequestHandler):
+			protocol_version = "HTTP/1.1"
+			disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+			def do_GET(self):  # noqa: N802
+				url = urlparse(self.path)
+				params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+				length = int(self.headers.get("Content-Length") or 0)
+				if length:
+					try:
+						params.update(json.loads(self.rfile.read(length) or b"{}"))
+					except ValueError:
+						pass
+				status, body, headers = fake.handle(url.path, params)
+				raw = json.dumps(body).encode("utf-8")
+				self.send_response(status)
+				self.send_header("Content-Type", "application/json")
+				self.send_header("Content-Length", str(len(raw)))
+				for k, v in headers.items():
+					self.send_header(k, v)
+				self.end_headers()
+				self.wfile.write(raw)
+
+			do_POST = do_GET
+
+			def log_message(self, *args):  # silence per-request stderr lines
+				pass
+
+		self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+		self._server.daemon_threads = True
+		self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+		self._thread.start()
+		return self
+
+	def stop(self) -> None:
+		if self._server is not None:
+			self._server.shutdown()
+			self._server.server_close()
+			self._server = None
+
+	def __enter__(self) -> "FakeShopee":
+		return self.start()
+
+	def __exit__(self, *exc) -> None:
+		self.stop()
+
+	def reset_counters(self) -> None:
+		with self._lock:
+			self.calls.clear()
+			self.throttled.clear()
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			return {
+				"calls": dict(self.calls),
+				"throttled": dict(self.throttled),
+				"total_calls": sum(self.calls.values()),
+				"total_throttled": sum(self.throttled.values()),
+			}
+
+	def handle(self, path: str, params: Dict[str, str]) -> tuple[int, Dict[str, Any], Dict[str, str]]:
+		cfg = self.config
+		with self._lock:
+			self.calls[path] = self.calls.get(path, 0) + 1
+			throttle = cfg.rate_429 > 0 and self._rng.random() < cfg.rate_429
+			if throttle:
+				self.throttled[path] = self.throttled.get(path, 0) + 1
+		delay = cfg.latency_ms + (self._rng.uniform(0, cfg.jitter_ms) if cfg.jitter_ms else 0.0)
+		if delay > 0:
+			time.sleep(delay / 1000.0)
+		if throttle:
+			return 429, {"error": "error_too_many_requests"}, {"Retry-After": str(cfg.retry_after)}
+		route = _ROUTES.get(path)
+		if route is None or (path == ESCROW_BATCH_PATH and not cfg.escrow_batch):
+			return 404, {"error": "error_not_found", "message": path}, {}
+		return 200, {"error": "", "request_id": "bench", "response": route(params, cfg)}, {}
+
+
+def _page(params: Dict[str, str], total: int, cfg: FakeShopeeConfig) -> tuple[int, int, bool]:
+	start = int(params.get("cursor") or 0)
+	size = min(int(params.get("page_size") or 100), cfg.max_page_size)
+	end = min(start + size, total)
+	return start, end, end < total
+
+
+def _order_window(params: Dict[str, str], cfg: FakeShopeeConfig) -> range:
+	"""Indexes of orders whose update_time falls inside the requested window."""
+	if not cfg.update_step_s:
+		return range(cfg.orders)
+	step = cfg.update_step_s
+	lo = int(params.get("time_from") or 0) - UPDATE_TIME_BASE
+	hi = int(params.get("time_to") or 0) - UPDATE_TIME_BASE
+	first = max(-(-lo // step), 0)
+	last = min(hi // step, cfg.orders - 1)
+	return range(first, max(last + 1, first))
+
+
+def _order_list(params: Dict[str, str], cfg: FakeShopeeConfig) -> Dict[str, Any]:
+	window = _order_window(params, cfg)
+	start, end, more = _page(params, len(window), cfg)
+	return {
+		"order_list": [{"order_sn": order_sn(i)} for i in window[start:end]],
+		"more": more,
+		"next_cursor": str(end) if more else "",
+	}
+
+
+def _order_detail(params: Dict[str, str], cfg: FakeShopeeConfig) -> Dict[str, Any]:
+	sns = [s for s in (params.get("order_sn_list") or "").split(",") if s]
+	return {"order_list": [_order(sn, cfg) for sn in sns]}
+
+
+def _return_list(params: Dict[str, str], cfg: FakeShopeeConfig) -> Dict[str, Any]:
+	start, end, more = _page(params, cfg.returns, cfg)
+	return {
+		"returns": [{"return_sn": f"RET{i:08d}"} for i in range(start, end)],
+		"more": more,
+		"next_cursor": str(end) if more else "",
+	}
+
+
+def _return_detail(params: Dict[str, str], cfg: FakeShopeeConfig) -> Dict[str, Any]:
+	rsn = params.get("return_sn") or ""
+	return {
+		"return_sn": rsn,
+		"order_sn": order_sn(int(rsn[3:]) if rsn[3:].isdigit() else 0),
+		"status": "REQUESTED",
+		"refund_amount": 25000,
+		"note": "x" * cfg.payload_bytes,
+	}
+
+
+def _escrow_detail(params: Dict[str, str], cfg: FakeShopeeConfig) -> Dict[str, Any]:
+	return _escrow(params.get("order_sn") or "", cfg)
+
+
+def _escrow_detail_batch(params: Dict[str, Any], cfg: FakeShopeeConfig) -> List[Dict[str, Any]]:
+	miss = cfg.escrow_batch_miss_every
+	out = []
+	for sn in params.get("order_sn_list") or []:
+		idx = int(sn[5:]) if sn[5:].isdigit() else 0
+		if miss and idx % miss == miss - 1:
+			continue
+		out.append({"escrow_detail": _escrow(sn, cfg)})
+	return out
+
+
+ESCROW_BATCH_PATH = "/api/v2/payment/get_escrow_detail_batch"
+
+_ROUTES = {
+	"/api/v2/order/get_order_list": _order_list,
+	"/api/v2/order/get_order_detail": _order_detail,
+	"/api/v2/returns/get_return_list": _return_list,
+	"/api/v2/returns/get_return_detail": _return_detail,
+	"/api/v2/payment/get_escrow_detail": _escrow_detail,
+	ESCROW_BATCH_PATH: _escrow_detail_batch,
+}
+
+
+def sample_order_sns(n: int) -> List[str]:
+	return [order_sn(i) for i in range(int(n))]
+
+
+__all__ = ["FakeShopeeConfig", "FakeShopee", "order_sn", "sample_order_sns"]
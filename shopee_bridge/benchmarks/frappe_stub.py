@@ -0,0 +1,265 @@
+"""Minimal in-memory stand-in for the `frappe` module used by benchmarks.
+
+Provides just enough of `frappe.conf`, `frappe.db`, `frappe.cache()`,
+`frappe.get_doc` and `frappe.utils` for the service / job modules to run
+outside a bench. DB calls are no-ops that are counted per method so the
+harness can report DB round-trips per order; the cache is a thread-safe dict
+(no `eval`, so the rate limiter uses its in-process fallback bucket).
+
+Call `install()` before importing any `shopee_bridge` module.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+import datetime as _dt
+import logging
+import sys
+import threading
+import types
+
+
+class _Cache:
+	def __init__(self):
+		self._data: Dict[str, Any] = {}
+		self._lock = threading.Lock()
+
+	def make_key(self, key: str, *args, **kwargs) -> str:
+		return f"bench|{key}"
+
+	def get_value(self, key: str, *args, **kwargs) -> Any:
+		return self._data.get(key)
+
+	def set_value(self, key: str, value: Any, *args, **kwargs) -> None:
+		self._data[key] = value
+
+	def delete_value(self, keys: Any, *args, **kwargs) -> None:
+		for key in keys if isinstance(keys, (list, tuple)) else [keys]:
+			self._data.pop(key, None)
+
+	def get(self, key: str) -> Any:
+		return self._data.get(key)
+
+	def set(self, key: str, value: Any, *args, **kwargs) -> None:
+		self._data[key] = value
+
+	def incrby(self, key: str, amount: int = 1) -> int:
+		with self._lock:
+			value = int(self._data.get(key) or 0) + int(amount)
+			self._data[key] = value
+			return value
+
+	def incr(self, key: str, amount: int = 1) -> int:
+		return self.incrby(key, amount)
+
+	def delete(self, *keys: str) -> None:
+		for key in keys:
+			self._data.pop(key, None)
+
+	def clear(self) -> None:
+		self._data.clear()
+
+
+class _DB:
+	"""No-op database recording how often each method is called."""
+
+	def __init__(self):
+		self.calls: Dict[str, int] = {}
+		self._lock = threading.Lock()
+
+	def _count(self, name: str) -> None:
+		with self._lock:
+			self.calls[name] = self.calls.get(name, 0) + 1
+
+	def sql(self, *args, **kwargs) -> List[Any]:
+		self._count("sql")
+		return []
+
+	def get_value(self, *args, **kwargs) -> Any:
+		self._count("get_value")
+		return None
+
+	def get_values(self, *args, **kwargs) -> List[Any]:
+		self._count("get_values")
+		return []
+
+	def set_value(self, *args, **kwargs) -> None:
+		self._count("set_value")
+
+	def exists(self, *args, **kwargs) -> Any:
+		self._count("exists")
+		return None
+
+	def count(self, *args, **kwargs) -> int:
+		self._count("count")
+		return 0
+
+	def bulk_insert(self, *args, **kwargs) -> None:
+		self._count("bulk_insert")
+
+	def commit(self) -> None:
+		self._count("commit")
+
+	def rollback(self, *args, **kwargs) -> None:
+		self._count("rollback")
+
+	def savepoint(self, *args, **kwargs) -> None:
+		self._count("savepoint")
+
+	def reset(self) -> None:
+		with self._lock:
+			self.calls.clear()
+
+
+class _Doc(dict):
+	def __getattr__(self, name: str) -> Any:
+		return self.get(name)
+
+	def get_password(self, fieldname: str, raise_exception: bool = True) -> Any:
+		return self.get(fieldname)
+
+	def insert(self, *args, **kwargs) -> "_Doc":
+		_db._count("insert")
+		self.setdefault("name", f"BENCH-{id(self)}")
+		return self
+
+	def save(self, *args, **kwargs) -> "_Doc":
+		_db._count("save")
+		return self
+
+
+_db = _DB()
+_cache = _Cache()
+_settings = _Doc(
+	doctype="Shopee Settings",
+	name="Shopee Settings",
+	partner_id=100001,
+	partner_key="bench-partner-key",
+	access_token="bench-access-token",
+	refresh_token="bench-refresh-token",
+	shop_id=200002,
+	environment="Test",
+	webhook_live_enabled=1,
+	webhook_test_enabled=1,
+	live_partner_push_key="bench-push-key",
+	test_partner_push_key="bench-push-key",
+)
+
+
+class _Error(Exception):
+	pass
+
+
+def _get_doc(*args, **kwargs) -> _Doc:
+	if args and isinstance(args[0], dict):
+		return _Doc(args[0])
+	if args and args[0] == "Shopee Settings":
+		return _settings
+	raise _module.DoesNotExistError(f"{args[0] if args else '?'} not found")
+
+
+def _add_to_date(date: Any, **kwargs) -> _dt.datetime:
+	date = date or _dt.datetime.now()
+	return date + _dt.timedelta(
+		days=kwargs.get("days", 0),
+		hours=kwargs.get("hours", 0),
+		minutes=kwargs.get("minutes", 0),
+		seconds=kwargs.get("seconds", 0),
+	)
+
+
+def _get_datetime(value: Any = None) -> _dt.datetime:
+	if value is None:
+		return _dt.datetime.now()
+	if isinstance(value, _dt.datetime):
+		return value
+	return _dt.datetime.fromisoformat(str(value))
+
+
+def _whitelist(*args, **kwargs):
+	if args and callable(args[0]):
+		return args[0]
+	return lambda fn: fn
+
+
+_module = types.ModuleType("frappe")
+
+
+def _cint(value: Any, default: int = 0) -> int:
+	try:
+		return int(float(value))
+	except Exception:
+		return default
+
+
+def _sbool(value: Any) -> Any:
+	if isinstance(value, str):
+		lowered = value.lower()
+		if lowered in ("true", "1"):
+			return True
+		if lowered in ("false", "0"):
+			return False
+	return value
+
+
+def install(conf: Dict[str, Any] | None = None) -> types.ModuleType:
+	"""Register the stub as `frappe` (and needed submodules) in sys.modules.
+
+	Args:
+		conf: Initial site_config values (merged into `frappe.conf`).
+	Returns:
+		The stub module.
+	"""
+	m = _module
+	logger = logging.getLogger("shopee_bridge.bench")
+	logger.addHandler(logging.NullHandler())
+	logger.propagate = False
+	m.conf = _Doc(conf or {})
+	m.db = _db
+	m.cache = lambda: _cache
+	m.logger = lambda *args, **kwargs: logger
+	m.errors = []
+	m.log_error = lambda message=None, title=None, **kwargs: m.errors.append((title, str(message)[:200]))
+	m.get_doc = _get_doc
+	m.get_cached_doc = _get_doc
+	m.get_all = lambda *args, **kwargs: []
+	m.get_list = m.get_all
+	m.enqueued = []
+	m.enqueue = lambda method, **kwargs: m.enqueued.append((method, kwargs))
+	m.whitelist = _whitelist
+	m.local = types.SimpleNamespace(site="bench")
+	m.init = lambda *args, **kwargs: None  # thread site context (process-wide here)
+	m.connect = lambda *args, **kwargs: None
+	m.destroy = lambda: None
+	m.session = types.SimpleNamespace(user="Administrator")
+	m.request = None
+	for name in ("ValidationError", "PermissionError", "DoesNotExistError", "DuplicateEntryError"):
+		setattr(m, name, type(name, (_Error,), {}))
+	m.utils = types.ModuleType("frappe.utils")
+	m.utils.now_datetime = _dt.datetime.now
+	m.utils.now = lambda: str(_dt.datetime.now())
+	m.utils.nowdate = lambda: str(_dt.date.today())
+	m.utils.get_datetime = _get_datetime
+	m.utils.add_to_date = _add_to_date
+	m.utils.cint = _cint
+	m.utils.sbool = _sbool
+	m.utils.flt = lambda v, precision=None: round(float(v or 0), precision) if precision is not None else float(v or 0)
+	m.model = types.ModuleType("frappe.model")
+	m.model.document = types.ModuleType("frappe.model.document")
+	m.model.document.Document = _Doc
+	sys.modules["frappe"] = m
+	sys.modules["frappe.utils"] = m.utils
+	sys.modules["frappe.model"] = m.model
+	sys.modules["frappe.model.document"] = m.model.document
+	return m
+
+
+def reset() -> None:
+	"""Clear counters, cache and recorded errors between benchmark runs."""
+	_db.reset()
+	_cache.clear()
+	_module.errors = []
+	_module.enqueued = []
+
+
+__all__ = ["install", "reset"]
@@ -0,0 +1,74 @@
+"""Micro-benchmark: `mappers.compute_payload_hash` vs the streaming canonical hasher.
+
+Usage::
+
+	python -m shopee_bridge.benchmarks.hashing
+	python -m shopee_bridge.benchmarks.hashing --items 50 --payload-bytes 8192 --number 2000
+
+Compares, per order detail of the configured size:
+ - ``payload_full``      compute_payload_hash(order) (json.dumps whole payload + SHA1)
+ - ``payload_subset``    compute_payload_hash({mapped fields}) (subset dict + dumps + SHA1)
+ - ``canonical_full``    canonical_hash(order) per algo
+ - ``canonical_subset``  canonical_hash(order, ORDER_SYNC_FIELDS) per algo
+ - ``webhook_*``         inbox payload hash: decode + re-encode + SHA1 vs digest_bytes(raw)
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List
+import argparse
+import hashlib
+import json
+import timeit
+
+from .. import mappers
+from .fake_shopee import FakeShopeeConfig, _order
+
+
+def _cases(order: Dict[str, Any], raw: bytes) -> Dict[str, Callable[[], Any]]:
+	fields = mappers.ORDER_SYNC_FIELDS
+	cases: Dict[str, Callable[[], Any]] = {
+		"payload_full": lambda: mappers.compute_payload_hash(order),
+		"payload_subset": lambda: mappers.compute_payload_hash(
+			{k: order[k] for k in fields if order.get(k) not in (None, "")}
+		),
+	}
+	for algo in mappers.CANONICAL_HASH_ALGOS:
+		cases[f"canonical_full[{algo}]"] = lambda algo=algo: mappers.canonical_hash(order, algo=algo)
+		cases[f"canonical_subset[{algo}]"] = lambda algo=algo: mappers.canonical_hash(order, fields, algo=algo)
+	cases["webhook_sha1_reencode"] = lambda: hashlib.sha1(raw.decode("utf-8").encode("utf-8")).hexdigest()  # noqa: S324
+	for algo in mappers.CANONICAL_HASH_ALGOS:
+		cases[f"webhook_digest_bytes[{algo}]"] = lambda algo=algo: mappers.digest_bytes(raw, algo)
+	return cases
+
+
+def run(items: int = 10, payload_bytes: int = 2048, number: int = 5000, repeat: int = 5) -> List[Dict[str, Any]]:
+	"""Time each case; returns rows with best-of-`repeat` microseconds per call."""
+	order = _order("BENCH00000042", FakeShopeeConfig(items_per_order=items, payload_bytes=payload_bytes))
+	raw = json.dumps(order).encode("utf-8")
+	rows = []
+	baseline = None
+	for name, fn in _cases(order, raw).items():
+		best = min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+		if name == "payload_full":
+			baseline = best
+		rows.append({"case": name, "us_per_call": round(best * 1e6, 2), "vs_payload_full": round(baseline / best, 2) if baseline else None})
+	return rows
+
+
+def main(argv: List[str] | None = None) -> List[Dict[str, Any]]:
+	p = argparse.ArgumentParser(description="Canonical hashing micro-benchmark.")
+	p.add_argument("--items", type=int, default=10, help="line items per order")
+	p.add_argument("--payload-bytes", type=int, default=2048, help="unmapped filler bytes per order")
+	p.add_argument("--number", type=int, default=5000)
+	p.add_argument("--repeat", type=int, default=5)
+	args = p.parse_args(argv)
+	rows = run(args.items, args.payload_bytes, args.number, args.repeat)
+	print(f"{'case':<32}{'us/call':>10}{'speedup':>10}")
+	for row in rows:
+		print(f"{row['case']:<32}{row['us_per_call']:>10}{row['vs_payload_full']:>10}")
+	return rows
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,76 @@
+"""Micro-benchmark: per-order `mappers.map_order_items` loop vs `map_orders_items_batch`.
+
+Usage::
+
+	python -m shopee_bridge.benchmarks.mapping
+	python -m shopee_bridge.benchmarks.mapping --orders 5000 --items 5 --unique-skus
+
+Builds `orders` fake order details (``items_per_order`` lines each) and times,
+interleaved, best of `repeat`:
+ - ``per_order``  [map_order_items(o) for o in orders]
+ - ``batch``      map_orders_items_batch(orders)
+The batch result is checked against the per-order output (via
+``rows_from_columns``) before timing. ``--unique-skus`` gives every line its
+own SKU, which disables the batch's SKU memo hits.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List
+import argparse
+import timeit
+
+from .. import mappers
+from .fake_shopee import FakeShopeeConfig, _order
+
+
+def synthetic_orders(orders: int, items: int, unique_skus: bool = False) -> List[Dict[str, Any]]:
+	cfg = FakeShopeeConfig(items_per_order=items)
+	out = []
+	for i in range(int(orders)):
+		od = _order(f"BENCH{i:08d}", cfg)
+		od["items"] = od.pop("item_list")  # key read by map_order_items
+		if unique_skus:
+			for it in od["items"]:
+				it["model_sku"] = f"{od['order_sn']}-{it['model_sku']}"
+		out.append(od)
+	return out
+
+
+def run(orders: int = 1000, items: int = 3, unique_skus: bool = False, repeat: int = 40) -> Dict[str, Any]:
+	data = synthetic_orders(orders, items, unique_skus)
+	per_order = [mappers.map_order_items(od) for od in data]
+	if mappers.rows_from_columns(mappers.map_orders_items_batch(data), len(data)) != per_order:
+		raise AssertionError("batch output differs from per-order output")
+	cases = {
+		"per_order": lambda: [mappers.map_order_items(od) for od in data],
+		"batch": lambda: mappers.map_orders_items_batch(data),
+	}
+	best = {name: float("inf") for name in cases}
+	for _ in range(int(repeat)):  # interleaved so drift affects both cases alike
+		for name, fn in cases.items():
+			best[name] = min(best[name], timeit.timeit(fn, number=1))
+	return {
+		"orders": len(data),
+		"lines": sum(len(rows) for rows in per_order),
+		"per_order_ms": round(best["per_order"] * 1000, 2),
+		"batch_ms": round(best["batch"] * 1000, 2),
+		"speedup": round(best["per_order"] / best["batch"], 2),
+	}
+
+
+def main(argv: List[str] | None = None) -> Dict[str, Any]:
+	p = argparse.ArgumentParser(description="Item mapping micro-benchmark.")
+	p.add_argument("--orders", type=int, default=1000)
+	p.add_argument("--items", type=int, default=3, help="line items per order")
+	p.add_argument("--unique-skus", action="store_true", help="no SKU repeats across orders")
+	p.add_argument("--repeat", type=int, default=40)
+	args = p.parse_args(argv)
+	row = run(args.orders, args.items, args.unique_skus, args.repeat)
+	for key, value in row.items():
+		print(f"{key:<14}{value:>10}")
+	return row
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,89 @@
+"""Memory benchmark: raw order detail dicts vs `records.OrderRecord`.
+
+Usage::
+
+	python -m shopee_bridge.benchmarks.memory
+	python -m shopee_bridge.benchmarks.memory --orders 100000 --items 3 --payload-bytes 512
+
+Decodes synthetic get_order_detail responses (50 orders each, as the client
+does) and retains every order either as the decoded dict or converted to a
+record, then reports traced bytes held per order (tracemalloc, after gc)
+and the decode (+ convert) time of an untraced pass. Record build time
+includes the sync hash, which the pipeline would otherwise compute later.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from .fake_shopee import FakeShopeeConfig, _order, order_sn
+
+CHUNK = 50
+
+
+def _responses(n_orders: int, cfg: FakeShopeeConfig):
+	for start in range(0, n_orders, CHUNK):
+		orders = [_order(order_sn(i), cfg) for i in range(start, min(start + CHUNK, n_orders))]
+		yield json.dumps({"response": {"order_list": orders}}).encode("utf-8")
+
+
+def _retain(n_orders: int, cfg: FakeShopeeConfig, convert: Callable[[List[Dict[str, Any]]], List[Any]]) -> Dict[str, Any]:
+	bodies = list(_responses(n_orders, cfg))  # encoded up front, outside the traced region
+	started = time.perf_counter()  # untraced pass for timing (tracemalloc slows allocation)
+	for body in bodies:
+		convert(json.loads(body)["response"]["order_list"])
+	elapsed = time.perf_counter() - started
+	gc.collect()
+	tracemalloc.start()
+	kept: List[Any] = []
+	for body in bodies:
+		kept.extend(convert(json.loads(body)["response"]["order_list"]))
+	gc.collect()
+	current, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return {
+		"orders": len(kept),
+		"held_mb": round(current / 2**20, 1),
+		"peak_mb": round(peak / 2**20, 1),
+		"bytes_per_order": int(current / max(len(kept), 1)),
+		"build_s": round(elapsed, 2),
+	}
+
+
+def run(orders: int = 100_000, items: int = 3, payload_bytes: int = 512) -> List[Dict[str, Any]]:
+	from . import frappe_stub
+
+	frappe_stub.install()
+	from .. import records
+
+	cfg = FakeShopeeConfig(items_per_order=items, payload_bytes=payload_bytes)
+	rows = []
+	for name, convert in (("raw_dict", list), ("record", records.order_records)):
+		rows.append({"case": name, **_retain(orders, cfg, convert)})
+	base = rows[0]["held_mb"]
+	for row in rows:
+		row["vs_raw"] = round(row["held_mb"] / base, 2) if base else None
+	return rows
+
+
+def main(argv: List[str] | None = None) -> List[Dict[str, Any]]:
+	p = argparse.ArgumentParser(description="Retained memory of order details: raw dicts vs records.")
+	p.add_argument("--orders", type=int, default=100_000)
+	p.add_argument("--items", type=int, default=3, help="line items per order")
+	p.add_argument("--payload-bytes", type=int, default=512, help="unmapped filler bytes per order")
+	args = p.parse_args(argv)
+	rows = run(args.orders, args.items, args.payload_bytes)
+	cols = ("case", "orders", "held_mb", "peak_mb", "bytes_per_order", "build_s", "vs_raw")
+	print("".join(f"{c:>16}" for c in cols))
+	for row in rows:
+		print("".join(f"{str(row[c]):>16}" for c in cols))
+	return rows
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,180 @@
+"""Benchmark: reconciliation matching (`services.matching`).
+
+Usage::
+
+	python -m shopee_bridge.benchmarks.reconcile
+	python -m shopee_bridge.benchmarks.reconcile --invoices 50000 --days 31 --tolerance 2
+	python -m shopee_bridge.benchmarks.reconcile --mode aggregate --invoices 20000 --unbatched 0.2
+
+Builds a synthetic month of escrow-synced invoices (amounts drawn from a
+catalog-like price grid so duplicates occur) and one bank deposit per paid
+invoice, landing 0..`lag` days after the invoice value date; a share of the
+deposits carries the payout batch id as reference. Reports index build and
+match time for the engine, and the naive nested scan (every deposit against
+every pre-keyed invoice) timed on a sample and extrapolated to the full set.
+
+``--mode aggregate`` instead settles invoices in payout batches (one deposit
+per batch, 1 to `batch_max` invoices) and strips the batch id from a share of
+the invoices (``--unbatched``) so those deposits need the subset-sum pass;
+batches without a deposit in the window act as distractors. Reports matches per
+rule, matches equal to the true batch, budget exhaustions, unmatched deposits
+and residue.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+import argparse
+import datetime as _dt
+import random
+import time
+
+from ..services import matching
+
+
+def synthetic_month(
+	invoices: int, days: int = 30, lag: int = 1, paid: float = 0.95, with_reference: float = 0.3, seed: int = 11
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+	"""(bank_rows, invoice_rows) for one month of payouts."""
+	rng = random.Random(seed)
+	start = _dt.date(2025, 1, 1)
+	inv_rows: List[Dict[str, Any]] = []
+	bank_rows: List[Dict[str, Any]] = []
+	for i in range(int(invoices)):
+		day = start + _dt.timedelta(days=rng.randrange(days))
+		net = rng.randrange(20_000, 2_000_000, 500) - rng.choice((0, 1_250, 3_600))
+		batch = f"PB{day:%m%d}{rng.randrange(40):03d}"
+		inv_rows.append({"name": f"SINV-{i:07d}", "date": day, "amount": net, "payout_batch_id": batch})
+		if rng.random() < paid:
+			bank_rows.append({
+				"name": f"BT-{i:07d}",
+				"date": day + _dt.timedelta(days=rng.randint(0, lag)),
+				"amount": net,
+				"reference": batch if rng.random() < with_reference else f"TRF{rng.randrange(10**9)}",
+			})
+	rng.shuffle(bank_rows)
+	return bank_rows, inv_rows
+
+
+def synthetic_payouts(
+	invoices: int, days: int = 30, batch_max: int = 200, unbatched: float = 0.02, paid: float = 0.9, seed: int = 13
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+	"""(bank_rows, invoice_rows) where each deposit settles one payout batch.
+
+	Bank rows carry the true invoice names under ``"_truth"`` for scoring.
+	"""
+	rng = random.Random(seed)
+	start = _dt.date(2025, 1, 1)
+	inv_rows: List[Dict[str, Any]] = []
+	bank_rows: List[Dict[str, Any]] = []
+	n = 0
+	while n < invoices:
+		day = start + _dt.timedelta(days=rng.randrange(days))
+		size = min(rng.randint(1, batch_max), invoices - n)
+		settled = rng.random() < paid
+		batch = f"PB{day:%m%d}-{n:07d}"  # unsettled batches keep their id: deposit not in the window yet
+		total = 0
+		members = []
+		for _ in range(size):
+			net = rng.randrange(20_000, 2_000_000)  # escrow nets after fees are arbitrary rupiah
+			total += net
+			keep_batch = batch and rng.random() >= unbatched
+			inv_rows.append({"name": f"SINV-{n:07d}", "date": day, "amount": net, "payout_batch_id": batch if keep_batch else None})
+			members.append(f"SINV-{n:07d}")
+			n += 1
+		if settled:
+			bank_rows.append({
+				"name": f"BT-{len(bank_rows):06d}",
+				"date": day + _dt.timedelta(days=rng.randint(0, 2)),
+				"amount": total,
+				"reference": f"TRF{rng.randrange(10**9)}",
+				"_truth": members,
+			})
+	return bank_rows, inv_rows
+
+
+def run_aggregate(invoices: int = 20000, days: int = 30, unbatched: float = 0.02, budget_ms: int = 200) -> Dict[str, Any]:
+	bank_rows, inv_rows = synthetic_payouts(invoices, days, unbatched=unbatched)
+	started = time.perf_counter()
+	result = matching.match_aggregated(bank_rows, inv_rows, window_days=3, tolerance_days=0, time_budget_s=budget_ms / 1000.0)
+	elapsed = time.perf_counter() - started
+	truth = {row["name"]: row["_truth"] for row in bank_rows}
+	reasons: Dict[str, int] = {}
+	for row in result["unmatched"]:
+		reasons[row["reason"]] = reasons.get(row["reason"], 0) + 1
+	return {
+		"invoices": len(inv_rows),
+		"bank_rows": len(bank_rows),
+		"match_s": round(elapsed, 3),
+		"by_batch": result["stats"]["by_batch"],
+		"by_batch_subset": result["stats"]["by_batch_subset"],
+		"by_subset": result["stats"]["by_subset"],
+		"searched": result["stats"]["searched"],
+		"correct": sum(1 for m in result["matches"] if m["invoices"] == truth[m["bank"]]),
+		"ambiguous": result["stats"]["ambiguous"],
+		"budget_exhausted": result["stats"]["budget_exhausted"],
+		"unmatched": len(result["unmatched"]),
+		**{f"unmatched_{k}": v for k, v in sorted(reasons.items())},
+		"residue_invoices": len(result["residue_invoices"]),
+	}
+
+
+def _naive(bank_rows: List[Dict[str, Any]], inv_rows: List[Dict[str, Any]], tolerance: int) -> int:
+	keyed = [(matching.to_minor(inv["amount"]), matching.to_ordinal(inv["date"])) for inv in inv_rows]
+	hits = 0
+	for row in bank_rows:
+		amount, day = matching.to_minor(row["amount"]), matching.to_ordinal(row["date"])
+		for inv_amount, inv_day in keyed:
+			if inv_amount == amount and abs(inv_day - day) <= tolerance:
+				hits += 1
+	return hits
+
+
+def run(invoices: int = 30000, days: int = 30, tolerance: int = 1, naive_sample: int = 20) -> Dict[str, Any]:
+	bank_rows, inv_rows = synthetic_month(invoices, days, lag=tolerance)
+	started = time.perf_counter()
+	index = matching.InvoiceIndex(inv_rows)
+	built = time.perf_counter()
+	result = matching.match_strict(bank_rows, index, tolerance)
+	matched = time.perf_counter()
+	sample = bank_rows[: max(int(naive_sample), 1)]
+	t0 = time.perf_counter()
+	_naive(sample, inv_rows, tolerance)
+	naive_per_row = (time.perf_counter() - t0) / len(sample)
+	return {
+		"invoices": len(inv_rows),
+		"bank_rows": len(bank_rows),
+		"tolerance_days": tolerance,
+		"index_s": round(built - started, 3),
+		"match_s": round(matched - built, 3),
+		"naive_est_s": round(naive_per_row * len(bank_rows), 1),
+		"matches": len(result["matches"]),
+		"by_batch": sum(1 for m in result["matches"] if m["rule"] == "batch"),
+		"ambiguous_groups": len(result["ambiguous"]),
+		"ambiguous_bank": sum(len(g["bank"]) for g in result["ambiguous"]),
+		"date_mismatch": len(result["date_mismatch"]),
+		"unmatched": len(result["unmatched"]),
+	}
+
+
+def main(argv: List[str] | None = None) -> Dict[str, Any]:
+	p = argparse.ArgumentParser(description="Strict reconciliation matching benchmark.")
+	p.add_argument("--invoices", type=int, default=30000)
+	p.add_argument("--days", type=int, default=30)
+	p.add_argument("--tolerance", type=int, default=1, help="date tolerance (days); deposits lag up to this")
+	p.add_argument("--naive-sample", type=int, default=20, help="deposits timed with the nested scan")
+	p.add_argument("--mode", choices=("strict", "aggregate"), default="strict")
+	p.add_argument("--unbatched", type=float, default=0.02, help="aggregate: share of invoices without payout_batch_id")
+	p.add_argument("--budget-ms", type=int, default=200, help="aggregate: subset-sum budget per deposit")
+	args = p.parse_args(argv)
+	if args.mode == "aggregate":
+		row = run_aggregate(args.invoices, args.days, args.unbatched, args.budget_ms)
+	else:
+		row = run(args.invoices, args.days, args.tolerance, args.naive_sample)
+	for key, value in row.items():
+		print(f"{key:<18}{value:>12}")
+	return row
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,295 @@
+"""Benchmark runner for the Shopee sync pipelines.
+
+Each pipeline runs in a fresh (spawned) interpreter against a local
+`FakeShopee` server with the `frappe_stub` installed, so peak RSS is per
+pipeline and nothing leaks between runs.
+
+Usage::
+
+	python -m shopee_bridge.benchmarks.run
+	python -m shopee_bridge.benchmarks.run sync_orders escrow --orders 5000 --latency-ms 30 --rate-429 0.02
+	python -m shopee_bridge.benchmarks.run --json bench.json
+
+Reported per pipeline: units (orders / returns / events), wall seconds,
+units/sec, API calls per unit, 429s seen, p50/p95/p99 latency (per HTTP call;
+per event for the webhook pipeline), DB calls per unit, errors and peak RSS.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import threading
+import time
+
+PIPELINES = ("sync_orders", "sync_returns", "escrow", "webhook")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+	"""Nearest-rank percentile of `samples` (0 when empty)."""
+	if not samples:
+		return 0.0
+	ordered = sorted(samples)
+	rank = max(int(round(pct / 100.0 * len(ordered) + 0.5)) - 1, 0)
+	return ordered[min(rank, len(ordered) - 1)]
+
+
+def peak_rss_mb() -> float:
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class _CallTimer:
+	"""Wraps `clients._send_raw` to record client-observed latency per HTTP call."""
+
+	def __init__(self, clients):
+		self._clients = clients
+		self._orig = clients._send_raw
+		self._lock = threading.Lock()
+		self.samples: List[float] = []
+
+	def __enter__(self) -> "_CallTimer":
+		orig = self._orig
+
+		def timed(*args, **kwargs):
+			started = time.perf_counter()
+			try:
+				return orig(*args, **kwargs)
+			finally:
+				elapsed = time.perf_counter() - started
+				with self._lock:
+					self.samples.append(elapsed)
+
+		self._clients._send_raw = timed
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self._clients._send_raw = self._orig
+
+
+def _run_sync_orders(opts: Dict[str, Any]) -> Dict[str, Any]:
+	from ..services import orders
+
+	res = orders.sync_incremental_orders(updated_since_minutes=15, resume=False, concurrency=opts["concurrency"])
+	return {"units": res["orders_processed"], "errors": len(res["errors"])}
+
+
+def _run_sync_returns(opts: Dict[str, Any]) -> Dict[str, Any]:
+	from ..services import returns
+
+	res = returns.sync_returns_incremental(updated_since_minutes=30)
+	return {"units": res["returns_processed"], "errors": len(res["errors"])}
+
+
+def _run_escrow(opts: Dict[str, Any]) -> Dict[str, Any]:
+	from ..services import finance
+	from .fake_shopee import sample_order_sns
+
+	sns = sample_order_sns(opts["escrows"])
+	res = finance.sync_escrow_for_completed_orders(order_sns=sns, limit=len(sns), concurrency=opts["concurrency"])
+	return {"units": len(sns), "errors": res["failed"]}
+
+
+def _webhook_events(opts: Dict[str, Any]) -> List[bytes]:
+	"""Synthetic order pushes: several status updates per order so coalescing applies."""
+	from .fake_shopee import order_sn
+
+	events = []
+	for i in range(int(opts["webhook_events"])):
+		events.append(json.dumps({
+			"event_type": "order.status_update",
+			"order_sn": order_sn(i // 3),
+			"order_status": ("UNPAID", "READY_TO_SHIP", "COMPLETED")[i % 3],
+			"update_time": 1_700_000_000 + i,
+			"shop_id": 200002,
+		}).encode("utf-8"))
+	return events
+
+
+def _run_webhook(opts: Dict[str, Any]) -> Dict[str, Any]:
+	"""Ingest (verify + build inbox fields) and drain (coalesce + dispatch) in-process."""
+	from .. import auth
+	from ..jobs import ingest_webhook, process_webhook
+
+	path = "/api/method/shopee_bridge.api.webhook_live"
+	full_url = f"https://bench.local{path}"
+	bodies = _webhook_events(opts)
+	samples: List[float] = []
+	rows: List[Dict[str, Any]] = []
+	errors = 0
+	for i, body in enumerate(bodies):
+		started = time.perf_counter()
+		headers = {"Authorization": auth.hmac_sha256(f"{full_url}|{body.decode('utf-8')}", "bench-push-key")}
+		valid, _err = ingest_webhook.verify_push("live", path, body, headers, full_url)
+		errors += 0 if valid else 1
+		fields = ingest_webhook.inbox_fields("live", body, valid)
+		rows.append({"name": f"WH{i}", "payload_json": fields["payload_json"], "source_env": "live", "attempts": 1})
+		samples.append(time.perf_counter() - started)
+	batch = process_webhook.DRAIN_BATCH_SIZE
+	coalesced = 0
+	for start in range(0, len(rows), batch):
+		chunk = rows[start:start + batch]
+		began = time.perf_counter()
+		for row in chunk:
+			row["payload"] = process_webhook._parse_payload(row)
+		keep, superseded = process_webhook._coalesce(chunk)
+		coalesced += len(superseded)
+		for row in keep:
+			if process_webhook._process_claimed(row)["status"] == "failed":
+				errors += 1
+		per_event = (time.perf_counter() - began) / max(len(chunk), 1)
+		for idx in range(start, start + len(chunk)):
+			samples[idx] += per_event
+	return {"units": len(bodies), "errors": errors, "samples": samples, "coalesced": coalesced}
+
+
+_RUNNERS: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+	"sync_orders": _run_sync_orders,
+	"sync_returns": _run_sync_returns,
+	"escrow": _run_escrow,
+	"webhook": _run_webhook,
+}
+
+
+def run_pipeline(name: str, opts: Dict[str, Any]) -> Dict[str, Any]:
+	"""Run one pipeline in the current process (stub installed here) and return metrics."""
+	from . import frappe_stub
+
+	frappe = frappe_stub.install({
+		# Limiter off by default: the fake server is the bottleneck under test.
+		"shopee_rate_limits": {fam: [1e6, 10**6] for fam in ("default", "order", "payment", "logistics", "returns")},
+	})
+	from .. import clients
+	from .fake_shopee import FakeShopee, FakeShopeeConfig
+
+	cfg = FakeShopeeConfig(
+		orders=opts["orders"],
+		returns=opts["returns"],
+		latency_ms=opts["latency_ms"],
+		jitter_ms=opts["jitter_ms"],
+		max_page_size=opts["page_size"],
+		items_per_order=opts["items"],
+		payload_bytes=opts["payload_bytes"],
+		rate_429=opts["rate_429"],
+		retry_after=opts["retry_after"],
+	)
+	with FakeShopee(cfg) as srv:
+		frappe.conf["shopee_api_base_url"] = srv.base_url
+		frappe_stub.reset()
+		with _CallTimer(clients) as timer:
+			started = time.perf_counter()
+			res = _RUNNERS[name](opts)
+			wall = time.perf_counter() - started
+		api = srv.stats()
+	samples = res.pop("samples", None) or timer.samples
+	units = max(int(res.get("units") or 0), 1)
+	out = {
+		"pipeline": name,
+		"units": res.get("units", 0),
+		"wall_s": round(wall, 3),
+		"units_per_s": round(units / wall, 1) if wall else 0.0,
+		"api_calls": api["total_calls"],
+		"api_calls_per_unit": round(api["total_calls"] / units, 3),
+		"throttled_429": api["total_throttled"],
+		"p50_ms": round(percentile(samples, 50) * 1000, 2),
+		"p95_ms": round(percentile(samples, 95) * 1000, 2),
+		"p99_ms": round(percentile(samples, 99) * 1000, 2),
+		"db_calls_per_unit": round(sum(frappe.db.calls.values()) / units, 3),
+		"errors": res.get("errors", 0),
+		"peak_rss_mb": peak_rss_mb(),
+	}
+	for key, value in res.items():
+		out.setdefault(key, value)
+	return out
+
+
+def _child(name: str, opts: Dict[str, Any], queue) -> None:
+	try:
+		queue.put(run_pipeline(name, opts))
+	except Exception as exc:  # report instead of hanging the parent
+		queue.put({"pipeline": name, "failed": f"{type(exc).__name__}: {exc}"})
+
+
+def run_isolated(name: str, opts: Dict[str, Any]) -> Dict[str, Any]:
+	"""Run one pipeline in a spawned interpreter (clean RSS, clean module state)."""
+	ctx = multiprocessing.get_context("spawn")
+	queue = ctx.Queue()
+	proc = ctx.Process(target=_child, args=(name, opts, queue))
+	proc.start()
+	try:
+		result = queue.get(timeout=opts["timeout"])
+	except Exception:
+		result = {"pipeline": name, "failed": "timeout"}
+	proc.join(5)
+	if proc.is_alive():
+		proc.terminate()
+	return result
+
+
+_COLUMNS = (
+	("pipeline", 13),
+	("units", 7),
+	("wall_s", 8),
+	("units_per_s", 11),
+	("api_calls_per_unit", 18),
+	("throttled_429", 13),
+	("p50_ms", 8),
+	("p95_ms", 8),
+	("p99_ms", 8),
+	("db_calls_per_unit", 17),
+	("errors", 6),
+	("peak_rss_mb", 11),
+)
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+	lines = [" ".join(name.rjust(width) for name, width in _COLUMNS)]
+	for row in results:
+		if "failed" in row:
+			lines.append(f"{row['pipeline']:>13} FAILED {row['failed']}")
+			continue
+		lines.append(" ".join(str(row.get(name, "")).rjust(width) for name, width in _COLUMNS))
+	return "\n".join(lines)
+
+
+def _parse_args(argv: List[str] | None) -> argparse.Namespace:
+	p = argparse.ArgumentParser(description="Benchmark Shopee Bridge pipelines against a local Shopee stand-in.")
+	p.add_argument("pipelines", nargs="*", help=f"subset of {', '.join(PIPELINES)} (default: all)")
+	p.add_argument("--orders", type=int, default=1000, help="orders in the fake list window")
+	p.add_argument("--returns", type=int, default=200, help="returns in the fake list window")
+	p.add_argument("--escrows", type=int, default=300, help="escrow details to fetch")
+	p.add_argument("--webhook-events", type=int, default=3000, help="push events for the webhook pipeline")
+	p.add_argument("--latency-ms", type=float, default=20.0)
+	p.add_argument("--jitter-ms", type=float, default=5.0)
+	p.add_argument("--page-size", type=int, default=100, help="server cap on list page size")
+	p.add_argument("--items", type=int, default=3, help="line items per order")
+	p.add_argument("--payload-bytes", type=int, default=512, help="filler bytes per order / escrow body")
+	p.add_argument("--rate-429", type=float, default=0.0, help="probability of an injected 429")
+	p.add_argument("--retry-after", type=float, default=0.05, help="Retry-After seconds on injected 429s")
+	p.add_argument("--concurrency", type=int, default=1, help="order detail / escrow fetch concurrency")
+	p.add_argument("--timeout", type=float, default=900.0, help="per-pipeline timeout (s)")
+	p.add_argument("--json", dest="json_path", help="also write results to this JSON file")
+	args = p.parse_args(argv)
+	unknown = sorted(set(args.pipelines) - set(PIPELINES))
+	if unknown:
+		p.error(f"unknown pipeline(s): {', '.join(unknown)}")
+	return args
+
+
+def main(argv: List[str] | None = None) -> List[Dict[str, Any]]:
+	args = _parse_args(argv)
+	opts = {k: v for k, v in vars(args).items() if k not in ("pipelines", "json_path")}
+	results = [run_isolated(name, opts) for name in (args.pipelines or PIPELINES)]
+	print(format_table(results))
+	if args.json_path:
+		with open(args.json_path, "w") as fh:
+			json.dump({"options": opts, "results": results}, fh, indent=2)
+	return results
+
+
+if __name__ == "__main__":
+	main()
@@ -7,7 +7,20 @@ Abstractions:
 
 Design notes:
 	- No business mapping here; only raw HTTP mechanics.
-	- Lightweight retry for 429 / 5xx (max 2 retries: delays 1s then 3s).
+	- Every send first takes a token from the shared Redis bucket in `ratelimit`
+	  (per shop + API path family) so workers stay inside the partner quota.
+	- Retry for 429 / 5xx is driven by a `RetryPolicy` chosen per endpoint
+	  (`RETRY_POLICIES`): jittered exponential backoff, server hints
+	  (Retry-After / rate-limit reset headers) win over the computed delay, and a
+	  rolling per-endpoint retry budget stops retry storms. Inside `deferrable()`
+	  a long wait raises `RetryDeferred` instead of sleeping so the job can
+	  re-enqueue its remaining work with `defer_job`.
+	- Connections are pooled per worker process: one `requests.Session` with a
+	  bounded keep-alive pool per host, evicted after an idle period and rebuilt
+	  after fork (RQ workers fork per job). `connection_stats()` exposes counters
+	  for connections opened vs reused.
+	- `http_get_many` fans one path out over a small thread pool; signing stays
+	  in the calling thread because frappe's DB / settings access is thread-local.
 	- 401 refresh sequence: obtain refresh payload via auth.refresh_token_via_api(); the
 	  actual network call that exchanges refresh token SHOULD be done elsewhere and
 	  persisted (TODO). Here we only demonstrate logical flow and re-sign request after
@@ -21,8 +34,16 @@ Assumptions:
 
 from __future__ import annotations
 
-from typing import Any, Callable, Dict, Optional, Union
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Union
 import json as _json
+import os
+import random
+import threading
 import time
 import traceback
 
@@ -30,6 +51,7 @@ import frappe
 
 try:  # Prefer requests
 	import requests  # type: ignore
+	from requests.adapters import HTTPAdapter  # type: ignore
 	_HAS_REQUESTS = True
 except Exception:  # pragma: no cover - fallback path
 	from frappe.integrations.utils import (  # type: ignore
@@ -38,12 +60,153 @@ except Exception:  # pragma: no cover - fallback path
 	)
 	_HAS_REQUESTS = False
 
-from . import auth
+from . import auth, ratelimit
 
 DEFAULT_TIMEOUT = 20  # seconds
 RETRY_STATUSES = {429, 500, 502, 503, 504}
 MAX_RETRIES = 2
-RETRY_DELAYS = [1, 3]  # seconds
+
+# Keep-alive pool defaults (site_config overrides: shopee_pool_connections / shopee_pool_maxsize / shopee_pool_idle_seconds)
+POOL_CONNECTIONS = 4  # number of distinct host pools kept
+POOL_MAXSIZE = 10  # max idle keep-alive connections per host
+POOL_IDLE_SECONDS = 55  # drop the session if unused for longer (Shopee edge closes idle sockets ~60s)
+
+_session_lock = threading.Lock()
+_session: Any = None
+_session_pid: int | None = None
+_session_last_used = 0.0
+_stats: Dict[str, int] = {
+	"sessions_created": 0,
+	"connections_opened": 0,
+	"connections_reused": 0,
+	"requests": 0,
+}
+
+
+def _conf_int(key: str, default: int) -> int:
+	try:
+		return int(frappe.conf.get(key) or default)
+	except Exception:
+		return default
+
+
+def _pool_counters(session: Any) -> tuple[int, int]:
+	"""Return (opened, reused) connection counts from a session's urllib3 pools."""
+	opened = reused = 0
+	try:
+		# Same adapter is mounted for http:// and https://; count it once.
+		adapters = {id(a): a for a in session.adapters.values()}.values()
+		for adapter in adapters:
+			pools = adapter.poolmanager.pools
+			for key in list(pools.keys()):
+				pool = pools.get(key)
+				if pool is None:
+					continue
+				made = int(getattr(pool, "num_connections", 0))
+				served = int(getattr(pool, "num_requests", 0))
+				opened += made
+				reused += max(served - made, 0)
+	except Exception:  # pragma: no cover - counters are best-effort
+		pass
+	return opened, reused
+
+
+def _close_session_locked() -> None:
+	global _session, _session_pid
+	if _session is not None:
+		opened, reused = _pool_counters(_session)
+		_stats["connections_opened"] += opened
+		_stats["connections_reused"] += reused
+		try:
+			_session.close()
+		except Exception:  # pragma: no cover
+			pass
+	_session = None
+	_session_pid = None
+
+
+def _new_session() -> Any:
+	session = requests.Session()
+	adapter = HTTPAdapter(
+		pool_connections=_conf_int("shopee_pool_connections", POOL_CONNECTIONS),
+		pool_maxsize=_conf_int("shopee_pool_maxsize", POOL_MAXSIZE),
+		max_retries=0,  # retries are handled by _execute_with_retry
+	)
+	session.mount("https://", adapter)
+	session.mount("http://", adapter)
+	_stats["sessions_created"] += 1
+	return session
+
+
+def _get_session() -> Any:
+	"""Return the per-process pooled session, rebuilding it after fork or idle timeout."""
+	global _session, _session_pid, _session_last_used
+	with _session_lock:
+		now = time.monotonic()
+		pid = os.getpid()
+		if _session is not None and _session_pid != pid:
+			# Inherited from parent across fork: sockets are shared, never reuse them.
+			_session = None
+			_session_pid = None
+		idle_limit = _conf_int("shopee_pool_idle_seconds", POOL_IDLE_SECONDS)
+		if _session is not None and now - _session_last_used > idle_limit:
+			_close_session_locked()
+		if _session is None:
+			_session = _new_session()
+			_session_pid = pid
+		_session_last_used = now
+		_stats["requests"] += 1
+		return _session
+
+
+def reset_session() -> None:
+	"""Close the pooled session (next request opens a fresh one)."""
+	with _session_lock:
+		_close_session_locked()
+
+
+def _reset_after_fork() -> None:  # pragma: no cover - exercised only in forked workers
+	global _session, _session_pid, _session_lock
+	# Drop without closing: the sockets belong to the parent process.
+	_session_lock = threading.Lock()
+	_session = None
+	_session_pid = None
+	for key in _stats:
+		_stats[key] = 0
+
+
+if hasattr(os, "register_at_fork"):
+	os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def connection_stats() -> Dict[str, int]:
+	"""Return pooled connection counters for this worker process.
+
+	``connections_opened`` counts new TCP+TLS connections, ``connections_reused``
+	requests served over an existing keep-alive connection.
+	"""
+	with _session_lock:
+		snapshot = dict(_stats)
+		if _session is not None:
+			opened, reused = _pool_counters(_session)
+			snapshot["connections_opened"] += opened
+			snapshot["connections_reused"] += reused
+		snapshot["pid"] = os.getpid()
+		return snapshot
+
+
+def _send_raw(method: str, url: str, headers: Dict[str, str], params: Dict[str, Any] | None, json: Dict[str, Any] | None, files: Dict[str, Any] | None) -> tuple[int, str, Dict[str, Any]]:
+	"""Send over the pooled session without touching frappe (safe in worker threads)."""
+	resp = _get_session().request(
+		method,
+		url,
+		headers=headers,
+		params=params if params else None,
+		json=json if json is not None else None,
+		files=files,
+		timeout=DEFAULT_TIMEOUT,
+	)
+	return resp.status_code, resp.text, dict(resp.headers)
 
 
 def _do_request(method: str, url: str, headers: Dict[str, str], params: Dict[str, Any] | None, json: Dict[str, Any] | None, files: Dict[str, Any] | None) -> tuple[int, str, Dict[str, Any]]:
@@ -53,16 +216,7 @@ def _do_request(method: str, url: str, headers: Dict[str, str], params: Dict[str
 	"""
 	if _HAS_REQUESTS:
 		try:
-			resp = requests.request(
-				method,
-				url,
-				headers=headers,
-				params=params if params else None,
-				json=json if json is not None else None,
-				files=files,
-				timeout=DEFAULT_TIMEOUT,
-			)
-			return resp.status_code, resp.text, dict(resp.headers)
+			return _send_raw(method, url, headers, params, json, files)
 		except Exception as exc:  # network / timeout etc.
 			frappe.log_error(f"Shopee HTTP {method} error: {exc}")
 			raise
@@ -94,12 +248,169 @@ def _log_short(msg: str):  # central log (truncate huge traces)
 	frappe.logger().info(msg)
 
 
+class RetryDeferred(Exception):
+	"""Raised inside `deferrable()` when a retry would sleep >= the policy's defer threshold."""
+
+	def __init__(self, path: str, retry_after: float, status: int):
+		super().__init__(f"Shopee {path} throttled (HTTP {status}); retry after {retry_after:.1f}s")
+		self.path = path
+		self.retry_after = retry_after
+		self.status = status
+
+
+class RetryPolicy:
+	"""Retry decisions for one endpoint (or family of endpoints).
+
+	Args:
+		max_retries: Retries after the first attempt.
+		base_delay: First backoff step in seconds (doubles each attempt).
+		max_delay: Cap for any single wait, including server hints.
+		jitter: "equal" (uniform step/2..step, so a retry never fires
+			instantly), "full" (uniform 0..step) or "none".
+		budget_per_minute: Max retries per rolling minute for this endpoint in
+			this worker; once spent, failures are returned without retrying.
+			Only retries that actually wait here count; deferred ones do not.
+		defer_after: In `deferrable()` context, waits of at least this many
+			seconds raise `RetryDeferred` instead of sleeping (None = never).
+	"""
+
+	def __init__(
+		self,
+		max_retries: int = MAX_RETRIES,
+		base_delay: float = 1.0,
+		max_delay: float = 30.0,
+		jitter: str = "equal",
+		budget_per_minute: int = 30,
+		defer_after: float | None = 5.0,
+	):
+		self.max_retries = max_retries
+		self.base_delay = base_delay
+		self.max_delay = max_delay
+		self.jitter = jitter
+		self.budget_per_minute = budget_per_minute
+		self.defer_after = defer_after
+		self._spent: Dict[str, Deque[float]] = {}
+		self._lock = threading.Lock()
+
+	def backoff(self, attempt: int) -> float:
+		"""Delay before retry number `attempt` (1-based)."""
+		step = min(self.max_delay, self.base_delay * (2 ** max(attempt - 1, 0)))
+		if self.jitter == "equal":
+			return random.uniform(step / 2, step)
+		if self.jitter == "full":
+			return random.uniform(0, step)
+		return step
+
+	def server_hint(self, headers: Dict[str, Any] | None) -> float | None:
+		"""Seconds to wait as advertised by the server, if any."""
+		if not headers:
+			return None
+		lowered = {str(k).lower(): v for k, v in headers.items()}
+		raw = lowered.get("retry-after")
+		if raw not in (None, ""):
+			try:
+				return max(float(raw), 0.0)
+			except (TypeError, ValueError):
+				try:
+					when = parsedate_to_datetime(str(raw))
+					return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+				except Exception:
+					pass
+		for key in ("x-ratelimit-reset", "ratelimit-reset", "x-rate-limit-reset"):
+			raw = lowered.get(key)
+			if raw in (None, ""):
+				continue
+			try:
+				val = float(raw)
+			except (TypeError, ValueError):
+				continue
+			# Large values are absolute epoch seconds, small ones a delta.
+			return max(val - time.time(), 0.0) if val > 1_000_000_000 else max(val, 0.0)
+		return None
+
+	def delay_for(self, attempt: int, headers: Dict[str, Any] | None) -> float:
+		hint = self.server_hint(headers)
+		delay = hint if hint is not None else self.backoff(attempt)
+		return min(delay, self.max_delay)
+
+	def take_budget(self, key: str) -> bool:
+		"""Consume one retry from the rolling per-minute budget for `key`."""
+		now = time.monotonic()
+		with self._lock:
+			spent = self._spent.setdefault(key, deque())
+			while spent and now - spent[0] > 60:
+				spent.popleft()
+			if len(spent) >= self.budget_per_minute:
+				return False
+			spent.append(now)
+			return True
+
+
+# Looked up by exact path, then path family (see ratelimit.path_family), then "default".
+RETRY_POLICIES: Dict[str, RetryPolicy] = {
+	"default": RetryPolicy(),
+	"order": RetryPolicy(max_retries=3, budget_per_minute=60),
+	"payment": RetryPolicy(max_retries=3, budget_per_minute=30),
+}
+
+_defer_state = threading.local()
+
+
+def get_retry_policy(path: str) -> RetryPolicy:
+	return RETRY_POLICIES.get(path) or RETRY_POLICIES.get(ratelimit.path_family(path)) or RETRY_POLICIES["default"]
+
+
+@contextmanager
+def deferrable() -> Iterator[None]:
+	"""Allow long retry waits in this thread to raise `RetryDeferred` instead of sleeping."""
+	prev = getattr(_defer_state, "on", False)
+	_defer_state.on = True
+	try:
+		yield
+	finally:
+		_defer_state.on = prev
+
+
+def defer_job(method: str, delay: float, queue: str = "long", **kwargs) -> bool:
+	"""Re-enqueue `method(**kwargs)` to run after `delay` seconds.
+
+	Uses RQ's scheduled enqueue with frappe's `execute_job` wrapper so the job
+	runs with normal site context. Falls back to an immediate `frappe.enqueue`
+	(logged) if the queue does not support scheduling. Returns True when the
+	delayed variant was used.
+	"""
+	try:
+		from frappe.utils.background_jobs import execute_job, get_queue
+
+		q = get_queue(queue)
+		q.enqueue_in(
+			timedelta(seconds=max(int(delay), 1)),
+			execute_job,
+			kwargs={
+				"site": frappe.local.site,
+				"user": frappe.session.user,
+				"method": method,
+				"event": None,
+				"job_name": method,
+				"is_async": True,
+				"kwargs": kwargs,
+			},
+		)
+		_log_short(f"[Shopee] deferred {method} by {delay:.1f}s")
+		return True
+	except Exception as exc:
+		frappe.log_error(message=f"defer {method} failed ({exc}); enqueuing now", title="Shopee Defer Job")
+		frappe.enqueue(method, queue=queue, enqueue_after_commit=True, **kwargs)
+		return False
+
+
 def _execute_with_retry(method: str, path: str, params: Dict[str, Any], json: Dict[str, Any] | None, files: Dict[str, Any] | None) -> Dict[str, Any]:
-	settings = auth._settings()
+	policy = get_retry_policy(path)
 	attempt = 0
 	last_error = None
 	while True:
 		attempt += 1
+		ratelimit.acquire(path, auth.get_signing_context().shop_id)
 		signed = auth.sign_request(path, params.copy(), None)
 		url = signed["url"]
 		headers = signed["headers"]
@@ -111,12 +422,17 @@ def _execute_with_retry(method: str, path: str, params: Dict[str, Any], json: Di
 			data = _parse_body(text)
 			data["_status"] = status
 			return data
-		if _retryable(status) and attempt <= MAX_RETRIES:
-			delay = RETRY_DELAYS[min(attempt - 1, len(RETRY_DELAYS)-1)]
-			_log_short(f"[Shopee] retry {attempt}/{MAX_RETRIES} status={status} delay={delay}s path={path}")
-			time.sleep(delay)
-			continue
-		# Non-retryable or exceeded retries
+		if _retryable(status) and attempt <= policy.max_retries:
+			delay = policy.delay_for(attempt, resp_headers)
+			if getattr(_defer_state, "on", False) and policy.defer_after is not None and delay >= policy.defer_after:
+				# Deferral is decided before the budget so re-enqueued work does not spend it.
+				_log_short(f"[Shopee] defer status={status} delay={delay:.1f}s path={path}")
+				raise RetryDeferred(path, delay, status)
+			if policy.take_budget(path):
+				_log_short(f"[Shopee] retry {attempt}/{policy.max_retries} status={status} delay={delay:.2f}s path={path}")
+				time.sleep(delay)
+				continue
+		# Non-retryable, exceeded retries or retry budget spent
 		last_error = f"HTTP {status} body={text[:300]}"
 		break
 	frappe.log_error(message=last_error, title="Shopee HTTP error")
@@ -144,6 +460,115 @@ def http_post(path: str, json: Dict[str, Any] | None = None, files: Dict[str, An
 	return rotate_on_401(lambda: _execute_with_retry("POST", path, {}, json, files))
 
 
+class _Pacer:
+	"""Thread-safe request pacer: hands out send slots at most `rate_per_sec` apart."""
+
+	def __init__(self, rate_per_sec: float | None):
+		self.interval = 1.0 / rate_per_sec if rate_per_sec and rate_per_sec > 0 else 0.0
+		self._lock = threading.Lock()
+		self._next = 0.0
+
+	def wait(self) -> None:
+		if not self.interval:
+			return
+		with self._lock:
+			now = time.monotonic()
+			slot = max(now, self._next)
+			self._next = slot + self.interval
+		if slot > now:
+			time.sleep(slot - now)
+
+
+def http_get_many(
+	path: str,
+	params_list: List[Dict[str, Any]],
+	max_workers: int = 4,
+	rate_per_sec: float | None = None,
+) -> List[Dict[str, Any]]:
+	"""Perform many signed GETs against one path with bounded concurrency.
+
+	Signing (which reads Shopee Settings through frappe) happens in the calling
+	thread just before each dispatch; pool threads only do raw HTTP. A response
+	that is not 2xx (429 / 5xx / 401) or a network error is replayed once through
+	`http_get` in the calling thread so the usual retry + 401 rotation applies.
+
+	Args:
+		path: API path shared by all calls.
+		params_list: One query dict per call.
+		max_workers: Maximum requests in flight.
+		rate_per_sec: Optional global send budget across all workers.
+	Returns:
+		One outcome per input, same order: ``{"index", "ok", "data" | "error",
+		"status", "duration_s"}``. Never raises for a single failed call.
+	"""
+	outcomes: List[Dict[str, Any] | None] = [None] * len(params_list)
+	if not params_list:
+		return []
+	workers = max(1, int(max_workers))
+	pacer = _Pacer(rate_per_sec)
+
+	def _send(url: str, headers: Dict[str, str]) -> tuple[int, str, float]:
+		pacer.wait()
+		t0 = time.monotonic()
+		status, text, _hdrs = _send_raw("GET", url, headers, None, None, None)
+		return status, text, time.monotonic() - t0
+
+	def _fallback(idx: int, started: float, reason: str | None = None) -> None:
+		try:
+			pacer.wait()
+			data = http_get(path, params_list[idx])
+			outcomes[idx] = {"index": idx, "ok": True, "data": data, "status": data.get("_status"), "duration_s": round(time.monotonic() - started, 3)}
+		except RetryDeferred:
+			raise
+		except Exception as exc:
+			outcomes[idx] = {"index": idx, "ok": False, "error": (f"{reason}; retry: {exc}" if reason else str(exc))[:500], "status": None, "duration_s": round(time.monotonic() - started, 3)}
+
+	pending: Dict[Any, tuple[int, float]] = {}
+	replay: List[tuple[int, float, str]] = []
+
+	def _collect(fut) -> None:
+		idx, started = pending.pop(fut)
+		try:
+			status, text, _elapsed = fut.result()
+		except Exception as exc:  # network error inside worker thread
+			replay.append((idx, started, f"network: {exc}"))
+			return
+		if 200 <= status < 300:
+			data = _parse_body(text)
+			data["_status"] = status
+			outcomes[idx] = {"index": idx, "ok": True, "data": data, "status": status, "duration_s": round(time.monotonic() - started, 3)}
+		else:
+			replay.append((idx, started, f"HTTP {status}"))
+
+	if not _HAS_REQUESTS or workers == 1:
+		for idx, params in enumerate(params_list):
+			_fallback(idx, time.monotonic())
+		return outcomes  # type: ignore[return-value]
+
+	shop_id = auth.get_signing_context().shop_id
+	with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shopee-http") as pool:
+		for idx, params in enumerate(params_list):
+			while len(pending) >= workers:
+				done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+				for fut in done:
+					_collect(fut)
+			try:
+				ratelimit.acquire(path, shop_id)
+				signed = auth.sign_request(path, dict(params), None)
+			except Exception as exc:
+				outcomes[idx] = {"index": idx, "ok": False, "error": f"dispatch: {exc}"[:500], "status": None, "duration_s": 0.0}
+				continue
+			pending[pool.submit(_send, signed["url"], signed["headers"])] = (idx, time.monotonic())
+		while pending:
+			done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+			for fut in done:
+				_collect(fut)
+	for idx, started, reason in sorted(replay):
+		_log_short(f"[Shopee] http_get_many replay index={idx} reason={reason} path={path}")
+		_fallback(idx, started, reason)
+	return outcomes  # type: ignore[return-value]
+
+
 def rotate_on_401(send_callable: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
 	"""Execute a send callable; on 401 attempt one refresh cycle then retry.
 
@@ -159,7 +584,7 @@ def rotate_on_401(send_callable: Callable[[], Dict[str, Any]]) -> Dict[str, Any]
 		# produce refresh payload (not used directly here)
 		auth.refresh_token_via_api()
 		# TODO: actual HTTP refresh + save new token values must be executed externally.
-		frappe.cache().delete_value("Shopee Settings")
+		auth.invalidate_settings_cache()
 	except Exception as exc:
 		frappe.log_error(f"Shopee refresh error: {exc}")
 		return first  # return original error
@@ -167,4 +592,17 @@ def rotate_on_401(send_callable: Callable[[], Dict[str, Any]]) -> Dict[str, Any]
 	return second
 
 
-__all__ = ["http_get", "http_post", "rotate_on_401"]
+__all__ = [
+	"http_get",
+	"http_post",
+	"http_get_many",
+	"rotate_on_401",
+	"connection_stats",
+	"reset_session",
+	"RetryPolicy",
+	"RetryDeferred",
+	"RETRY_POLICIES",
+	"get_retry_policy",
+	"deferrable",
+	"defer_job",
+]
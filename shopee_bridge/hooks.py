@@ -28,6 +28,9 @@ after_install = "shopee_bridge.setup.install_v2.after_install"
 # Scheduler (cron based). Jobs are lightweight orchestrators; heavy logic lives in services.
 scheduler_events = {
     "cron": {
+        "* * * * *": [
+            "shopee_bridge.jobs.ingest_webhook.materialize",
+        ],
         "*/10 * * * *": [
             "shopee_bridge.jobs.sync_orders.run",
             "shopee_bridge.jobs.sync_shipping.run",
@@ -83,6 +86,7 @@ override_whitelisted_methods = {
     "shopee_bridge.api.sync_finance_api": "shopee_bridge.api.sync_finance_api",
     "shopee_bridge.api.reconcile_bank_api": "shopee_bridge.api.reconcile_bank_api",
     "shopee_bridge.api.sync_escrow_batch": "shopee_bridge.api.sync_escrow_batch",
+    "shopee_bridge.api.get_backfill_progress": "shopee_bridge.api.get_backfill_progress",
     
     # Utilities
     "shopee_bridge.api.get_health_status": "shopee_bridge.api.get_health_status",
@@ -1,20 +1,59 @@
-"""Full fiscal year backfill orchestrator job."""
+"""Full fiscal year backfill orchestrator job.
+
+Checkpointed per (stage, chunk) via `services.fiscal`: re-running the job for
+the same company / fiscal year resumes at the first unfinished chunk. With
+site_config ``shopee_backfill_mode = "fanout"`` (or ``mode="fanout"``) the
+chunks run as separate long-queue jobs (`run_chunk`) and `finalize` writes the
+aggregated summary once the last one finishes (`fiscal.backfill_fanin` also
+saves it as a private JSON File).
+"""
 
 from typing import Dict, Any
 import frappe
 
 
-def run(company: str, fiscal_year_name: str) -> Dict[str, Any]:
+def _write_log(*args, **kwargs) -> None:
+    """Write a Shopee Sync Log entry when that doctype module is installed.
+
+    The summary is still returned (and, for fan-in, saved as a File) when it
+    is not, so a missing log module never fails the job.
+    """
+    try:
+        from ..doctype.shopee_sync_log.shopee_sync_log import write_log
+    except ImportError:
+        frappe.logger().info(f"[Shopee][backfill_fy] sync log unavailable: {args[:3]}")
+        return
+    write_log(*args, **kwargs)
+
+
+def run(company: str, fiscal_year_name: str, resume: bool = True, mode: str | None = None) -> Dict[str, Any]:
     from ..services import fiscal
-    from ..doctype.shopee_sync_log.shopee_sync_log import write_log
     summary: Dict[str, Any] = {"company": company, "fiscal_year": fiscal_year_name}
     try:
-        res = fiscal.run_fiscal_year_full_sync(company, fiscal_year_name)
+        if (mode or fiscal.backfill_mode()) == "fanout":
+            res = fiscal.start_fiscal_year_fanout(company, fiscal_year_name, resume=resume)
+            summary.update(res)
+            _write_log("backfill_fy", f"fy:{fiscal_year_name}", "ok" if res.get("ok") else "fail", meta=summary)
+            return summary
+        res = fiscal.run_fiscal_year_full_sync(company, fiscal_year_name, resume=resume)
         summary.update(res)
         status = "ok" if res.get("ok") else "fail"
-        write_log("backfill_fy", f"fy:{fiscal_year_name}", status, meta=summary)
+        _write_log("backfill_fy", f"fy:{fiscal_year_name}", status, meta=summary)
     except Exception as exc:  # pragma: no cover
         summary["error"] = str(exc)
-        write_log("backfill_fy", f"fy:{fiscal_year_name}", "fail", message=str(exc))
+        _write_log("backfill_fy", f"fy:{fiscal_year_name}", "fail", message=str(exc))
     return summary
 
+
+def run_chunk(checkpoint: str) -> Dict[str, Any]:
+    """Fan-out worker: one (stage, chunk) checkpoint, then dispatch successors."""
+    from ..services import fiscal
+    return fiscal.run_backfill_chunk(checkpoint)
+
+
+def finalize(run_key: str) -> Dict[str, Any]:
+    """Fan-in: aggregate the run's checkpoints and log the final summary."""
+    from ..services import fiscal
+    summary = fiscal.backfill_fanin(run_key)
+    _write_log("backfill_fy", run_key, "ok" if summary.get("ok") else "fail", meta=summary)
+    return summary
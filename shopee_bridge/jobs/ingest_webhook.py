@@ -0,0 +1,390 @@
+"""Webhook ingestion: signature check, inbox row building and the stream fast path.
+
+Two ingestion modes (site_config ``shopee_webhook_ingest``):
+ - ``direct`` (default): the endpoint verifies the signature, parses the body
+   and inserts the Shopee Webhook Inbox row before acking.
+ - ``stream``: the endpoint only XADDs the raw body, headers, URL and receive
+   time to a Redis stream and acks. `materialize` reads the stream as a
+   consumer group, verifies signatures (timestamp drift is measured against
+   the receive time, not the materialize time), builds inbox rows and writes
+   each batch with one multi-row INSERT IGNORE, then XACKs the entries and
+   kicks the inbox drain. If the stream append fails the endpoint falls back
+   to ``direct``.
+
+The stream lives on the RQ queue Redis (``redis_queue``), not on
+`frappe.cache()`: the cache instance runs with an evicting LRU policy and an
+entry evicted after Shopee was acked would be a webhook lost without a trace.
+
+Delivery from the stream is at-least-once. The inbox name is derived from the
+stream entry id (and idempotency_key is unique), so entries re-delivered after
+a crash between commit and XACK are dropped by INSERT IGNORE.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import socket
+import time
+import frappe
+
+from .. import auth, mappers
+
+STREAM_KEY = "shopee_bridge:webhook_stream"
+STREAM_GROUP = "materializer"
+STREAM_MAXLEN = 100000  # approximate cap; entries are XDELed once materialized
+STALE_CLAIM_MS = 60000  # re-claim entries a crashed consumer left pending this long
+MATERIALIZE_BATCH_SIZE = 500
+MATERIALIZE_MAX_BATCHES = 20
+MATERIALIZE_JOB_ID = "shopee_bridge_webhook_materialize"
+INBOX_TABLE = "tabShopee Webhook Inbox"
+_INBOX_COLUMNS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"docstatus",
+	"event_type",
+	"source_env",
+	"idempotency_key",
+	"signature_valid",
+	"status",
+	"payload_hash",
+	"payload_json",
+	"error_message",
+	"attempts",
+)
+
+
+def _log(msg: str):
+	frappe.logger().info(f"[Shopee][webhook][ingest] {msg}")
+
+
+def ingest_mode() -> str:
+	mode = (frappe.conf.get("shopee_webhook_ingest") or "direct").lower()
+	return mode if mode in {"direct", "stream"} else "direct"
+
+
+def derive_inbox_key(payload: Dict[str, Any]) -> str:
+	"""Idempotency key for an inbox row (SHA1 of common distinguishing fields)."""
+	# Pick common distinguishing fields (fallback to full payload hash)
+	parts: List[str] = []
+	for key in ["event_type", "order_sn", "return_sn", "status", "update_time"]:
+		val = payload.get(key)
+		if val is not None:
+			parts.append(str(val))
+	if not parts:
+		parts.append(json.dumps(payload, sort_keys=True))
+	raw = "|".join(parts)
+	return hashlib.sha1(raw.encode("utf-8")).hexdigest()  # noqa: S324 (non‑crypto uniqueness ok)
+
+
+def _push_key(settings, source_env: str) -> str:
+	enabled_flag = settings.webhook_live_enabled if source_env == "live" else settings.webhook_test_enabled
+	if not enabled_flag:
+		raise frappe.PermissionError(f"Webhook {source_env} disabled")
+	push_key_field = "live_partner_push_key" if source_env == "live" else "test_partner_push_key"
+	push_key = settings.get_password(push_key_field)
+	if not push_key:
+		raise frappe.ValidationError(f"Missing {push_key_field}")
+	return push_key
+
+
+def verify_push(
+	source_env: str,
+	path: str,
+	raw_body: bytes,
+	headers: Dict[str, str],
+	full_url: str,
+	settings=None,
+	push_key: Optional[str] = None,
+	received_at: Optional[float] = None,
+) -> Tuple[int, Optional[str]]:
+	"""Verify a push signature without raising.
+
+	Args:
+		source_env: 'live' or 'test' (selects enable flag and push key).
+		path / raw_body / headers / full_url: As received by the endpoint.
+		settings: Shopee Settings doc (fetched when omitted).
+		push_key: Pre-resolved push key (skips settings lookup).
+		received_at: Epoch seconds the delivery was received (default now);
+			reference for the timestamp drift check.
+	Returns:
+		(signature_valid 1/0, error message or None). Config problems
+		(endpoint disabled, missing key) count as invalid so the row is still
+		recorded for audit.
+	"""
+	try:
+		if push_key is None:
+			push_key = _push_key(settings or frappe.get_cached_doc("Shopee Settings"), source_env)
+		auth.verify_webhook_signature(
+			path=path,
+			raw_body=raw_body,
+			headers=headers,
+			push_key=push_key,
+			full_url=full_url,
+			received_at=received_at,
+		)
+		return 1, None
+	except Exception as exc:
+		return 0, str(exc)
+
+
+def inbox_fields(source_env: str, raw_body: bytes, signature_valid: int) -> Dict[str, Any]:
+	"""Build Shopee Webhook Inbox field values (status=queued) from a raw body."""
+	try:
+		payload_json = raw_body.decode("utf-8") if raw_body else "{}"
+		payload = json.loads(payload_json or "{}")
+		if not isinstance(payload, dict):
+			raise ValueError("payload is not an object")
+	except Exception:
+		payload = {}
+		payload_json = "{}"
+		raw_body = b"{}"
+	return {
+		"event_type": payload.get("event_type") or payload.get("type") or "unknown",
+		"source_env": source_env,
+		"idempotency_key": derive_inbox_key(payload),
+		"signature_valid": signature_valid,
+		"status": "queued",
+		# Digest of the raw bytes as received: no decode -> re-encode round trip.
+		"payload_hash": mappers.digest_bytes(raw_body or b"{}"),
+		"payload_json": payload_json,
+	}
+
+
+# ---------------------------------------------------------------------------
+# Stream fast path
+# ---------------------------------------------------------------------------
+
+def _stream() -> Tuple[Any, str]:
+	"""Return the queue Redis connection and this site's stream key."""
+	from frappe.utils.background_jobs import get_redis_conn
+
+	return get_redis_conn(), f"{frappe.conf.db_name}|{STREAM_KEY}"
+
+
+def append(source_env: str, raw_body: bytes, headers: Dict[str, str], path: str, full_url: str) -> str:
+	"""XADD one raw webhook delivery to the ingest stream; returns the entry id.
+
+	Raises on any Redis error so the caller can fall back to direct ingestion.
+	"""
+	conn, key = _stream()
+	entry_id = conn.xadd(
+		key,
+		{
+			"env": source_env,
+			"body": raw_body or b"",
+			"headers": json.dumps(headers),
+			"path": path,
+			"url": full_url,
+			"ts": f"{time.time():.3f}",
+		},
+		maxlen=STREAM_MAXLEN,
+		approximate=True,
+	)
+	entry_id = entry_id.decode() if isinstance(entry_id, bytes) else str(entry_id)
+	enqueue_materialize()
+	return entry_id
+
+
+def enqueue_materialize(continuation: bool = False) -> None:
+	"""Enqueue a materializer job unless one is already queued (RQ job_id dedup).
+
+	``continuation=True`` (a running materializer at its batch cap) enqueues
+	without the fixed job_id, which the calling job still holds.
+	"""
+	if continuation:
+		frappe.enqueue("shopee_bridge.jobs.ingest_webhook.materialize", queue="short")
+		return
+	try:
+		frappe.enqueue(
+			"shopee_bridge.jobs.ingest_webhook.materialize",
+			queue="short",
+			job_id=MATERIALIZE_JOB_ID,
+			deduplicate=True,
+		)
+	except TypeError:  # older frappe without job_id/deduplicate
+		frappe.enqueue("shopee_bridge.jobs.ingest_webhook.materialize", queue="short")
+
+
+def _consumer_name() -> str:
+	return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _ensure_group(conn, key: str) -> None:
+	try:
+		conn.xgroup_create(key, STREAM_GROUP, id="0", mkstream=True)
+	except Exception as exc:
+		if "BUSYGROUP" not in str(exc):
+			raise
+
+
+def _read_batch(conn, key: str, count: int) -> List[Tuple[str, Dict[str, Any]]]:
+	"""Return up to `count` entries: stale pending ones first, then new ones."""
+	consumer = _consumer_name()
+	entries: List[Any] = []
+	try:
+		claimed = conn.xautoclaim(key, STREAM_GROUP, consumer, STALE_CLAIM_MS, start_id="0-0", count=count)
+		entries.extend(claimed[1] or [])
+	except Exception:  # Redis < 6.2: stale entries wait for a manual XCLAIM
+		pass
+	if len(entries) < count:
+		resp = conn.xreadgroup(STREAM_GROUP, consumer, {key: ">"}, count=count - len(entries))
+		for _stream, items in resp or []:
+			entries.extend(items)
+	out: List[Tuple[str, Dict[str, Any]]] = []
+	for entry_id, fields in entries:
+		entry_id = entry_id.decode() if isinstance(entry_id, bytes) else str(entry_id)
+		if not fields:  # deleted while pending: ack so it is not re-claimed forever
+			conn.xack(key, STREAM_GROUP, entry_id)
+			continue
+		decoded = {(k.decode() if isinstance(k, bytes) else k): v for k, v in fields.items()}
+		out.append((entry_id, decoded))
+	return out
+
+
+def _text(value: Any) -> str:
+	return value.decode("utf-8") if isinstance(value, bytes) else str(value or "")
+
+
+def _build_row(entry_id: str, fields: Dict[str, Any], push_keys: Dict[str, Any], settings, now) -> Tuple[Any, ...]:
+	source_env = _text(fields.get("env")) or "live"
+	raw_body = fields.get("body") or b""
+	if isinstance(raw_body, str):
+		raw_body = raw_body.encode("utf-8")
+	try:
+		headers = json.loads(_text(fields.get("headers")) or "{}")
+	except Exception:
+		headers = {}
+	if source_env not in push_keys:
+		try:
+			push_keys[source_env] = _push_key(settings, source_env)
+		except Exception as exc:
+			push_keys[source_env] = exc
+	push_key = push_keys[source_env]
+	try:
+		received_at: Optional[float] = float(_text(fields.get("ts")))
+	except ValueError:
+		received_at = None
+	if isinstance(push_key, Exception):
+		signature_valid, sig_err = 0, str(push_key)
+	else:
+		signature_valid, sig_err = verify_push(
+			source_env,
+			_text(fields.get("path")),
+			raw_body,
+			headers,
+			_text(fields.get("url")),
+			push_key=push_key,
+			received_at=received_at,
+		)
+	row = inbox_fields(source_env, raw_body, signature_valid)
+	return (
+		f"ws-{entry_id}",
+		now,
+		now,
+		"Guest",
+		"Guest",
+		0,
+		row["event_type"],
+		row["source_env"],
+		row["idempotency_key"],
+		row["signature_valid"],
+		row["status"],
+		row["payload_hash"],
+		row["payload_json"],
+		(sig_err or "")[:140] or None,
+		0,
+	)
+
+
+def _count_names(names: Tuple[str, ...]) -> int:
+	return int(frappe.db.sql(f"SELECT COUNT(*) FROM `{INBOX_TABLE}` WHERE name IN %(names)s", {"names": names})[0][0])
+
+
+def materialize(batch_size: int = MATERIALIZE_BATCH_SIZE, max_batches: int = MATERIALIZE_MAX_BATCHES) -> Dict[str, Any]:
+	"""Turn ingest stream entries into Shopee Webhook Inbox rows in batches.
+
+	Each round: read (stale claims + new) -> verify + build rows -> one
+	INSERT IGNORE -> commit -> XACK/XDEL. Duplicates (re-delivered entries or
+	an existing idempotency_key) are ignored by the INSERT. ``inserted`` is
+	the growth in matching inbox names across the INSERT, so an entry whose
+	row was committed before a crash counts as a duplicate when re-delivered.
+
+	Returns counters: batches, read, inserted, duplicates, invalid_signature, duration_s.
+	"""
+	started = time.time()
+	counts = {"batches": 0, "read": 0, "inserted": 0, "duplicates": 0, "invalid_signature": 0}
+	conn, key = _stream()
+	if not conn.xlen(key):  # nothing ingested via the stream (or all acked)
+		counts["duration_s"] = 0.0
+		return counts
+	_ensure_group(conn, key)
+	try:
+		settings = frappe.get_cached_doc("Shopee Settings")
+	except Exception:
+		settings = None
+	push_keys: Dict[str, Any] = {} if settings is not None else {
+		"live": frappe.ValidationError("Shopee Settings not configured"),
+		"test": frappe.ValidationError("Shopee Settings not configured"),
+	}
+	for _ in range(max(1, int(max_batches))):
+		entries = _read_batch(conn, key, int(batch_size))
+		if not entries:
+			break
+		counts["batches"] += 1
+		counts["read"] += len(entries)
+		now = frappe.utils.now_datetime()
+		rows = [_build_row(entry_id, fields, push_keys, settings, now) for entry_id, fields in entries]
+		counts["invalid_signature"] += sum(1 for r in rows if not r[9])
+		names = tuple(r[0] for r in rows)
+		before = _count_names(names)
+		frappe.db.bulk_insert("Shopee Webhook Inbox", _INBOX_COLUMNS, rows, ignore_duplicates=True)
+		inserted = _count_names(names) - before
+		frappe.db.commit()
+		counts["inserted"] += inserted
+		counts["duplicates"] += len(rows) - inserted
+		ids = [entry_id for entry_id, _ in entries]
+		conn.xack(key, STREAM_GROUP, *ids)
+		conn.xdel(key, *ids)
+	else:
+		enqueue_materialize(continuation=True)  # batch cap reached with entries left: continue in a fresh job
+	if counts["inserted"]:
+		from . import process_webhook
+
+		process_webhook.enqueue_processing()
+	counts["duration_s"] = round(time.time() - started, 2)
+	if counts["read"]:
+		_log(f"materialize {counts}")
+	return counts
+
+
+def stream_backlog() -> Dict[str, int]:
+	"""Return stream length and entries pending (read but not acked) in the materializer group."""
+	try:
+		conn, key = _stream()
+		length = int(conn.xlen(key) or 0)
+		pending = 0
+		for group in conn.xinfo_groups(key) or []:
+			name = group.get("name") or group.get(b"name")
+			if _text(name) == STREAM_GROUP:
+				pending = int(group.get("pending") or group.get(b"pending") or 0)
+		return {"length": length, "pending": pending}
+	except Exception:
+		return {"length": 0, "pending": 0}
+
+
+__all__ = [
+	"ingest_mode",
+	"derive_inbox_key",
+	"verify_push",
+	"inbox_fields",
+	"append",
+	"enqueue_materialize",
+	"materialize",
+	"stream_backlog",
+]
@@ -2,6 +2,15 @@
 
 Processes queued inbox entries, routes to appropriate service handler, and
 manages retry scheduling with exponential-ish backoff.
+
+Two dispatch modes (site_config ``shopee_webhook_dispatch``):
+ - ``drain`` (default): ingestion enqueues one deduplicated `drain` job which
+   claims up to DRAIN_BATCH_SIZE queued rows per round with
+   ``SELECT ... FOR UPDATE SKIP LOCKED``, runs the handlers in-process and
+   writes statuses back with bulk UPDATEs. Safe to run in several workers.
+   Superseded pushes for the same order / return inside a batch are coalesced:
+   only the newest update_time is handled, the rest are bulk-marked skipped.
+ - ``per_event``: legacy behaviour, one `run(inbox=...)` job per row.
 """
 
 from __future__ import annotations
@@ -12,9 +21,20 @@ import json
 import time
 import frappe
 
+from .. import ratelimit
 from ..services import webhook_handlers
 
 BACKOFF_SCHEDULE_SECONDS = [60, 300, 900, 3600, 10800]  # 1m,5m,15m,1h,3h
+INBOX_TABLE = "tabShopee Webhook Inbox"
+DRAIN_BATCH_SIZE = 200
+DRAIN_MAX_BATCHES = 50  # per job run; leftovers are picked up by the next drain
+DRAIN_JOB_ID = "shopee_bridge_webhook_drain"
+# Rows claimed by a drain that died (worker crash, job timeout) stay
+# 'processing'; retry_due fails them back into the backoff schedule once their
+# claim is older than this (site_config shopee_webhook_lease_seconds). Must
+# exceed the short queue job timeout.
+DRAIN_LEASE_SECONDS = 900
+COALESCED_COUNTER_KEY = "shopee_bridge:webhook_coalesced"
 
 
 def derive_idempotency_key(event: Dict[str, Any]) -> str:
@@ -50,6 +70,19 @@ def _short_err(e: Exception) -> str:
 	return str(e)[:500]
 
 
+def _dispatch(event_type: str, payload: Dict[str, Any], env: str) -> bool:
+	"""Route payload to its handler by event_type prefix; False if unknown."""
+	if event_type.startswith("order."):
+		webhook_handlers.handle_order_push(payload, env)
+	elif event_type.startswith("returns."):
+		webhook_handlers.handle_return_push(payload, env)
+	elif event_type.startswith("logistics."):
+		webhook_handlers.handle_logistics_push(payload, env)
+	else:
+		return False
+	return True
+
+
 def run(inbox: str) -> None:  # pragma: no cover - scheduled/async context
 	"""Process a single Shopee Webhook Inbox entry by name.
 
@@ -79,13 +112,11 @@ def run(inbox: str) -> None:  # pragma: no cover - scheduled/async context
 	event_type = (payload.get("event_type") or payload.get("type") or "").lower()
 	env = doc.source_env or "live"
 	try:
-		if event_type.startswith("order."):
-			webhook_handlers.handle_order_push(payload, env)
-		elif event_type.startswith("returns."):
-			webhook_handlers.handle_return_push(payload, env)
-		elif event_type.startswith("logistics."):
-			webhook_handlers.handle_logistics_push(payload, env)
-		else:
+		# Any Shopee call made by a handler must not sleep on the shared rate
+		# bucket: RateLimited fails the event into the normal backoff schedule.
+		with ratelimit.non_blocking():
+			handled = _dispatch(event_type, payload, env)
+		if not handled:
 			doc.status = "skipped"
 			doc.error_message = f"unknown event_type={event_type}"[:140]
 			doc.processed_at = frappe.utils.now_datetime()
@@ -108,11 +139,307 @@ def run(inbox: str) -> None:  # pragma: no cover - scheduled/async context
 		_log(f"failed inbox={inbox} attempt={doc.attempts} delay={delay}s err={exc}")
 
 
+def dispatch_mode() -> str:
+	mode = (frappe.conf.get("shopee_webhook_dispatch") or "drain").lower()
+	return mode if mode in {"drain", "per_event"} else "drain"
+
+
+def enqueue_processing(inbox: str | None = None) -> None:
+	"""Schedule processing for a freshly queued inbox row according to dispatch mode."""
+	if dispatch_mode() == "per_event" and inbox:
+		frappe.enqueue("shopee_bridge.jobs.process_webhook.run", inbox=inbox, queue="short")
+		return
+	enqueue_drain()
+
+
+def enqueue_drain(continuation: bool = False) -> None:
+	"""Enqueue a drain job unless one is already queued (RQ job_id dedup).
+
+	A running drain that hits its batch cap passes ``continuation=True``: the
+	follow-up job gets no fixed job_id, since deduplication on DRAIN_JOB_ID
+	would drop it while the calling job (which owns that id) is still started.
+	"""
+	if continuation:
+		frappe.enqueue("shopee_bridge.jobs.process_webhook.drain", queue="short", enqueue_after_commit=True)
+		return
+	try:
+		frappe.enqueue(
+			"shopee_bridge.jobs.process_webhook.drain",
+			queue="short",
+			job_id=DRAIN_JOB_ID,
+			deduplicate=True,
+			enqueue_after_commit=True,
+		)
+	except TypeError:  # older frappe without job_id/deduplicate
+		frappe.enqueue("shopee_bridge.jobs.process_webhook.drain", queue="short", enqueue_after_commit=True)
+
+
+def _claim_batch(limit: int) -> List[Dict[str, Any]]:
+	"""Lock and mark up to `limit` queued rows as processing; returns claimed rows.
+
+	SKIP LOCKED lets concurrent drains claim disjoint batches. The claim is
+	committed immediately so row locks are not held while handlers run; rows
+	of a drain that dies mid-batch are released by `release_expired_claims`.
+	"""
+	rows = frappe.db.sql(
+		f"""
+		SELECT name, payload_json, source_env, attempts
+		FROM `{INBOX_TABLE}`
+		WHERE status = 'queued'
+		ORDER BY creation
+		LIMIT %(limit)s
+		FOR UPDATE SKIP LOCKED
+		""",
+		{"limit": int(limit)},
+		as_dict=True,
+	)
+	if not rows:
+		frappe.db.commit()
+		return []
+	names = tuple(r["name"] for r in rows)
+	frappe.db.sql(
+		f"""
+		UPDATE `{INBOX_TABLE}`
+		SET status = 'processing', attempts = COALESCE(attempts, 0) + 1,
+			error_message = NULL, modified = %(now)s
+		WHERE name IN %(names)s
+		""",
+		{"names": names, "now": frappe.utils.now_datetime()},
+	)
+	frappe.db.commit()
+	for r in rows:
+		r["attempts"] = (r.get("attempts") or 0) + 1
+	return rows
+
+
+def _bulk_update(status: str, outcomes: List[Dict[str, Any]]) -> None:
+	"""Write one status for many rows in a single UPDATE (per-row message / retry via CASE)."""
+	if not outcomes:
+		return
+	now = frappe.utils.now_datetime()
+	values: Dict[str, Any] = {"status": status, "now": now, "names": tuple(o["name"] for o in outcomes)}
+	err_cases: List[str] = []
+	retry_cases: List[str] = []
+	for i, o in enumerate(outcomes):
+		values[f"n{i}"] = o["name"]
+		values[f"e{i}"] = o.get("error_message")
+		values[f"r{i}"] = o.get("next_retry_at")
+		err_cases.append(f"WHEN %(n{i})s THEN %(e{i})s")
+		retry_cases.append(f"WHEN %(n{i})s THEN %(r{i})s")
+	processed_at = "NULL" if status == "failed" else "%(now)s"
+	frappe.db.sql(
+		f"""
+		UPDATE `{INBOX_TABLE}`
+		SET status = %(status)s,
+			processed_at = {processed_at},
+			error_message = CASE name {' '.join(err_cases)} END,
+			next_retry_at = CASE name {' '.join(retry_cases)} END,
+			modified = %(now)s
+		WHERE name IN %(names)s
+		""",
+		values,
+	)
+
+
+def _parse_payload(row: Dict[str, Any]) -> Dict[str, Any]:
+	try:
+		payload = json.loads(row.get("payload_json") or "{}")
+	except Exception:
+		payload = {}
+	return payload if isinstance(payload, dict) else {}
+
+
+def coalesce_key(payload: Dict[str, Any]) -> tuple[str, str] | None:
+	"""Return (event family, entity id) for events that describe one entity's latest state.
+
+	Family is the event_type prefix (order / returns / logistics); entity is
+	order_sn, return_sn or tracking number. None when the event cannot be
+	coalesced safely (unknown family or no entity).
+	"""
+	event_type = (payload.get("event_type") or payload.get("type") or "").lower()
+	family = event_type.split(".", 1)[0] if "." in event_type else ""
+	if family == "order":
+		entity = payload.get("order_sn")
+	elif family == "returns":
+		entity = payload.get("return_sn") or payload.get("returnsn")
+	elif family == "logistics":
+		entity = payload.get("order_sn") or payload.get("tracking_number") or payload.get("tracking_no")
+	else:
+		return None
+	return (family, str(entity)) if entity else None
+
+
+def _coalesce(rows: List[Dict[str, Any]]) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+	"""Split claimed rows into (rows to handle, superseded skip outcomes).
+
+	Per coalesce_key only the event with the highest update_time is handled;
+	ties go to the later-created row (rows arrive ordered by creation).
+	"""
+	newest: Dict[tuple[str, str], Dict[str, Any]] = {}
+	keep: List[Dict[str, Any]] = []
+	for row in rows:
+		payload = row["payload"]
+		key = coalesce_key(payload)
+		if key is None:
+			keep.append(row)
+			continue
+		row["_update_time"] = _update_time(payload)
+		current = newest.get(key)
+		if current is None or row["_update_time"] >= current["_update_time"]:
+			newest[key] = row
+	winners = {id(r) for r in newest.values()}
+	superseded: List[Dict[str, Any]] = []
+	for row in rows:
+		if "_update_time" not in row:
+			continue
+		if id(row) in winners:
+			keep.append(row)
+		else:
+			winner = newest[coalesce_key(row["payload"])]  # type: ignore[index]
+			superseded.append({
+				"name": row["name"],
+				"status": "skipped",
+				"error_message": f"superseded by {winner['name']}"[:140],
+			})
+	return keep, superseded
+
+
+def _update_time(payload: Dict[str, Any]) -> int:
+	try:
+		return int(payload.get("update_time") or payload.get("updated_time") or 0)
+	except Exception:
+		return 0
+
+
+def _process_claimed(row: Dict[str, Any]) -> Dict[str, Any]:
+	"""Run the handler for one claimed row inside a savepoint; returns its outcome."""
+	payload = row["payload"] if "payload" in row else _parse_payload(row)
+	event_type = (payload.get("event_type") or payload.get("type") or "").lower()
+	savepoint = f"shopee_wh_{row['name']}"[:60]
+	frappe.db.savepoint(savepoint)
+	try:
+		with ratelimit.non_blocking():
+			handled = _dispatch(event_type, payload, row.get("source_env") or "live")
+	except Exception as exc:
+		frappe.db.rollback(save_point=savepoint)
+		attempts = row.get("attempts") or 1
+		delay = BACKOFF_SCHEDULE_SECONDS[min(attempts - 1, len(BACKOFF_SCHEDULE_SECONDS) - 1)]
+		frappe.log_error(message=_short_err(exc), title="Shopee Webhook Handler Error")
+		return {
+			"name": row["name"],
+			"status": "failed",
+			"error_message": _short_err(exc),
+			"next_retry_at": frappe.utils.add_to_date(frappe.utils.now_datetime(), seconds=delay),
+		}
+	if not handled:
+		return {"name": row["name"], "status": "skipped", "error_message": f"unknown event_type={event_type}"[:140]}
+	return {"name": row["name"], "status": "done"}
+
+
+def drain(batch_size: int = DRAIN_BATCH_SIZE, max_batches: int = DRAIN_MAX_BATCHES, coalesce: bool = True) -> Dict[str, Any]:
+	"""Process queued inbox rows in claimed batches until the queue is empty.
+
+	Each round: claim (SKIP LOCKED) -> coalesce -> handle in-process -> bulk
+	status UPDATE per outcome -> commit. Coalescing groups the batch by
+	(event family, order_sn / return_sn) and only handles the newest
+	update_time; older pushes for the same entity are marked ``skipped``
+	("superseded by <inbox>") in the same bulk UPDATE. Handler side effects of
+	a failed event are rolled back to its savepoint; other events in the batch
+	are unaffected.
+
+	Returns counters: batches, claimed, done, skipped, failed, coalesced, duration_s.
+	"""
+	started = time.time()
+	counts = {"batches": 0, "claimed": 0, "done": 0, "skipped": 0, "failed": 0, "coalesced": 0}
+	for _ in range(max(1, int(max_batches))):
+		rows = _claim_batch(batch_size)
+		if not rows:
+			break
+		counts["batches"] += 1
+		counts["claimed"] += len(rows)
+		for row in rows:
+			row["payload"] = _parse_payload(row)
+		grouped: Dict[str, List[Dict[str, Any]]] = {"done": [], "skipped": [], "failed": []}
+		to_handle, superseded = (_coalesce(rows) if coalesce else (rows, []))
+		grouped["skipped"].extend(superseded)
+		counts["coalesced"] += len(superseded)
+		for row in to_handle:
+			outcome = _process_claimed(row)
+			grouped[outcome["status"]].append(outcome)
+		for status, outcomes in grouped.items():
+			_bulk_update(status, outcomes)
+			counts[status] += len(outcomes)
+		frappe.db.commit()
+	else:
+		enqueue_drain(continuation=True)  # batch cap reached with work left: continue in a fresh job
+	if counts["coalesced"]:
+		_bump_coalesced(counts["coalesced"])
+	counts["duration_s"] = round(time.time() - started, 2)
+	_log(f"drain {counts}")
+	return counts
+
+
+def _bump_coalesced(n: int) -> None:
+	try:
+		cache = frappe.cache()
+		cache.incrby(cache.make_key(COALESCED_COUNTER_KEY), int(n))
+	except Exception:  # metrics are best-effort
+		pass
+
+
+def coalesced_total() -> int:
+	"""Total events skipped as superseded since the counter was last reset."""
+	try:
+		cache = frappe.cache()
+		return int(cache.get(cache.make_key(COALESCED_COUNTER_KEY)) or 0)
+	except Exception:
+		return 0
+
+
+def release_expired_claims(lease_seconds: int | None = None) -> int:
+	"""Fail rows stuck in 'processing' longer than the drain lease; returns rows released.
+
+	The claim already counted an attempt, so released rows follow the normal
+	backoff schedule (retry due now) instead of being requeued blindly.
+	"""
+	try:
+		lease = int(lease_seconds or frappe.conf.get("shopee_webhook_lease_seconds") or DRAIN_LEASE_SECONDS)
+	except (TypeError, ValueError):
+		lease = DRAIN_LEASE_SECONDS
+	now = frappe.utils.now_datetime()
+	stale = frappe.db.sql(
+		f"""
+		SELECT name FROM `{INBOX_TABLE}`
+		WHERE status = 'processing' AND modified < %(cutoff)s
+		""",
+		{"cutoff": frappe.utils.add_to_date(now, seconds=-lease)},
+	)
+	if not stale:
+		return 0
+	frappe.db.sql(
+		f"""
+		UPDATE `{INBOX_TABLE}`
+		SET status = 'failed', error_message = 'claim lease expired', next_retry_at = %(now)s, modified = %(now)s
+		WHERE status = 'processing' AND name IN %(names)s
+		""",
+		{"names": tuple(r[0] for r in stale), "now": now},
+	)
+	frappe.db.commit()
+	_log(f"released {len(stale)} expired drain claims")
+	return len(stale)
+
+
 def retry_due() -> Dict[str, Any]:
-	"""Enqueue retry jobs for failed inbox entries whose next_retry_at is due.
+	"""Re-queue failed inbox entries whose next_retry_at is due.
 
-	Returns dict with counts of enqueued and remaining failures.
+	Rows left 'processing' by a dead drain are first failed back by
+	`release_expired_claims`. Drain mode flips due rows back to ``queued`` in
+	one UPDATE and enqueues a drain; per-event mode enqueues one `run` job
+	per row.
+
+	Returns dict with counts of enqueued, released and remaining failures.
 	"""
+	released = release_expired_claims()
 	now = frappe.utils.now_datetime()
 	due = frappe.get_all(
 		"Shopee Webhook Inbox",
@@ -121,21 +448,44 @@ def retry_due() -> Dict[str, Any]:
 			"next_retry_at": ("<=", now),  # proper filter tuple
 		},
 		fields=["name"],
-		limit=100,
+		limit=100 if dispatch_mode() == "per_event" else 1000,
 		order_by="modified asc",
 	)
 	enqueued = 0
-	for row in due:
-		frappe.enqueue(
-			"shopee_bridge.jobs.process_webhook.run",
-			inbox=row["name"],
-			queue="short",
-			enqueue_after_commit=True,
-		)
-		enqueued += 1
+	if dispatch_mode() == "drain":
+		if due:
+			frappe.db.sql(
+				f"UPDATE `{INBOX_TABLE}` SET status = 'queued', modified = %(now)s "
+				"WHERE status = 'failed' AND name IN %(names)s",
+				{"names": tuple(r["name"] for r in due), "now": now},
+			)
+			frappe.db.commit()
+			enqueued = len(due)
+		queued = frappe.db.count("Shopee Webhook Inbox", {"status": "queued"})
+		if queued:
+			enqueue_drain()  # also sweeps rows whose drain enqueue was deduplicated
+	else:
+		for row in due:
+			frappe.enqueue(
+				"shopee_bridge.jobs.process_webhook.run",
+				inbox=row["name"],
+				queue="short",
+				enqueue_after_commit=True,
+			)
+			enqueued += 1
 	remaining = frappe.db.count("Shopee Webhook Inbox", {"status": "failed"})
-	return {"enqueued": enqueued, "remaining_failed": remaining}
+	return {"enqueued": enqueued, "released": released, "remaining_failed": remaining}
 
 
-__all__ = ["derive_idempotency_key", "run", "retry_due"]
+__all__ = [
+	"derive_idempotency_key",
+	"run",
+	"drain",
+	"coalesce_key",
+	"coalesced_total",
+	"enqueue_processing",
+	"enqueue_drain",
+	"release_expired_claims",
+	"retry_due",
+]
 
@@ -1,4 +1,4 @@
-"""Bank reconciliation job (strict policy)."""
+"""Bank reconciliation job (strict or aggregated payouts, per site_config)."""
 
 from typing import Dict, Any
 import frappe
@@ -9,7 +9,7 @@ def run(days_back: int = 2) -> Dict[str, Any]:
     from ..doctype.shopee_sync_log.shopee_sync_log import write_log
     summary: Dict[str, Any] = {"days_back": days_back}
     try:
-        res = finance.reconcile_bank_strict(days_back=days_back)
+        res = finance.reconcile_bank(days_back=days_back)
         summary.update(res)
         status = "ok"
         write_log("reconcile_bank", f"days_back:{days_back}", status, meta=summary)
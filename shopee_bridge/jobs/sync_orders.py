@@ -1,16 +1,22 @@
 """Incremental order sync job.
 
-Performs a lightweight pull of order list + details for a recent window and
-invokes ensure* stubs for Sales Order / Invoice / Delivery Note creation.
+Streams order list pages -> detail chunks -> ensure* stubs for Sales Order /
+Invoice / Delivery Note creation for a recent window.
 
 Design:
  - Imports service modules lazily to avoid circulars.
+ - Upserts begin after the first list page; completed chunks are committed as
+   they finish so a mid-window failure keeps finished orders.
+ - An unfinished window (saved list cursor) is resumed on the next run before
+   the new window is pulled.
+ - Long throttling waits are not slept through: the run stops, keeps its
+   cursor and re-enqueues itself after the server-advertised delay.
  - Catches per-order exceptions and continues.
  - Writes aggregated Shopee Sync Log entry and per-order error logs.
  - Returns summary dict (JSON friendly) with counters.
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any
 import time
 import frappe
 
@@ -26,36 +32,36 @@ def run(minutes: int = 10) -> Dict[str, Any]:
         "processed": 0,
         "errors": [],
     }
+    from .. import clients
     from ..services import orders  # local import
     from ..doctype.shopee_sync_log.shopee_sync_log import write_log
 
     try:
-        sns: List[str] = orders.get_order_list(window_from, now_ts, status=None)
-        summary["orders_found"] = len(sns)
-        details = orders.get_order_detail(sns)
-        for od in details:
-            order_sn = od.get("order_sn") or "UNKNOWN"
-            try:
-                so = orders.upsert_sales_order(od)
-                status = (od.get("order_status") or "").lower()
-                si = None
-                dn = None
-                if status in {"paid", "ready_to_ship", "completed"}:
-                    si = orders.ensure_sales_invoice_for_paid(so, od)
-                if status in {"ready_to_ship", "completed"}:
-                    dn = orders.ensure_delivery_note_for_ready(si or so, od)
-                if status == "completed":
-                    orders.on_completed(order_sn)
-                summary["processed"] += 1
-            except Exception as per_exc:  # pragma: no cover
-                msg = f"{order_sn}: {per_exc}"[:400]
-                summary["errors"].append(msg)
-                write_log("sync_orders", order_sn, "fail", message=msg)
-        status = "ok" if not summary["errors"] else "partial"
-        write_log("sync_orders", f"window:{window_from}-{now_ts}", status, meta=summary)
+        with clients.deferrable():
+            svc = orders.sync_incremental_orders(updated_since_minutes=minutes)
+        summary.update({
+            "window_from": svc.get("window_from", window_from),
+            "window_to": svc.get("window_to", now_ts),
+            "orders_found": svc.get("orders_found", 0),
+            "processed": svc.get("orders_processed", 0),
+            "written": svc.get("orders_written", 0),
+            "skipped_unchanged": svc.get("orders_skipped", 0),
+            "errors": svc.get("errors", []),
+            "completed": svc.get("completed", False),
+            "resumed": svc.get("resumed"),
+        })
+        for msg in summary["errors"]:
+            if msg == svc.get("fatal"):
+                continue  # window-level failure goes into the aggregate log below
+            order_sn = msg.split(":", 1)[0]
+            write_log("sync_orders", order_sn, "fail", message=msg[:400])
+        status = "ok" if not summary["errors"] and summary["completed"] else "partial"
+        write_log("sync_orders", f"window:{summary['window_from']}-{summary['window_to']}", status, meta=summary)
+    except clients.RetryDeferred as deferred:
+        clients.defer_job("shopee_bridge.jobs.sync_orders.run", deferred.retry_after, minutes=minutes)
+        summary["deferred_s"] = round(deferred.retry_after, 1)
+        write_log("sync_orders", f"window:{window_from}-{now_ts}", "skip", message=str(deferred))
     except Exception as exc:  # fatal
         summary["errors"].append(str(exc))
-        from ..doctype.shopee_sync_log.shopee_sync_log import write_log
         write_log("sync_orders", f"window:{window_from}-{now_ts}", "fail", message=str(exc))
     return summary
-
@@ -31,21 +31,30 @@ All outputs are JSON‑serializable.
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List
 import hashlib
 import json
 from datetime import datetime, timezone
 
 __all__ = [
     "normalize_sku",
+    "ITEM_FIELD_ALIASES",
     "map_order_to_customer",
     "map_order_to_contact",
     "map_order_to_address",
     "map_order_items",
     "map_order_taxes",
+    "ESCROW_FEE_KEYS",
     "map_escrow_to_fee_row",
+    "map_orders_items_batch",
+    "rows_from_columns",
     "map_tracking_status",
     "compute_payload_hash",
+    "ORDER_SYNC_FIELDS",
+    "CANONICAL_HASH_VERSION",
+    "canonical_hash",
+    "digest_bytes",
+    "compute_order_sync_hash",
 ]
 
 
@@ -83,6 +92,17 @@ def _get(obj: Dict[str, Any], *keys: str, default: Any = "") -> Any:
     return default
 
 
+# Order item alias tables (priority order), as probed by `map_order_items`.
+# Field order matters: `map_orders_items_batch` unpacks them positionally.
+ITEM_FIELD_ALIASES: Dict[str, tuple] = {
+    "sku": ("model_sku", "item_sku", "variation_sku", "sku"),
+    "variation_name": ("model_name", "variation_name", "item_variant"),
+    "name": ("item_name", "product_name", "name"),
+    "qty": ("model_quantity_purchased", "quantity", "order_item_quantity", "model_quantity"),
+    "rate": ("item_price", "model_original_price", "order_item_price", "price"),
+}
+
+
 # ---------------------------------------------------------------------------
 # Customer / Contact / Address
 # ---------------------------------------------------------------------------
@@ -246,6 +266,17 @@ def map_order_taxes(order: Dict[str, Any]) -> List[Dict[str, Any]]:
     return rows
 
 
+ESCROW_FEE_KEYS = (
+    "total_fee",
+    "commission_fee",
+    "service_fee",
+    "payment_fee",
+    "transaction_fee",
+    "logistics_fee",
+    "voucher_fee",
+)
+
+
 def map_escrow_to_fee_row(escrow: Dict[str, Any], fee_account: str = "Total Fee Shopee") -> Dict[str, Any]:
     """Aggregate escrow fee components into a single negative fee item row.
 
@@ -267,18 +298,9 @@ def map_escrow_to_fee_row(escrow: Dict[str, Any], fee_account: str = "Total Fee
 
     If no fee values found, amount/rate will be 0 (still deterministic).
     """
-    fee_keys = [
-        "total_fee",
-        "commission_fee",
-        "service_fee",
-        "payment_fee",
-        "transaction_fee",
-        "logistics_fee",
-        "voucher_fee",
-    ]
     total = 0.0
     found_any = False
-    for k in fee_keys:
+    for k in ESCROW_FEE_KEYS:
         if k in escrow and escrow.get(k) not in (None, ""):
             try:
                 total += float(escrow.get(k) or 0)
@@ -305,6 +327,99 @@ def map_escrow_to_fee_row(escrow: Dict[str, Any], fee_account: str = "Total Fee
     }
 
 
+# ---------------------------------------------------------------------------
+# Batch (columnar) item mapping
+# ---------------------------------------------------------------------------
+#
+# For backfills: map the items of many orders in one pass into per-field
+# column lists plus an ``order_index`` column (position of the source order in
+# the input list) instead of one dict per row. The loop is `map_order_items`
+# inlined: alias tuples probed directly, column appends bound once, and
+# normalized SKUs memoized per batch (catalog SKUs repeat across orders).
+# ``rows_from_columns`` of a batch result equals the per-order output exactly;
+# see benchmarks/mapping.py for the timing against the per-order loop.
+
+_ITEM_FIELDS = ("item_code", "item_name", "qty", "uom", "rate", "amount", "shopee_sku", "variation_name")
+
+
+def _first(obj: Dict[str, Any], keys: tuple) -> Any:
+    """`_get` without the default: first present non-empty value, else None."""
+    for k in keys:
+        val = obj.get(k)
+        if val is not None and val != "":
+            return val
+    return None
+
+
+def map_orders_items_batch(orders: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """Columnar `map_order_items` over many orders.
+
+    Returns ``{"order_index": [...], "item_code": [...], ...}`` with one
+    entry per item line across all orders.
+    """
+    cols: Dict[str, List[Any]] = {name: [] for name in ("order_index",) + _ITEM_FIELDS}
+    add_order = cols["order_index"].append
+    add_code, add_name, add_qty, add_uom, add_rate, add_amount, add_sku, add_variation = (
+        cols[name].append for name in _ITEM_FIELDS
+    )
+    sku_keys, variation_keys, name_keys, qty_keys, rate_keys = ITEM_FIELD_ALIASES.values()
+    first = _first
+    normalized: Dict[Any, str] = {}
+    for oi, order in enumerate(orders):
+        items = order.get("items") or order.get("order_items") or []
+        for idx, it in enumerate(items):
+            sku_raw = first(it, sku_keys)
+            if sku_raw is None:
+                sku_raw = ""
+            sku_norm = normalized.get(sku_raw)
+            if sku_norm is None:
+                sku_norm = normalized[sku_raw] = normalize_sku(sku_raw)
+            variation_name = first(it, variation_keys)
+            if variation_name is None:
+                variation_name = ""
+            name = first(it, name_keys)
+            if name is None:
+                name = variation_name or sku_norm or f"Item {idx+1}"
+            qty = first(it, qty_keys) or 1
+            try:
+                qty = float(qty)
+            except Exception:
+                qty = 1.0
+            rate = first(it, rate_keys) or 0
+            try:
+                rate_f = float(rate)
+            except Exception:
+                rate_f = 0.0
+            add_order(oi)
+            add_code((sku_norm or normalize_sku(name))[:140])
+            add_name(str(name)[:140])
+            add_qty(qty)
+            add_uom("Nos")
+            add_rate(rate_f)
+            add_amount(qty * rate_f)
+            add_sku(sku_norm)
+            add_variation(variation_name[:140])
+    return cols
+
+
+def rows_from_columns(columns: Dict[str, List[Any]], n_orders: int | None = None) -> List[List[Dict[str, Any]]]:
+    """Regroup a batch result into per-order lists of row dicts.
+
+    Args:
+        columns: Output of `map_orders_items_batch`.
+        n_orders: Number of input orders (so orders without rows get ``[]``);
+            defaults to ``max(order_index) + 1``.
+    """
+    order_index = columns.get("order_index") or []
+    fields = [name for name in columns if name != "order_index"]
+    if n_orders is None:
+        n_orders = (max(order_index) + 1) if order_index else 0
+    out: List[List[Dict[str, Any]]] = [[] for _ in range(n_orders)]
+    for pos, oi in enumerate(order_index):
+        out[oi].append({name: columns[name][pos] for name in fields})
+    return out
+
+
 # ---------------------------------------------------------------------------
 # Logistics / Tracking
 # ---------------------------------------------------------------------------
@@ -381,3 +496,119 @@ def compute_payload_hash(payload: Dict[str, Any] | str) -> str:
         data = str(payload)
     return hashlib.sha1(data.encode("utf-8")).hexdigest()  # noqa: S324 (idempotency/int checksum)
 
+
+
+# Top-level order keys read by the mappers above (plus status, which drives
+# which documents exist). Anything else - update_time, notes, pickup slots -
+# must not invalidate the stored Sales Order hash.
+ORDER_SYNC_FIELDS = (
+    "order_status",
+    "currency",
+    "total_amount",
+    "buyer_user_id",
+    "buyer_id",
+    "buyer_username",
+    "buyer_email",
+    "phone",
+    "recipient_address",
+    "items",
+    "order_items",
+    "item_list",
+    "tax_amount",
+    "shipping_fee",
+    "estimated_shipping_fee",
+)
+
+
+# ---------------------------------------------------------------------------
+# Canonical hashing
+# ---------------------------------------------------------------------------
+#
+# Format v1 (stable; bump CANONICAL_HASH_VERSION on any change):
+#   digest input = b"shopee-canon/1\n" + compact JSON (sort_keys, ensure_ascii=False)
+#                  of the selected top-level keys whose value is not None / ""
+#   output       = f"{version}.{algo}.{hexdigest}"
+# Only the selected fields are ever serialized (large unmapped blobs such as
+# notes or package lists are never encoded). The JSON object is streamed into
+# a pre-seeded hash object (copy() of a prefixed state) one top-level member
+# at a time: keys are visited in sorted order and each value is encoded by the
+# C encoder on its own, so neither a subset dict nor the JSON text of the whole
+# payload is built; the largest buffer is one member's encoding. (The
+# encoder's iterencode() would stream below member level, but it runs the
+# pure-Python encoder and measured ~3x slower per order.)
+
+CANONICAL_HASH_VERSION = 1
+CANONICAL_HASH_ALGOS = ("sha1", "blake2b")
+_canon_encode = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode
+_canon_key = json.encoder.encode_basestring  # key encoding used with ensure_ascii=False
+
+
+def _seeded(algo: str):
+    if algo == "blake2b":
+        h = hashlib.blake2b(digest_size=20)
+    elif algo == "sha1":
+        h = hashlib.sha1()  # noqa: S324 (change detection, not security)
+    else:
+        raise ValueError(f"unsupported canonical hash algo: {algo}")
+    h.update(f"shopee-canon/{CANONICAL_HASH_VERSION}\n".encode())
+    return h
+
+
+_SEEDED = {algo: _seeded(algo) for algo in CANONICAL_HASH_ALGOS}
+
+
+def canonical_hash(
+    payload: Dict[str, Any],
+    fields: Iterable[str] | None = None,
+    algo: str = "sha1",
+) -> str:
+    """Return a versioned canonical hash of ``payload`` (or a subset of its keys).
+
+    Args:
+        payload: Decoded JSON object.
+        fields: Top-level keys to include (default: all). Missing keys and
+            None / "" values are skipped, so adding an empty field does not
+            change the hash.
+        algo: ``sha1`` (default, hardware accelerated on most hosts) or ``blake2b``.
+
+    Returns:
+        ``"<version>.<algo>.<hex>"`` - see the format notes above.
+    """
+    try:
+        h = _SEEDED[algo].copy()
+    except KeyError:
+        raise ValueError(f"unsupported canonical hash algo: {algo}") from None
+    get = payload.get
+    update = h.update
+    sep = "{"
+    for k in sorted(payload) if fields is None else sorted(set(fields)):
+        v = get(k)
+        if v is None or v == "":
+            continue
+        update(f"{sep}{_canon_key(k)}:{_canon_encode(v)}".encode("utf-8"))
+        sep = ","
+    update(b"{}" if sep == "{" else b"}")
+    return f"{CANONICAL_HASH_VERSION}.{algo}.{h.hexdigest()}"
+
+
+def digest_bytes(raw: bytes | str, algo: str = "sha1") -> str:
+    """Versioned digest of raw bytes (e.g. a webhook body) without decoding / re-encoding."""
+    try:
+        h = _SEEDED[algo].copy()
+    except KeyError:
+        raise ValueError(f"unsupported canonical hash algo: {algo}") from None
+    h.update(raw if isinstance(raw, bytes) else raw.encode("utf-8"))
+    return f"{CANONICAL_HASH_VERSION}.{algo}.{h.hexdigest()}"
+
+
+def compute_order_sync_hash(order: Dict[str, Any]) -> str:
+    """Return the change-detection hash stored in Sales Order ``shopee_sync_hash``.
+
+    Canonical hash over ``ORDER_SYNC_FIELDS`` only, so re-pulled orders whose
+    mapped content is unchanged produce the same value. `records.OrderRecord`
+    carries the value precomputed from its raw payload.
+    """
+    precomputed = getattr(order, "sync_hash", None)
+    if precomputed:
+        return precomputed
+    return canonical_hash(order, ORDER_SYNC_FIELDS)
@@ -0,0 +1,216 @@
+"""Shared token-bucket rate limiter for outbound Shopee API calls.
+
+Every call made through `clients` acquires one token from a bucket keyed by
+(shop_id, API path family) before it is sent, so scheduler jobs, webhook
+handlers and API endpoints running in different RQ workers draw from the same
+partner quota instead of discovering it through 429s.
+
+Design notes:
+	- Buckets live in Redis (`frappe.cache()`); refill + take is one Lua script
+	  using Redis TIME, so it is atomic and immune to worker clock skew.
+	- Path family = first segment after `/api/v2/` (order, payment, logistics,
+	  returns, ...). Rates come from `DEFAULT_RATES`, overridable per family via
+	  site_config key `shopee_rate_limits` (``{"order": [rate_per_sec, burst]}``).
+	- `acquire` blocks (sleeping) until a token is available or `max_wait`
+	  elapses; `try_acquire` never sleeps. Inside `non_blocking()` (used by the
+	  webhook dispatcher) `acquire` behaves like `try_acquire` and raises
+	  `RateLimited` so the event is retried later instead of pinning a worker.
+	- If Redis is unreachable we fall back to an in-process bucket so calls are
+	  still paced per worker rather than failing.
+	- Wait-time metrics are accumulated in a Redis hash (`rate_limit_stats`).
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple
+import threading
+import time
+
+import frappe
+
+DEFAULT_RATES: Dict[str, Tuple[float, int]] = {  # family -> (tokens per second, burst)
+	"default": (10.0, 20),
+	"order": (10.0, 20),
+	"payment": (5.0, 10),
+	"logistics": (5.0, 10),
+	"returns": (5.0, 10),
+}
+DEFAULT_MAX_WAIT = 30.0  # seconds a blocking acquire may sleep before raising
+KEY_PREFIX = "shopee_bridge:rl"
+STATS_KEY = "shopee_bridge:rl_stats"
+
+# Returns 0 when a token was taken, else milliseconds until one is available.
+_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+if now > ts then
+	tokens = math.min(burst, tokens + (now - ts) * rate / 1000)
+	ts = now
+end
+local wait = 0
+if tokens >= 1 then
+	tokens = tokens - 1
+else
+	wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(ts))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return wait
+"""
+
+
+class RateLimited(Exception):
+	"""Raised when no token is available (non-blocking mode or max_wait exceeded)."""
+
+	def __init__(self, family: str, retry_after: float):
+		super().__init__(f"Shopee rate limit reached for '{family}' (retry in {retry_after:.2f}s)")
+		self.family = family
+		self.retry_after = retry_after
+
+
+_local = threading.local()
+_fallback_lock = threading.Lock()
+_fallback_buckets: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, monotonic ts)
+
+
+def path_family(path: str) -> str:
+	"""Return the rate family for an API path ('/api/v2/order/get_order_list' -> 'order')."""
+	parts = [p for p in (path or "").split("/") if p]
+	if len(parts) >= 3 and parts[0] == "api":
+		return parts[2]
+	return "default"
+
+
+def _rate_for(family: str) -> Tuple[float, int]:
+	rate, burst = DEFAULT_RATES.get(family) or DEFAULT_RATES["default"]
+	try:
+		override = (frappe.conf.get("shopee_rate_limits") or {}).get(family)
+		if override:
+			rate, burst = float(override[0]), int(override[1])
+	except Exception:
+		pass
+	return max(rate, 0.001), max(int(burst), 1)
+
+
+def _take_fallback(key: str, rate: float, burst: int) -> float:
+	with _fallback_lock:
+		now = time.monotonic()
+		tokens, ts = _fallback_buckets.get(key, (float(burst), now))
+		tokens = min(float(burst), tokens + (now - ts) * rate)
+		if tokens >= 1:
+			_fallback_buckets[key] = (tokens - 1, now)
+			return 0.0
+		_fallback_buckets[key] = (tokens, now)
+		return (1 - tokens) / rate
+
+
+def _take(shop_id: Any, family: str) -> float:
+	"""Try to take one token; return 0.0 on success else seconds to wait."""
+	rate, burst = _rate_for(family)
+	key = f"{KEY_PREFIX}:{shop_id or 'partner'}:{family}"
+	try:
+		cache = frappe.cache()
+		wait_ms = cache.eval(_BUCKET_LUA, 1, cache.make_key(key), rate, burst)
+		return float(wait_ms or 0) / 1000.0
+	except Exception:
+		return _take_fallback(key, rate, burst)
+
+
+def _record(family: str, waited_s: float, rejected: bool = False) -> None:
+	try:
+		cache = frappe.cache()
+		pipe = cache.pipeline()
+		key = cache.make_key(STATS_KEY)
+		if rejected:
+			pipe.hincrby(key, f"{family}:rejected", 1)
+		else:
+			pipe.hincrby(key, f"{family}:acquired", 1)
+			if waited_s > 0:
+				pipe.hincrby(key, f"{family}:waited", 1)
+				pipe.hincrby(key, f"{family}:wait_ms", int(waited_s * 1000))
+		pipe.execute()
+	except Exception:  # metrics are best-effort
+		pass
+
+
+def try_acquire(path: str, shop_id: Any = None) -> bool:
+	"""Take a token for `path` without sleeping. Returns False when the bucket is empty."""
+	family = path_family(path)
+	ok = _take(shop_id, family) == 0.0
+	_record(family, 0.0, rejected=not ok)
+	return ok
+
+
+def acquire(path: str, shop_id: Any = None, max_wait: float | None = None) -> float:
+	"""Block until a token for `path` is available.
+
+	Args:
+		path: Shopee API path (family derived via `path_family`).
+		shop_id: Shop the call is made for (buckets are per shop).
+		max_wait: Give up after this many seconds (default `DEFAULT_MAX_WAIT`).
+	Returns:
+		Seconds spent waiting.
+	Raises:
+		RateLimited: bucket empty in `non_blocking()` mode, or max_wait exceeded.
+	"""
+	family = path_family(path)
+	limit = DEFAULT_MAX_WAIT if max_wait is None else max_wait
+	started = time.monotonic()
+	while True:
+		wait = _take(shop_id, family)
+		if wait == 0.0:
+			waited = time.monotonic() - started
+			_record(family, waited)
+			return waited
+		if getattr(_local, "non_blocking", False) or (time.monotonic() - started) + wait > limit:
+			_record(family, 0.0, rejected=True)
+			raise RateLimited(family, wait)
+		time.sleep(wait)
+
+
+@contextmanager
+def non_blocking() -> Iterator[None]:
+	"""Make `acquire` in this thread fail fast with `RateLimited` instead of sleeping."""
+	prev = getattr(_local, "non_blocking", False)
+	_local.non_blocking = True
+	try:
+		yield
+	finally:
+		_local.non_blocking = prev
+
+
+def rate_limit_stats() -> Dict[str, Dict[str, int]]:
+	"""Return shared acquire / wait / reject counters grouped by path family."""
+	out: Dict[str, Dict[str, int]] = {}
+	try:
+		cache = frappe.cache()
+		# Raw pipeline read: RedisWrapper.hgetall would try to unpickle the counters.
+		pipe = cache.pipeline()
+		pipe.hgetall(cache.make_key(STATS_KEY))
+		raw = pipe.execute()[0] or {}
+	except Exception:
+		return out
+	for field, value in raw.items():
+		field = field.decode() if isinstance(field, bytes) else str(field)
+		family, _, metric = field.partition(":")
+		out.setdefault(family, {})[metric] = int(value)
+	for metrics in out.values():
+		waited = metrics.get("waited", 0)
+		metrics["avg_wait_ms"] = int(metrics.get("wait_ms", 0) / waited) if waited else 0
+	return out
+
+
+__all__ = [
+	"RateLimited",
+	"path_family",
+	"acquire",
+	"try_acquire",
+	"non_blocking",
+	"rate_limit_stats",
+]
@@ -0,0 +1,186 @@
+"""Compact record types for Shopee order / item / escrow payloads.
+
+Shopee detail responses carry every field the API knows about (pickup slots,
+package lists, image info, ...). The sync pipeline only reads a handful of
+them, yet the raw dicts used to travel through `details` lists for a whole
+chunk or page. The records below keep just the fields the services and
+mappers read, as a `__slots__` object holding a values tuple (no per-instance
+`__dict__`, field names shared per payload shape), and are built at
+the client boundary (`services.orders._detail_orders`,
+`services.finance.get_escrow_detail`).
+
+Records are read-only `Mapping`s over their present fields, so existing code
+written against dicts (``od.get("order_sn")``, ``"error" in escrow``,
+`mappers._get` alias probing) works unchanged. ``to_dict()`` returns a plain
+dict for logging / JSON.
+
+`OrderRecord.sync_hash` is computed from the raw payload before it is
+dropped, so `mappers.compute_order_sync_hash` values are identical to what the
+raw dict would produce.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Tuple
+
+from . import mappers
+
+# Low-cardinality string values (status, currency, SKUs, catalog names) are
+# shared across records through a bounded intern table per record type.
+INTERN_MAX = 50_000
+
+
+class _Record(Mapping):
+	"""Read-only mapping over the ``FIELDS`` present in the source payload.
+
+	State is two slots: ``_index`` (field -> position, one dict shared by all
+	records of the same shape) and ``_values`` (a tuple), so a record costs
+	one small object plus one tuple of present values.
+	"""
+
+	__slots__ = ("_index", "_values")
+	FIELDS: Tuple[str, ...] = ()
+	INTERN_FIELDS: frozenset = frozenset()
+	_shapes: Dict[Tuple[str, ...], Dict[str, int]] = {}
+	_interned: Dict[str, str] = {}
+
+	def __init__(self, data: Dict[str, Any]):
+		keys = tuple(name for name in self.FIELDS if name in data)
+		index = self._shapes.get(keys)
+		if index is None:
+			index = self._shapes.setdefault(keys, {name: i for i, name in enumerate(keys)})
+		self._index = index
+		self._values = tuple(self._convert(name, data[name]) for name in keys)
+
+	def _convert(self, name: str, value: Any) -> Any:
+		if name in self.INTERN_FIELDS and type(value) is str:
+			interned = self._interned
+			shared = interned.get(value)
+			if shared is not None:
+				return shared
+			if len(interned) < INTERN_MAX:
+				interned[value] = value
+		return value
+
+	def __getitem__(self, key: str) -> Any:
+		return self._values[self._index[key]]
+
+	def get(self, key: str, default: Any = None) -> Any:
+		i = self._index.get(key)
+		return default if i is None else self._values[i]
+
+	def __contains__(self, key: object) -> bool:
+		return key in self._index
+
+	def __iter__(self) -> Iterator[str]:
+		return iter(self._index)
+
+	def __len__(self) -> int:
+		return len(self._values)
+
+	def __repr__(self) -> str:
+		return f"{type(self).__name__}({self.to_dict()!r})"
+
+	def __reduce__(self):
+		return (_restore, (type(self), self.to_dict(), getattr(self, "sync_hash", None)))
+
+	def to_dict(self) -> Dict[str, Any]:
+		"""Plain (JSON-serializable) dict of the present fields, nested records included."""
+		out: Dict[str, Any] = {}
+		for key, value in zip(self._index, self._values):
+			if isinstance(value, list):
+				value = [v.to_dict() if isinstance(v, _Record) else v for v in value]
+			out[key] = value
+		return out
+
+
+def _restore(cls, data: Dict[str, Any], sync_hash: str | None) -> "_Record":
+	record = cls(data)
+	if sync_hash is not None:
+		record.sync_hash = sync_hash
+	return record
+
+
+class ItemRecord(_Record):
+	"""One order line: the alias keys probed by `mappers.map_order_items` plus ids."""
+
+	__slots__ = ()
+	FIELDS = ("item_id", "model_id") + tuple(
+		alias for aliases in mappers.ITEM_FIELD_ALIASES.values() for alias in aliases
+	)
+	INTERN_FIELDS = frozenset(FIELDS)
+	_shapes: Dict[Tuple[str, ...], Dict[str, int]] = {}
+	_interned: Dict[str, str] = {}
+
+
+# Order item lists may arrive under any of these keys (see mappers.map_order_items).
+_ITEM_LIST_KEYS = ("items", "order_items", "item_list")
+
+
+class OrderRecord(_Record):
+	"""Order detail: ``mappers.ORDER_SYNC_FIELDS`` plus identity / time fields.
+
+	Item lists hold `ItemRecord`s. ``sync_hash`` is precomputed from the raw
+	payload (see module docstring).
+	"""
+
+	__slots__ = ("sync_hash",)
+	FIELDS = tuple(dict.fromkeys(("order_sn", "create_time", "update_time", "pay_time") + mappers.ORDER_SYNC_FIELDS))
+	INTERN_FIELDS = frozenset(("order_status", "currency"))
+	_shapes: Dict[Tuple[str, ...], Dict[str, int]] = {}
+	_interned: Dict[str, str] = {}
+
+	def __init__(self, data: Dict[str, Any]):
+		super().__init__(data)
+		self.sync_hash = mappers.compute_order_sync_hash(data)
+
+	def _convert(self, name: str, value: Any) -> Any:
+		if name in _ITEM_LIST_KEYS and isinstance(value, list):
+			return [ItemRecord(it) if isinstance(it, dict) else it for it in value]
+		return super()._convert(name, value)
+
+
+# order_income amounts used for fee patching / payout reconciliation.
+ESCROW_INCOME_FIELDS = (
+	"escrow_amount",
+	"buyer_total_amount",
+	"original_price",
+	"commission_fee",
+	"service_fee",
+	"seller_transaction_fee",
+	"actual_shipping_fee",
+	"shopee_shipping_rebate",
+	"voucher_from_seller",
+	"voucher_from_shopee",
+	"coins",
+	"escrow_tax",
+	"final_shipping_fee",
+)
+
+
+class EscrowRecord(_Record):
+	"""Escrow detail: identity, payout batch, top-level fee keys and a trimmed ``order_income``."""
+
+	__slots__ = ()
+	FIELDS = ("order_sn", "payout_batch_id", "escrow_release_time", "buyer_user_name", "order_income") + mappers.ESCROW_FEE_KEYS
+	_shapes: Dict[Tuple[str, ...], Dict[str, int]] = {}
+
+	def _convert(self, name: str, value: Any) -> Any:
+		if name == "order_income" and isinstance(value, dict):
+			return {k: value[k] for k in ESCROW_INCOME_FIELDS if k in value}
+		return value
+
+
+def order_records(orders: List[Dict[str, Any]]) -> List[OrderRecord]:
+	"""Convert raw order detail dicts (non-dicts are passed through)."""
+	return [OrderRecord(od) if isinstance(od, dict) else od for od in orders]
+
+
+__all__ = [
+	"ItemRecord",
+	"OrderRecord",
+	"EscrowRecord",
+	"ESCROW_INCOME_FIELDS",
+	"order_records",
+]
@@ -6,8 +6,9 @@ Responsibilities (future full implementation):
  - Create Bank Transaction (or Journal Entry) representing Shopee payout.
  - Reconcile payouts strictly and perform historical backfills.
 
-Current state: SAFE STUBS (no DB mutations) returning deterministic mock
-identifiers so upstream jobs can be wired without side effects.
+Current state: escrow fetch and strict reconciliation are implemented; invoice
+patch / bank transaction creation are SAFE STUBS (no DB mutations) returning
+deterministic mock identifiers so upstream jobs can be wired without side effects.
 
 Domain notes / design contracts:
  1. Sales Invoice fee line: one negative row with item/name "Total Fee Shopee".
@@ -23,26 +24,50 @@ Domain notes / design contracts:
 	   - Fee patch keyed by (order_sn, payout_batch_id).
 	   - Bank transaction creation keyed by (reference_number, deposit_amount).
  4. Reconciliation rule (strict): match bank transaction whose amount == escrow net
-	   AND value date within tolerance (same day). If amount matches but date differs,
-	   policy: adjust date or flag for manual review (TODO – decision pending).
+	   AND value date within tolerance (same day by default). If amount matches but
+	   date differs, or several deposits / invoices fit each other, the rows are
+	   flagged for manual review (dates are never adjusted). See `matching`.
  5. Backfill strategy: iterate orders (by completion date) in date range, pulling
 	   escrow details and applying the same patch/create routines.
 
 Endpoints used:
- - /api/v2/payment/get_escrow_detail (only external call in this stub set)
+ - /api/v2/payment/get_escrow_detail_batch (up to 50 orders per call)
+ - /api/v2/payment/get_escrow_detail (per-order fallback)
 
 All other functions are placeholders with docstrings describing planned behavior.
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List
 import time
 import frappe
 
-from .. import clients
+from .. import clients, records
+from . import matching
 
 ESCROW_DETAIL_PATH = "/api/v2/payment/get_escrow_detail"
+ESCROW_BATCH_PATH = "/api/v2/payment/get_escrow_detail_batch"
+ESCROW_BATCH_SIZE = 50  # Shopee max order_sn_list length
+# After the batch endpoint answers "not found / no permission", use per-order
+# calls for this long before probing it again (site_config shopee_escrow_batch=0
+# disables it outright).
+ESCROW_BATCH_RETRY_SECONDS = 3600
+_BATCH_ERRORS_UNSUPPORTED = ("error_not_found", "error_permission", "error_api_not_found")
+_batch_disabled_until = 0.0
+
+# Escrow sync pipeline: details are fetched `ESCROW_CONCURRENCY` at a time,
+# then written ESCROW_WRITE_BATCH orders per transaction. A fetch-stage thread
+# prefetches the next batch while the calling thread writes the current one
+# (site_config shopee_escrow_prefetch=0 runs the stages in turn). Sends are
+# throttled by the shared `ratelimit` payment budget; ESCROW_RATE_PER_SEC adds
+# an optional extra pace. site_config: shopee_escrow_concurrency /
+# shopee_escrow_rate_per_sec / shopee_escrow_write_batch.
+ESCROW_CONCURRENCY = 4
+ESCROW_RATE_PER_SEC: float | None = None
+ESCROW_WRITE_BATCH = 50
 
 
 def _log(event: str, data: Dict[str, Any]):  # light logging
@@ -52,20 +77,151 @@ def _log(event: str, data: Dict[str, Any]):  # light logging
 		pass
 
 
+def _conf_number(key: str, default: Any, cast=int) -> Any:
+	try:
+		value = frappe.conf.get(key)
+		return default if value in (None, "") else cast(value)
+	except Exception:
+		return default
+
+
+def _escrow_from_response(resp: Dict[str, Any]) -> Dict[str, Any]:
+	data = resp.get("response") or resp
+	return data if data.get("error") else records.EscrowRecord(data)
+
+
 def get_escrow_detail(order_sn: str) -> Dict[str, Any]:
 	"""Fetch escrow detail for a single order.
 
 	Performs signed GET on Shopee endpoint `/payment/get_escrow_detail`.
-	Returns raw Shopee payload (normalized through potential 'response' key).
+	Returns the payload (normalized through potential 'response' key) as a
+	compact `records.EscrowRecord`; error payloads are returned as-is.
 	"""
 	try:
-		resp = clients.http_get(ESCROW_DETAIL_PATH, {"order_sn": order_sn})
-		return resp.get("response") or resp
+		return _escrow_from_response(clients.http_get(ESCROW_DETAIL_PATH, {"order_sn": order_sn}))
 	except Exception as e:
 		_log("escrow_detail_error", {"order_sn": order_sn, "error": str(e)})
 		return {"error": str(e)}
 
 
+def _batch_enabled() -> bool:
+	"""site_config ``shopee_escrow_batch`` (default on): 1 / true enable, anything else disables."""
+	if time.monotonic() < _batch_disabled_until:
+		return False
+	flag = frappe.conf.get("shopee_escrow_batch")
+	return True if flag is None else bool(frappe.utils.cint(frappe.utils.sbool(flag)))
+
+
+def _disable_batch(reason: str) -> None:
+	global _batch_disabled_until
+	_batch_disabled_until = time.monotonic() + ESCROW_BATCH_RETRY_SECONDS
+	_log("escrow_batch_unavailable", {"reason": reason[:200], "retry_in_s": ESCROW_BATCH_RETRY_SECONDS})
+
+
+def _batch_escrows(resp: Dict[str, Any]) -> List[Dict[str, Any]]:
+	"""Escrow dicts of a batch response (``[{"escrow_detail": {...}}, ...]`` or flat)."""
+	data = resp.get("response", resp)
+	if isinstance(data, dict):
+		data = data.get("escrow_detail_list") or data.get("order_list") or []
+	out = []
+	for row in data or []:
+		if isinstance(row, dict):
+			detail = row.get("escrow_detail", row)
+			if isinstance(detail, dict) and detail.get("order_sn"):
+				out.append(detail)
+	return out
+
+
+def fetch_escrow_batch(order_sns: List[str]) -> Dict[str, Any]:
+	"""Fetch escrow details through the batch endpoint, ESCROW_BATCH_SIZE per call.
+
+	SNs the endpoint does not return (or returns with an error) and SNs of
+	failed calls are listed in ``missing`` for the per-order fallback. When the
+	endpoint is unsupported for this shop/app, the batch path is switched off
+	for `ESCROW_BATCH_RETRY_SECONDS` and every remaining SN is ``missing``.
+
+	Returns:
+		{"escrows": {order_sn: EscrowRecord}, "missing": [...], "calls": int}
+	"""
+	found: Dict[str, Dict[str, Any]] = {}
+	missing: List[str] = []
+	calls = 0
+	for i in range(0, len(order_sns), ESCROW_BATCH_SIZE):
+		chunk = order_sns[i : i + ESCROW_BATCH_SIZE]
+		if not _batch_enabled():
+			missing.extend(chunk)
+			continue
+		calls += 1
+		try:
+			resp = clients.http_post(ESCROW_BATCH_PATH, {"order_sn_list": chunk})
+		except clients.RetryDeferred:
+			raise
+		except Exception as exc:
+			if "HTTP 404" in str(exc):
+				_disable_batch(str(exc))
+			_log("escrow_batch_error", {"first": chunk[0], "size": len(chunk), "error": str(exc)[:200]})
+			missing.extend(chunk)
+			continue
+		if resp.get("error"):
+			if resp["error"] in _BATCH_ERRORS_UNSUPPORTED:
+				_disable_batch(f"{resp['error']}: {resp.get('message')}")
+			missing.extend(chunk)
+			continue
+		wanted = set(chunk)
+		for detail in _batch_escrows(resp):
+			sn = detail["order_sn"]
+			if sn in wanted and not detail.get("error"):
+				found[sn] = records.EscrowRecord(detail)
+		missing.extend(sn for sn in chunk if sn not in found)
+	return {"escrows": found, "missing": missing, "calls": calls}
+
+
+def fetch_escrow_details(
+	order_sns: List[str],
+	concurrency: int = ESCROW_CONCURRENCY,
+	rate_per_sec: float | None = ESCROW_RATE_PER_SEC,
+) -> Dict[str, Any]:
+	"""Fetch escrow details for many orders: batch endpoint first, then per order.
+
+	SNs the batch endpoint did not deliver (see `fetch_escrow_batch`) are
+	fetched one by one through `clients.http_get_many` (signing in the calling
+	thread, rate limiter per dispatch, failed calls replayed once with
+	retries). A failing order is reported without aborting the others.
+
+	Returns:
+		{"escrows": [EscrowRecord, ...] (input order, failures omitted),
+		 "errors": {order_sn: message}, "batch_calls": int, "fallback": int,
+		 "duration_s": float}
+	"""
+	started = time.time()
+	batch = fetch_escrow_batch(order_sns)
+	found = batch["escrows"]
+	fallback = batch["missing"]
+	errors: Dict[str, str] = {}
+	outcomes = clients.http_get_many(
+		ESCROW_DETAIL_PATH,
+		[{"order_sn": sn} for sn in fallback],
+		max_workers=concurrency,
+		rate_per_sec=rate_per_sec,
+	)
+	for sn, outcome in zip(fallback, outcomes):
+		if not outcome["ok"]:
+			errors[sn] = outcome["error"]
+			continue
+		escrow = _escrow_from_response(outcome["data"])
+		if escrow.get("error"):
+			errors[sn] = str(escrow.get("message") or escrow["error"])[:500]
+		else:
+			found[sn] = escrow
+	return {
+		"escrows": [found[sn] for sn in order_sns if sn in found],
+		"errors": errors,
+		"batch_calls": batch["calls"],
+		"fallback": len(fallback),
+		"duration_s": round(time.time() - started, 2),
+	}
+
+
 def patch_invoice_with_fees(escrow: Dict[str, Any]) -> str:
 	"""Idempotently patch Sales Invoice with Shopee fee / net values (STUB).
 
@@ -102,6 +258,39 @@ def ensure_bank_transaction_from_escrow(escrow: Dict[str, Any]) -> str:
 	return bt_name
 
 
+def _apply_escrow(escrow: Dict[str, Any]) -> Dict[str, Any]:
+	invoice = patch_invoice_with_fees(escrow)
+	bank_txn = ensure_bank_transaction_from_escrow(escrow)
+	return {"order_sn": escrow.get("order_sn"), "status": "synced", "invoice": invoice, "bank_transaction": bank_txn}
+
+
+def apply_escrow_batch(escrows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+	"""Patch invoices / ensure bank transactions for a batch in one transaction.
+
+	Each order runs inside its own savepoint: a failing order is rolled back
+	and reported (``status="write_error"``) while the rest of the batch is
+	committed together.
+
+	Returns:
+		One outcome per escrow: {"order_sn", "status": "synced" | "write_error",
+		"invoice"?, "bank_transaction"?, "error"?}
+	"""
+	outcomes: List[Dict[str, Any]] = []
+	for escrow in escrows:
+		order_sn = escrow.get("order_sn")
+		savepoint = f"shopee_escrow_{order_sn}"[:60]
+		frappe.db.savepoint(savepoint)
+		try:
+			outcomes.append(_apply_escrow(escrow))
+		except Exception as exc:
+			frappe.db.rollback(save_point=savepoint)
+			err = f"{order_sn}: {exc}"[:500]
+			frappe.log_error(message=err, title="Shopee Escrow Sync Error")
+			outcomes.append({"order_sn": order_sn, "status": "write_error", "error": str(exc)[:500]})
+	frappe.db.commit()
+	return outcomes
+
+
 def sync_escrow_for_order(order_sn: str) -> Dict[str, Any]:
 	"""Sync escrow + patch invoice + ensure bank transaction for one order.
 
@@ -111,72 +300,407 @@ def sync_escrow_for_order(order_sn: str) -> Dict[str, Any]:
 	escrow = get_escrow_detail(order_sn)
 	if escrow.get("error"):
 		return {"order_sn": order_sn, "error": escrow["error"]}
-	invoice = patch_invoice_with_fees(escrow)
-	bank_txn = ensure_bank_transaction_from_escrow(escrow)
+	res = _apply_escrow(escrow)
 	return {
 		"order_sn": order_sn,
-		"invoice": invoice,
-		"bank_transaction": bank_txn,
+		"invoice": res["invoice"],
+		"bank_transaction": res["bank_transaction"],
 		"duration_s": round(time.time() - started, 2),
 	}
 
 
-def sync_escrow_for_completed_orders(min_age_hours: int = 3, limit: int = 200) -> Dict[str, Any]:
-	"""Pull recent completed orders & sync escrow (HIGH LEVEL STUB).
+def _pending_escrow_orders(min_age_hours: int, limit: int) -> List[str]:
+	"""Completed orders still waiting for escrow sync.
+
+	Future data source: Sales Invoices / Sales Orders where status=Completed
+	and escrow_synced != 1 and posting_date older than min_age_hours.
+	"""
+	# TODO: query real orders. Using placeholder list.
+	return [f"MOCKORDER{i}" for i in range(1, min(limit, 5) + 1)]
+
 
-	Future data source: Sales Invoices / Sales Orders where status=Completed and
-	escrow_synced != 1 and posting_date older than min_age_hours.
-	For now, operates over a mock list.
+def _run_now(fn: Callable[..., Any], *args: Any) -> Future:
+	future: Future = Future()
+	try:
+		future.set_result(fn(*args))
+	except BaseException as exc:  # surfaced by future.result(), as with the pool
+		future.set_exception(exc)
+	return future
+
+
+@contextmanager
+def _fetch_stage(enabled: bool) -> Iterator[Callable[..., Future]]:
+	"""Yield a ``submit(fn, *args)`` running fetches on one site-bound thread.
+
+	The thread gets its own frappe site context and DB connection (signing,
+	rate limiter and logging read site config / Redis through
+	``frappe.local``). Fetches only write incidentally (``frappe.log_error``
+	on HTTP failures, token refresh settings); those are committed on that
+	connection at teardown so they are not lost with it. Disabled:
+	``submit`` runs the call inline.
+	"""
+	if not enabled:
+		yield _run_now
+		return
+	site = frappe.local.site
+	sites_path = getattr(frappe.local, "sites_path", None) or "."
+
+	def _init() -> None:
+		frappe.init(site=site, sites_path=sites_path)
+		frappe.connect()
+
+	def _teardown() -> None:
+		try:
+			frappe.db.commit()  # error logs / token refresh written by fetches
+		finally:
+			frappe.destroy()
+
+	pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shopee-escrow-fetch", initializer=_init)
+	try:
+		yield pool.submit
+	finally:
+		try:
+			pool.submit(_teardown).result()
+		except Exception:  # pragma: no cover - initializer failed, nothing to tear down
+			pass
+		pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _collect_outcomes(
+	batch: List[str],
+	fetched: Dict[str, Any],
+	written: Dict[str, Dict[str, Any]],
+	outcomes: List[Dict[str, Any]],
+	errors: List[str],
+) -> None:
+	"""Append one outcome per order of `batch` (fetch error, write outcome or missing)."""
+	for sn in batch:
+		if sn in fetched["errors"]:
+			outcome = {"order_sn": sn, "status": "fetch_error", "error": fetched["errors"][sn]}
+		else:
+			outcome = written.get(sn) or {"order_sn": sn, "status": "fetch_error", "error": "missing from escrow response"}
+		if outcome["status"] != "synced":
+			errors.append(f"{sn}: {outcome['error']}")
+		outcomes.append(outcome)
+
+
+def sync_escrow_for_completed_orders(
+	min_age_hours: int = 3,
+	limit: int = 200,
+	order_sns: List[str] | None = None,
+	concurrency: int | None = None,
+	batch_size: int | None = None,
+) -> Dict[str, Any]:
+	"""Pull recent completed orders & sync escrow in fetch / write batches.
+
+	Orders are handled `batch_size` at a time as a two-stage pipeline: a
+	fetch-stage thread loads a batch's escrow details (`fetch_escrow_details`:
+	batch endpoint, then concurrent per-order calls for the rest) while the
+	calling thread, the single writer, writes the previous batch in one
+	transaction (`apply_escrow_batch`). The fetch stage runs at most one batch
+	ahead, so memory stays bounded by two batches.
 
 	Args:
 		min_age_hours: Minimum order completion age before escrow expected.
 		limit: Max orders to process in one run.
+		order_sns: Explicit orders to sync (skips the pending-order lookup).
+		concurrency: Escrow requests in flight (default site_config
+			``shopee_escrow_concurrency`` or `ESCROW_CONCURRENCY`).
+		batch_size: Orders per fetch / write batch (``shopee_escrow_write_batch``).
+	Returns:
+		{"count", "failed", "batches", "batch_calls", "fallback",
+		 "outcomes": [{"order_sn", "status", ...}],
+		 "errors", "fetch_s", "write_s", "duration_s", "min_age_hours", "limit"}
+		where status is ``synced``, ``fetch_error`` or ``write_error``.
+		``fetch_s`` / ``write_s`` are per-stage totals; with the prefetch they
+		overlap, so ``duration_s`` can be below their sum.
 	"""
 	started = time.time()
-	# TODO: query real orders. Using placeholder list.
-	mock_orders = [f"MOCKORDER{i}" for i in range(1, min(limit, 5) + 1)]
-	processed: List[Dict[str, Any]] = []
+	concurrency = max(int(concurrency or _conf_number("shopee_escrow_concurrency", ESCROW_CONCURRENCY)), 1)
+	rate = _conf_number("shopee_escrow_rate_per_sec", ESCROW_RATE_PER_SEC, float) or None
+	batch_size = max(int(batch_size or _conf_number("shopee_escrow_write_batch", ESCROW_WRITE_BATCH)), 1)
+	sns = list(dict.fromkeys(order_sns if order_sns is not None else _pending_escrow_orders(min_age_hours, limit)))[:limit]
+	outcomes: List[Dict[str, Any]] = []
 	errors: List[str] = []
-	for sn in mock_orders:
-		res = sync_escrow_for_order(sn)
-		if res.get("error"):
-			errors.append(f"{sn}: {res['error']}")
-		else:
-			processed.append(res)
-	return {
-		"count": len(processed),
+	fetch_s = write_s = 0.0
+	batches = batch_calls = fallback = 0
+	chunks = [sns[i : i + batch_size] for i in range(0, len(sns), batch_size)]
+	prefetch = len(chunks) > 1 and bool(_conf_number("shopee_escrow_prefetch", 1))
+	with _fetch_stage(prefetch) as submit:
+		ahead = submit(fetch_escrow_details, chunks[0], concurrency, rate) if chunks else None
+		for n, batch in enumerate(chunks):
+			fetched = ahead.result()
+			# start the next fetch before writing this batch: the stages overlap
+			ahead = submit(fetch_escrow_details, chunks[n + 1], concurrency, rate) if n + 1 < len(chunks) else None
+			batches += 1
+			batch_calls += fetched["batch_calls"]
+			fallback += fetched["fallback"]
+			fetch_s += fetched["duration_s"]
+			t0 = time.time()
+			written = {o["order_sn"]: o for o in apply_escrow_batch(fetched["escrows"])}
+			write_s += time.time() - t0
+			_collect_outcomes(batch, fetched, written, outcomes, errors)
+	summary = {
+		"count": sum(1 for o in outcomes if o["status"] == "synced"),
+		"failed": len(errors),
+		"batches": batches,
+		"batch_calls": batch_calls,
+		"fallback": fallback,
+		"outcomes": outcomes,
 		"errors": errors,
+		"fetch_s": round(fetch_s, 2),
+		"write_s": round(write_s, 2),
 		"duration_s": round(time.time() - started, 2),
 		"min_age_hours": min_age_hours,
 		"limit": limit,
 	}
+	_log("escrow_sync", {k: summary[k] for k in ("count", "failed", "batches", "batch_calls", "fallback", "fetch_s", "write_s", "duration_s")})
+	return summary
 
 
-def reconcile_bank_strict(days_back: int = 2) -> Dict[str, Any]:
-	"""Attempt strict reconciliation of Shopee payouts (STUB).
+# Strict reconciliation: value-date tolerance (site_config
+# shopee_reconcile_tolerance_days) and optional bank account filter
+# (shopee_reconcile_bank_account).
+RECONCILE_TOLERANCE_DAYS = 0
+
+
+def _reconcile_window(days_back: int, start: str | None, end: str | None) -> tuple:
+	today = frappe.utils.getdate(frappe.utils.nowdate())
+	if start and end:
+		return frappe.utils.getdate(start), frappe.utils.getdate(end)
+	return frappe.utils.add_days(today, -max(int(days_back), 0)), today
+
+
+def _load_bank_rows(since, until) -> List[Dict[str, Any]]:
+	"""Unreconciled deposits in [since, until] (optionally one bank account)."""
+	account = frappe.conf.get("shopee_reconcile_bank_account")
+	return frappe.db.sql(
+		f"""
+		SELECT name, date, deposit AS amount, reference_number AS reference
+		FROM `tabBank Transaction`
+		WHERE docstatus = 1 AND status IN ('Pending', 'Unreconciled')
+			AND deposit > 0 AND date BETWEEN %(since)s AND %(until)s
+			{"AND bank_account = %(account)s" if account else ""}
+		ORDER BY date, name
+		""",
+		{"since": since, "until": until, "account": account},
+		as_dict=True,
+	)
+
+
+def _load_invoice_rows(since, until) -> List[Dict[str, Any]]:
+	"""Escrow-synced invoices (value date = escrow sync date) not yet allocated to a bank transaction."""
+	return frappe.db.sql(
+		"""
+		SELECT si.name, DATE(COALESCE(si.escrow_synced_at, si.posting_date)) AS date,
+			si.escrow_net AS amount, si.payout_batch_id
+		FROM `tabSales Invoice` si
+		LEFT JOIN `tabBank Transaction Payments` btp
+			ON btp.payment_document = 'Sales Invoice' AND btp.payment_entry = si.name
+		WHERE si.docstatus = 1 AND si.escrow_synced = 1 AND si.escrow_net > 0
+			AND DATE(COALESCE(si.escrow_synced_at, si.posting_date)) BETWEEN %(since)s AND %(until)s
+			AND btp.name IS NULL
+		""",
+		{"since": since, "until": until},
+		as_dict=True,
+	)
+
+
+def _allocate(bank_name: str, allocations: List[tuple]) -> None:
+	"""Allocate (invoice, amount) pairs on a Bank Transaction (ERPNext reconciles it on save)."""
+	bt = frappe.get_doc("Bank Transaction", bank_name)
+	for invoice, amount in allocations:
+		bt.append("payment_entries", {
+			"payment_document": "Sales Invoice",
+			"payment_entry": invoice,
+			"allocated_amount": amount,
+		})
+	bt.save(ignore_permissions=True)
+
+
+def _apply_matches(matches: List[tuple], invoices: List[Dict[str, Any]], dry_run: bool) -> tuple:
+	"""Allocate (bank, [invoice, ...]) matches, one savepoint each; returns (applied, errors)."""
+	if dry_run:
+		return len(matches), []
+	amounts = {inv["name"]: inv["amount"] for inv in invoices}
+	errors: List[str] = []
+	applied = 0
+	for bank, invoice_names in matches:
+		savepoint = f"shopee_rec_{bank}"[:60]
+		frappe.db.savepoint(savepoint)
+		try:
+			_allocate(bank, [(name, amounts[name]) for name in invoice_names])
+			applied += 1
+		except Exception as exc:
+			frappe.db.rollback(save_point=savepoint)
+			err = f"{bank} -> {', '.join(invoice_names)[:200]}: {exc}"[:500]
+			errors.append(err)
+			frappe.log_error(message=err, title="Shopee Reconcile Error")
+	frappe.db.commit()
+	return applied, errors
+
+
+def reconcile_bank_strict(
+	days_back: int = 2,
+	start: str | None = None,
+	end: str | None = None,
+	tolerance_days: int | None = None,
+	dry_run: bool = False,
+) -> Dict[str, Any]:
+	"""Strictly reconcile Shopee payouts one-to-one against escrow-synced invoices.
+
+	Loads unreconciled deposits in the window and unallocated escrow-synced
+	invoices in the window widened by the tolerance, then runs
+	`matching.match_strict` (hash index on amount + date, bisect for the
+	tolerance, payout_batch_id when the bank reference carries it). Unique
+	matches are allocated on the Bank Transaction (savepoint per transaction);
+	ambiguous groups and date mismatches are only reported (policy: manual
+	review, dates are never adjusted).
 
-	Planned algorithm:
-	  - Collect unsettled bank transactions tagged as Shopee within date window.
-	  - For each, attempt match to escrow-synced invoices by exact net amount and date.
-	  - If single match, mark reconciled.
-	  - If multiple matches or date mismatch, flag for manual review.
-	  - Policy for date mismatch (TODO): adjust bank txn date or leave for manual? Document decision.
+	Args:
+		days_back: Window ending today (ignored when start / end are given).
+		start / end: Explicit ISO date window (backfills).
+		tolerance_days: Allowed |bank date - invoice date| (default site_config
+			``shopee_reconcile_tolerance_days`` or `RECONCILE_TOLERANCE_DAYS`).
+		dry_run: Match and report without allocating.
+	Returns:
+		{"transactions_considered", "invoices_considered", "reconciled",
+		 "ambiguous", "date_mismatch", "needs_manual", "ambiguous_groups",
+		 "errors", "match_s", "days_back", "tolerance_days", "duration_s"}
+	"""
+	started = time.time()
+	if tolerance_days is None:
+		tolerance_days = _conf_number("shopee_reconcile_tolerance_days", RECONCILE_TOLERANCE_DAYS)
+	tolerance_days = max(int(tolerance_days), 0)
+	since, until = _reconcile_window(days_back, start, end)
+	bank_rows = _load_bank_rows(since, until)
+	invoices = _load_invoice_rows(
+		frappe.utils.add_days(since, -tolerance_days), frappe.utils.add_days(until, tolerance_days)
+	)
+	t0 = time.time()
+	result = matching.match_strict(bank_rows, invoices, tolerance_days)
+	match_s = time.time() - t0
+	reconciled, errors = _apply_matches(
+		[(m["bank"], [m["invoice"]]) for m in result["matches"]], invoices, dry_run
+	)
+	ambiguous_bank = sum(len(g["bank"]) for g in result["ambiguous"])
+	metrics = {
+		"transactions_considered": len(bank_rows),
+		"invoices_considered": len(invoices),
+		"reconciled": reconciled,
+		"ambiguous": ambiguous_bank,
+		"date_mismatch": len(result["date_mismatch"]),
+		"needs_manual": ambiguous_bank + len(result["date_mismatch"]) + len(result["unmatched"]),
+		"ambiguous_groups": result["ambiguous"][:50],
+		"errors": errors,
+		"match_s": round(match_s, 3),
+		"days_back": days_back,
+		"tolerance_days": tolerance_days,
+		"dry_run": dry_run,
+		"duration_s": round(time.time() - started, 2),
+	}
+	_log("reconcile_strict", {k: metrics[k] for k in ("transactions_considered", "reconciled", "ambiguous", "needs_manual", "match_s")})
+	return metrics
 
-	Returns summary dict with counts (all mocked now).
+
+def reconcile_bank_aggregated(
+	days_back: int = 2,
+	start: str | None = None,
+	end: str | None = None,
+	window_days: int | None = None,
+	tolerance_days: int | None = None,
+	time_budget_ms: int | None = None,
+	dry_run: bool = False,
+) -> Dict[str, Any]:
+	"""Reconcile aggregated Shopee payouts: one deposit -> many invoices.
+
+	Deposits in the window are matched with `matching.match_aggregated`: a
+	payout batch whose invoices sum to the deposit first, then bounded
+	subset-sum searches (a batch topped up with a few invoices lacking a batch
+	id, then loose invoices alone) over invoices dated up to `window_days`
+	before the deposit, with a hard time budget per deposit. Only unique
+	combinations are accepted. Each match is allocated on the Bank Transaction
+	(one row per invoice); the rest is reported as residue.
+
+	Args:
+		days_back / start / end / tolerance_days / dry_run: As in
+			`reconcile_bank_strict`.
+		window_days: Invoice look-back per deposit (site_config
+			``shopee_reconcile_window_days``, default
+			`matching.AGGREGATE_WINDOW_DAYS`).
+		time_budget_ms: Subset-sum budget per deposit
+			(``shopee_reconcile_budget_ms``, default 200).
+	Returns:
+		{"transactions_considered", "invoices_considered", "reconciled",
+		 "invoices_reconciled", "by_batch", "by_batch_subset", "by_subset",
+		 "ambiguous", "budget_exhausted",
+		 "unmatched": [{"bank", "amount", "reason"}], "residue_invoices",
+		 "residue_amount", "errors", "match_s", "duration_s", ...}
 	"""
 	started = time.time()
-	# Mock metrics
+	if window_days is None:
+		window_days = _conf_number("shopee_reconcile_window_days", matching.AGGREGATE_WINDOW_DAYS)
+	if tolerance_days is None:
+		tolerance_days = _conf_number("shopee_reconcile_tolerance_days", RECONCILE_TOLERANCE_DAYS)
+	if time_budget_ms is None:
+		time_budget_ms = _conf_number("shopee_reconcile_budget_ms", int(matching.SUBSET_TIME_BUDGET_S * 1000))
+	window_days, tolerance_days = max(int(window_days), 0), max(int(tolerance_days), 0)
+	since, until = _reconcile_window(days_back, start, end)
+	bank_rows = _load_bank_rows(since, until)
+	invoices = _load_invoice_rows(
+		frappe.utils.add_days(since, -window_days), frappe.utils.add_days(until, tolerance_days)
+	)
+	t0 = time.time()
+	result = matching.match_aggregated(
+		bank_rows,
+		invoices,
+		window_days,
+		tolerance_days,
+		time_budget_s=max(int(time_budget_ms), 1) / 1000.0,
+		loose_max_items=_conf_number("shopee_reconcile_loose_max_items", matching.LOOSE_MAX_ITEMS),
+	)
+	match_s = time.time() - t0
+	reconciled, errors = _apply_matches([(m["bank"], m["invoices"]) for m in result["matches"]], invoices, dry_run)
 	metrics = {
-		"transactions_considered": 0,
-		"reconciled": 0,
-		"ambiguous": 0,
-		"needs_manual": 0,
+		"transactions_considered": len(bank_rows),
+		"invoices_considered": len(invoices),
+		"reconciled": reconciled,
+		"invoices_reconciled": sum(len(m["invoices"]) for m in result["matches"]),
+		"by_batch": result["stats"]["by_batch"],
+		"by_batch_subset": result["stats"]["by_batch_subset"],
+		"by_subset": result["stats"]["by_subset"],
+		"ambiguous": result["stats"]["ambiguous"],
+		"budget_exhausted": result["stats"]["budget_exhausted"],
+		"needs_manual": len(result["unmatched"]),
+		"unmatched": result["unmatched"][:200],
+		"residue_invoices": result["residue_invoices"][:200],
+		"residue_invoice_count": len(result["residue_invoices"]),
+		"residue_amount": result["residue_amount"],
+		"errors": errors,
+		"match_s": round(match_s, 3),
 		"days_back": days_back,
+		"window_days": window_days,
+		"tolerance_days": tolerance_days,
+		"dry_run": dry_run,
 		"duration_s": round(time.time() - started, 2),
 	}
+	_log("reconcile_aggregated", {k: metrics[k] for k in ("transactions_considered", "reconciled", "invoices_reconciled", "needs_manual", "budget_exhausted", "match_s")})
 	return metrics
 
 
+def reconcile_bank(days_back: int = 2, start: str | None = None, end: str | None = None, mode: str | None = None) -> Dict[str, Any]:
+	"""Run the configured reconciliation mode (site_config ``shopee_reconcile_mode``).
+
+	``strict`` (default): one deposit <-> one invoice. ``aggregate``: one
+	deposit <-> many invoices (payout batches / subset-sum).
+	"""
+	mode = (mode or frappe.conf.get("shopee_reconcile_mode") or "strict").lower()
+	fn = reconcile_bank_aggregated if mode == "aggregate" else reconcile_bank_strict
+	res = fn(days_back=days_back, start=start, end=end)
+	res["mode"] = "aggregate" if mode == "aggregate" else "strict"
+	return res
+
+
 def finance_backfill_range(start: str, end: str) -> Dict[str, Any]:
 	"""Historical backfill over a date range (STUB).
 
@@ -204,11 +728,16 @@ def finance_backfill_range(start: str, end: str) -> Dict[str, Any]:
 
 __all__ = [
 	"get_escrow_detail",
+	"fetch_escrow_batch",
+	"fetch_escrow_details",
+	"apply_escrow_batch",
 	"patch_invoice_with_fees",
 	"ensure_bank_transaction_from_escrow",
 	"sync_escrow_for_order",
 	"sync_escrow_for_completed_orders",
 	"reconcile_bank_strict",
+	"reconcile_bank_aggregated",
+	"reconcile_bank",
 	"finance_backfill_range",
 ]
 
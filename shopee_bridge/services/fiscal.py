@@ -5,20 +5,38 @@ ranges by delegating to lower level service modules (orders, returns,
 logistics, finance). All heavy business logic remains in those modules; this
 file focuses on safe iteration, summarization, and integrity reporting.
 
-Timezone: Target business timezone is Asia/Jakarta. For now we treat input
-ISO dates (YYYY-MM-DD) as local dates in that timezone without explicit
-conversion. TODO: Add proper tz handling using pytz/zoneinfo and convert to
-UTC epochs for precise window alignment.
+`run_fiscal_year_full_sync` is checkpointed per (stage, chunk) in the
+`Shopee Backfill Checkpoint` doctype, so an interrupted year resumes where it
+stopped; `backfill_progress` reports percent-complete and ETA. In fan-out
+mode (`start_fiscal_year_fanout`) the same checkpoints run as parallel RQ
+jobs with stage dependencies, and `backfill_fanin` builds the final summary.
+
+Timezone: input ISO dates (YYYY-MM-DD) are business-local dates in
+Asia/Jakarta. Each chunk is converted to exact UTC epoch bounds
+(`windows.local_dates_to_epochs`: first second of the start date to the last
+second of the end date) and synced with explicit ``time_from`` / ``time_to``,
+so every chunk fetches its own slice once; the services split anything
+longer than Shopee's 15 day list limit.
 """
 
 from __future__ import annotations
 
 from typing import Dict, List, Tuple, Iterable, Any
 import datetime as _dt
+import hashlib
+import json
 import math
+import time
 import frappe
 
-from . import orders, returns, logistics, finance
+from . import orders, returns, logistics, finance, integrity, windows
+
+
+def _log(event: str, data: Dict[str, Any]):  # light logging
+	try:
+		frappe.logger().info(f"[Shopee][fiscal] {event} {data}")
+	except Exception:  # pragma: no cover
+		pass
 
 
 def _iter_chunks(start: str, end: str, chunk_days: int) -> Iterable[Tuple[_dt.date, _dt.date]]:
@@ -46,18 +64,16 @@ def _chunk_summary_header(start: _dt.date, end: _dt.date) -> Dict[str, Any]:
 
 
 def backfill_orders_for_range(start: str, end: str, chunk_days: int = 7) -> Dict[str, Any]:
-	"""Backfill orders across date range (stub orchestration).
+	"""Backfill orders across date range.
 
-	Current approach: For each chunk, call incremental sync using a window size
-	approximated by the chunk length (days * 24 * 60 minutes). This leverages
-	existing stub logic; later we can implement explicit date-bounded calls.
+	Each chunk is synced over its own Asia/Jakarta day bounds (converted to
+	UTC epochs) via `orders.sync_orders_range`.
 	"""
 	results: List[Dict[str, Any]] = []
 	errors: List[str] = []
 	for cs, ce in _iter_chunks(start, end, chunk_days):
-		minutes = int(((ce - cs).days + 1) * 24 * 60)
 		try:
-			res = orders.sync_incremental_orders(updated_since_minutes=minutes)
+			res = orders.sync_orders_range(*windows.local_dates_to_epochs(cs, ce))
 			results.append({**_chunk_summary_header(cs, ce), **res})
 		except Exception as exc:  # pragma: no cover
 			err = f"orders {cs}->{ce}: {exc}"[:400]
@@ -67,13 +83,13 @@ def backfill_orders_for_range(start: str, end: str, chunk_days: int = 7) -> Dict
 
 
 def backfill_returns_for_range(start: str, end: str, chunk_days: int = 7) -> Dict[str, Any]:
-	"""Backfill returns across range using incremental returns stub."""
+	"""Backfill returns across range, each chunk over its own epoch bounds."""
 	results: List[Dict[str, Any]] = []
 	errors: List[str] = []
 	for cs, ce in _iter_chunks(start, end, chunk_days):
-		minutes = int(((ce - cs).days + 1) * 24 * 60)
+		time_from, time_to = windows.local_dates_to_epochs(cs, ce)
 		try:
-			res = returns.sync_returns_incremental(updated_since_minutes=minutes)
+			res = returns.sync_returns_incremental(time_from=time_from, time_to=time_to)
 			results.append({**_chunk_summary_header(cs, ce), **res})
 		except Exception as exc:  # pragma: no cover
 			err = f"returns {cs}->{ce}: {exc}"[:400]
@@ -83,13 +99,13 @@ def backfill_returns_for_range(start: str, end: str, chunk_days: int = 7) -> Dic
 
 
 def backfill_shipping_for_range(start: str, end: str, chunk_days: int = 7) -> Dict[str, Any]:
-	"""Backfill shipping status across range (stub)."""
+	"""Backfill shipping status across range (stub), each chunk over its own epoch bounds."""
 	results: List[Dict[str, Any]] = []
 	errors: List[str] = []
 	for cs, ce in _iter_chunks(start, end, chunk_days):
-		minutes = int(((ce - cs).days + 1) * 24 * 60)
+		time_from, time_to = windows.local_dates_to_epochs(cs, ce)
 		try:
-			res = logistics.sync_shipping_status(updated_since_minutes=minutes)
+			res = logistics.sync_shipping_status(time_from=time_from, time_to=time_to)
 			results.append({**_chunk_summary_header(cs, ce), **res})
 		except Exception as exc:
 			err = f"shipping {cs}->{ce}: {exc}"[:400]
@@ -125,15 +141,13 @@ def backfill_finance_for_range(start: str, end: str, min_age_hours: int = 3, chu
 
 
 def reconcile_bank_for_range(start: str, end: str) -> Dict[str, Any]:
-	"""Run strict reconciliation over a window (stub).
-
-	Currently invokes a single strict reconcile ignoring the date range; future
-	implementation will gather bank transactions constrained by date span.
-	"""
+	"""Run reconciliation (configured mode) over bank transactions dated within [start, end]."""
 	try:
-		res = finance.reconcile_bank_strict(days_back=(
-			( _dt.date.fromisoformat(end) - _dt.date.fromisoformat(start) ).days + 1
-		))
+		res = finance.reconcile_bank(
+			days_back=(_dt.date.fromisoformat(end) - _dt.date.fromisoformat(start)).days + 1,
+			start=start,
+			end=end,
+		)
 		res.update({"range_start": start, "range_end": end})
 		return res
 	except Exception as exc:  # pragma: no cover
@@ -141,71 +155,561 @@ def reconcile_bank_for_range(start: str, end: str) -> Dict[str, Any]:
 		return {"range_start": start, "range_end": end, "error": str(exc)}
 
 
-def generate_integrity_report(start: str, end: str) -> str:
-	"""Generate integrity report over date range; returns File URL or name (mock).
-
-	Planned contents:
-	  - Counts: orders, invoices, returns, bank transactions.
-	  - Discrepancies: orders without invoices, invoices without escrow, returns without credit notes.
-	  - Hash digest of key metrics for tamper evidence.
-
-	Current stub writes a small text file document.
-	"""
-	content = [
-		"Shopee Bridge Integrity Report",
-		f"Range: {start} -> {end}",
-		"(Stub content – implement real metrics)",
-	]
-	data = "\n".join(content).encode("utf-8")
+def _save_private_file(file_name: str, content: str) -> str:
 	file_doc = frappe.get_doc({
 		"doctype": "File",
-		"file_name": f"shopee_integrity_{start}_{end}.txt",
-		"content": data,
+		"file_name": file_name,
+		"content": content.encode("utf-8"),
 		"is_private": 1,
 	}).insert(ignore_permissions=True)
 	return file_doc.file_url or file_doc.name
 
 
-def run_fiscal_year_full_sync(company: str, fiscal_year_name: str) -> Dict[str, Any]:
-	"""Orchestrate an end-to-end fiscal year full sync (stub).
+def generate_integrity_report(start: str, end: str) -> str:
+	"""Generate integrity report over date range; returns the JSON File URL or name.
+
+	Contents (see `integrity.build_report`): counts of orders, invoices,
+	returns and bank transactions; orders without invoices, invoices without
+	escrow and returns without credit notes, from per-day SQL anti-joins with
+	cached partials for unchanged days; a sha256 digest over the content.
+	The discrepancy rows are also written as a CSV File ending in the digest.
+	"""
+	report = integrity.build_report(start, end)
+	base = f"shopee_integrity_{start}_{end}"
+	_save_private_file(f"{base}.csv", integrity.render_csv(report))
+	url = _save_private_file(f"{base}.json", integrity.render_json(report))
+	_log("integrity_report", {"range": f"{start}..{end}", "digest": report["digest"], **report["discrepancy_counts"]})
+	return url
+
+
+# ---------------------------------------------------------------------------
+# Checkpointed fiscal-year backfill
+# ---------------------------------------------------------------------------
+# Every (stage, date chunk) of a run is a `Shopee Backfill Checkpoint` row
+# (pending -> running -> done | failed). A re-run with the same company /
+# fiscal year skips chunks already done and retries the rest, so a crash
+# halfway through a year resumes at the first unfinished chunk. Only a compact
+# per-chunk summary is stored; the run result carries per-stage counters.
+
+CHECKPOINT_DOCTYPE = "Shopee Backfill Checkpoint"
+BACKFILL_STAGES = ("orders", "returns", "shipping", "finance", "reconcile", "report")
+_RANGE_STAGES = ("reconcile", "report")  # one chunk spanning the whole range
+CHUNK_ERROR_LIMIT = 20  # per-stage error strings kept in the run result
+
+# Fan-out mode (site_config ``shopee_backfill_mode = "fanout"``): every
+# checkpoint runs as its own RQ job on the long queue, at most
+# ``shopee_backfill_concurrency`` in flight per run. A chunk may start once its
+# dependencies are done: per-chunk stages wait for the same chunk of the
+# listed stages, range stages for every chunk of them.
+FANOUT_CONCURRENCY = 4
+CHUNK_JOB_TIMEOUT = 3600  # seconds per (stage, chunk) job
+STAGE_DEPENDENCIES: Dict[str, Tuple[str, ...]] = {
+	"finance": ("orders",),
+	"reconcile": ("finance",),
+	"report": ("orders", "returns", "shipping", "finance", "reconcile"),
+}
+
+
+def _fiscal_year_range(fiscal_year_name: str) -> Tuple[str, str]:
+	fy = frappe.get_doc("Fiscal Year", fiscal_year_name)
+	return fy.year_start_date.isoformat(), fy.year_end_date.isoformat()
+
+
+def backfill_mode() -> str:
+	mode = (frappe.conf.get("shopee_backfill_mode") or "serial").lower()
+	return mode if mode in {"serial", "fanout"} else "serial"
+
+
+def backfill_run_key(company: str, fiscal_year_name: str) -> str:
+	return f"fy:{company}:{fiscal_year_name}"
+
+
+def _checkpoint_key(run_key: str, stage: str, cs: _dt.date, ce: _dt.date) -> str:
+	run_digest = hashlib.sha1(run_key.encode("utf-8")).hexdigest()[:12]  # noqa: S324 (naming only)
+	return f"{run_digest}|{stage}|{cs.isoformat()}|{ce.isoformat()}"
+
+
+def plan_backfill(start: str, end: str, chunk_days: int = 7) -> List[Tuple[str, int, _dt.date, _dt.date]]:
+	"""Ordered ``(stage, chunk_index, chunk_start, chunk_end)`` work list for a range."""
+	chunks = list(_iter_chunks(start, end, chunk_days))
+	whole = (_dt.date.fromisoformat(start), _dt.date.fromisoformat(end))
+	plan: List[Tuple[str, int, _dt.date, _dt.date]] = []
+	for stage in BACKFILL_STAGES:
+		for idx, (cs, ce) in enumerate([whole] if stage in _RANGE_STAGES else chunks):
+			plan.append((stage, idx, cs, ce))
+	return plan
+
+
+def _ensure_checkpoints(run_key: str, plan: List[Tuple[str, int, _dt.date, _dt.date]]) -> Dict[str, Dict[str, Any]]:
+	"""Make the run's checkpoint rows match `plan`; returns checkpoint_key -> row.
+
+	Missing rows are created. Rows of an earlier plan for the same run_key
+	(other ``chunk_days``, or Fiscal Year dates edited since) are deleted:
+	their chunks overlap the new ones, and left in place they would be
+	dispatched and counted by `backfill_progress` / `backfill_fanin` forever.
+	Chunks whose dates are unchanged keep their row and status.
+	"""
+	planned = {_checkpoint_key(run_key, stage, cs, ce) for stage, _idx, cs, ce in plan}
+	rows = {
+		row["checkpoint_key"]: row
+		for row in frappe.get_all(
+			CHECKPOINT_DOCTYPE,
+			filters={"run_key": run_key},
+			fields=["name", "checkpoint_key", "stage", "status", "attempts"],
+			limit_page_length=0,
+		)
+	}
+	stale = [row["name"] for key, row in rows.items() if key not in planned]
+	if stale:
+		frappe.db.sql(f"DELETE FROM `tab{CHECKPOINT_DOCTYPE}` WHERE name IN %(names)s", {"names": tuple(stale)})
+		rows = {key: row for key, row in rows.items() if key in planned}
+		_log("checkpoints_replanned", {"run_key": run_key, "removed": len(stale)})
+	created = 0
+	for stage, idx, cs, ce in plan:
+		key = _checkpoint_key(run_key, stage, cs, ce)
+		if key in rows:
+			continue
+		doc = frappe.get_doc({
+			"doctype": CHECKPOINT_DOCTYPE,
+			"checkpoint_key": key,
+			"run_key": run_key,
+			"stage": stage,
+			"chunk_index": idx,
+			"chunk_start": cs.isoformat(),
+			"chunk_end": ce.isoformat(),
+			"status": "pending",
+			"attempts": 0,
+		}).insert(ignore_permissions=True)
+		rows[key] = {"name": doc.name, "checkpoint_key": key, "stage": stage, "status": "pending", "attempts": 0}
+		created += 1
+	if created or stale:
+		frappe.db.commit()
+	return rows
+
+
+def reset_backfill(run_key: str) -> int:
+	"""Delete all checkpoints of a run (next run starts from scratch); returns rows removed."""
+	names = frappe.get_all(CHECKPOINT_DOCTYPE, filters={"run_key": run_key}, pluck="name", limit_page_length=0)
+	for name in names:
+		frappe.delete_doc(CHECKPOINT_DOCTYPE, name, ignore_permissions=True, force=True)
+	frappe.db.commit()
+	return len(names)
+
+
+def _run_stage_chunk(stage: str, cs: _dt.date, ce: _dt.date) -> Dict[str, Any]:
+	"""Run one stage over one chunk (same calls as the backfill_*_for_range helpers)."""
+	if stage == "orders":
+		return orders.sync_orders_range(*windows.local_dates_to_epochs(cs, ce))
+	if stage == "returns":
+		time_from, time_to = windows.local_dates_to_epochs(cs, ce)
+		return returns.sync_returns_incremental(time_from=time_from, time_to=time_to)
+	if stage == "shipping":
+		time_from, time_to = windows.local_dates_to_epochs(cs, ce)
+		return logistics.sync_shipping_status(time_from=time_from, time_to=time_to)
+	if stage == "finance":
+		return finance.finance_backfill_range(cs.isoformat(), ce.isoformat())
+	if stage == "reconcile":
+		res = reconcile_bank_for_range(cs.isoformat(), ce.isoformat())
+		if res.get("error"):
+			raise RuntimeError(res["error"])
+		return res
+	if stage == "report":
+		return {"report": generate_integrity_report(cs.isoformat(), ce.isoformat())}
+	raise ValueError(f"unknown backfill stage: {stage}")
+
+
+def _compact_summary(res: Dict[str, Any]) -> Dict[str, Any]:
+	"""Scalar fields of a stage result plus error count (what a checkpoint keeps)."""
+	out = {k: v for k, v in (res or {}).items() if isinstance(v, (int, float, str, bool)) or v is None}
+	if isinstance((res or {}).get("errors"), list):
+		out["errors"] = len(res["errors"])
+	return out
+
+
+def _run_checkpoint(row: Dict[str, Any], stage: str, cs: _dt.date, ce: _dt.date) -> Tuple[bool, Dict[str, Any], str | None]:
+	"""Execute one pending / failed checkpoint and persist its outcome (committed)."""
+	name = row["name"]
+	attempts = int(row.get("attempts") or 0) + 1
+	started = time.time()
+	frappe.db.set_value(
+		CHECKPOINT_DOCTYPE,
+		name,
+		{"status": "running", "attempts": attempts, "started_at": frappe.utils.now_datetime(), "error_message": None},
+		update_modified=False,
+	)
+	frappe.db.commit()
+	try:
+		summary = _compact_summary(_run_stage_chunk(stage, cs, ce))
+		error = None
+	except Exception as exc:
+		frappe.db.rollback()
+		summary = {}
+		error = f"{stage} {cs}->{ce}: {exc}"[:400]
+		frappe.log_error(message=error, title="Shopee Backfill Chunk Error")
+	frappe.db.set_value(
+		CHECKPOINT_DOCTYPE,
+		name,
+		{
+			"status": "failed" if error else "done",
+			"finished_at": frappe.utils.now_datetime(),
+			"duration_s": round(time.time() - started, 2),
+			"error_message": error,
+			"summary_json": json.dumps(summary, default=str),
+		},
+		update_modified=False,
+	)
+	frappe.db.commit()
+	return error is None, summary, error
+
+
+def backfill_progress(run_key: str) -> Dict[str, Any]:
+	"""Percent-complete and ETA of a checkpointed backfill run.
+
+	ETA = remaining chunks per stage x that stage's mean chunk duration (the
+	mean over all finished chunks when a stage has none yet); None until at
+	least one chunk has finished.
+	"""
+	rows = frappe.get_all(
+		CHECKPOINT_DOCTYPE,
+		filters={"run_key": run_key},
+		fields=["stage", "status", "duration_s"],
+		limit_page_length=0,
+	)
+	stages: Dict[str, Dict[str, Any]] = {}
+	all_durations: List[float] = []
+	for row in rows:
+		st = stages.setdefault(
+			row["stage"], {"total": 0, "done": 0, "failed": 0, "running": 0, "queued": 0, "pending": 0, "_durations": []}
+		)
+		st["total"] += 1
+		st[row["status"] if row["status"] in st else "pending"] += 1
+		if row["status"] in ("done", "failed") and row.get("duration_s") is not None:
+			st["_durations"].append(float(row["duration_s"]))
+			all_durations.append(float(row["duration_s"]))
+	overall_mean = sum(all_durations) / len(all_durations) if all_durations else None
+	eta: float | None = 0.0
+	for st in stages.values():
+		durations = st.pop("_durations")
+		remaining = st["total"] - st["done"]
+		mean = sum(durations) / len(durations) if durations else overall_mean
+		if remaining and mean is None:
+			eta = None
+		elif eta is not None and remaining:
+			eta += remaining * mean
+	total = sum(st["total"] for st in stages.values())
+	done = sum(st["done"] for st in stages.values())
+	return {
+		"run_key": run_key,
+		"chunks_total": total,
+		"chunks_done": done,
+		"chunks_failed": sum(st["failed"] for st in stages.values()),
+		"percent_complete": round(100.0 * done / total, 1) if total else 0.0,
+		"eta_s": round(eta, 1) if eta is not None else None,
+		"stages": stages,
+	}
+
+
+def run_fiscal_year_full_sync(
+	company: str,
+	fiscal_year_name: str,
+	resume: bool = True,
+	chunk_days: int = 7,
+) -> Dict[str, Any]:
+	"""Orchestrate an end-to-end, checkpointed fiscal year full sync.
 
-	Strategy (future): derive fiscal year start/end dates from ERPNext Fiscal
-	Year document, then sequentially invoke backfill for orders, returns,
-	shipping, finance, reconciliation, and generate final integrity report.
+	Derives the window from the ERPNext Fiscal Year, plans (stage, chunk)
+	checkpoints (orders, returns, shipping, finance per `chunk_days`; then
+	reconciliation and the integrity report over the whole range) and runs
+	every checkpoint not yet done, committing its outcome as it goes.
 
-	Current stub: attempts to load Fiscal Year for date window; if unavailable
-	returns error. Then runs each backfill with default chunk size and compiles
-	summary without performing real mutations.
+	Args:
+		company: Company the backfill is for (part of the run key).
+		fiscal_year_name: ERPNext Fiscal Year name.
+		resume: Skip chunks completed by a previous run (False clears the
+			run's checkpoints first).
+		chunk_days: Chunk size for the per-chunk stages.
+	Returns:
+		Summary with per-stage counters (``chunks``, ``ran``, ``skipped``,
+		``failed``, ``errors``), ``report`` (when the report stage ran) and
+		``progress`` (see `backfill_progress`).
 	"""
+	started = time.time()
 	try:
-		fy = frappe.get_doc("Fiscal Year", fiscal_year_name)
-		start = fy.year_start_date.isoformat()
-		end = fy.year_end_date.isoformat()
+		start, end = _fiscal_year_range(fiscal_year_name)
 	except Exception as exc:
 		return {"ok": False, "error": f"Fiscal Year lookup failed: {exc}"}
 
-	orders_summary = backfill_orders_for_range(start, end)
-	returns_summary = backfill_returns_for_range(start, end)
-	shipping_summary = backfill_shipping_for_range(start, end)
-	finance_summary = backfill_finance_for_range(start, end)
-	reconcile_summary = reconcile_bank_for_range(start, end)
-	report_url = generate_integrity_report(start, end)
+	run_key = backfill_run_key(company, fiscal_year_name)
+	if not resume:
+		reset_backfill(run_key)
+	plan = plan_backfill(start, end, chunk_days)
+	rows = _ensure_checkpoints(run_key, plan)
+	stages: Dict[str, Dict[str, Any]] = {
+		stage: {"chunks": 0, "ran": 0, "skipped": 0, "failed": 0, "errors": []} for stage in BACKFILL_STAGES
+	}
+	report_url = None
+	for stage, _idx, cs, ce in plan:
+		st = stages[stage]
+		st["chunks"] += 1
+		row = rows[_checkpoint_key(run_key, stage, cs, ce)]
+		if row["status"] == "done":
+			st["skipped"] += 1
+			continue
+		ok, summary, error = _run_checkpoint(row, stage, cs, ce)
+		st["ran"] += 1
+		if not ok:
+			st["failed"] += 1
+			if len(st["errors"]) < CHUNK_ERROR_LIMIT:
+				st["errors"].append(error)
+		elif stage == "report":
+			report_url = summary.get("report")
+
+	return {
+		"ok": not any(st["failed"] for st in stages.values()),
+		"company": company,
+		"fiscal_year": fiscal_year_name,
+		"run_key": run_key,
+		"range_start": start,
+		"range_end": end,
+		"stages": stages,
+		"report": report_url,
+		"progress": backfill_progress(run_key),
+		"duration_s": round(time.time() - started, 2),
+	}
+
 
+# ---------------------------------------------------------------------------
+# Fan-out execution
+# ---------------------------------------------------------------------------
+
+def _fanout_concurrency() -> int:
+	try:
+		return max(int(frappe.conf.get("shopee_backfill_concurrency") or FANOUT_CONCURRENCY), 1)
+	except Exception:
+		return FANOUT_CONCURRENCY
+
+
+def _ready(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+	"""Pending checkpoints whose stage dependencies are done, oldest chunk first."""
+	done = {(r["stage"], str(r["chunk_start"])) for r in rows if r["status"] == "done"}
+	stage_open: Dict[str, int] = {}
+	for r in rows:
+		if r["status"] != "done":
+			stage_open[r["stage"]] = stage_open.get(r["stage"], 0) + 1
+	ready = []
+	for r in rows:
+		if r["status"] != "pending":
+			continue
+		deps = STAGE_DEPENDENCIES.get(r["stage"], ())
+		if r["stage"] in _RANGE_STAGES:
+			met = not any(stage_open.get(dep) for dep in deps)
+		else:
+			met = all((dep, str(r["chunk_start"])) in done for dep in deps)
+		if met:
+			ready.append(r)
+	order = {stage: i for i, stage in enumerate(BACKFILL_STAGES)}
+	ready.sort(key=lambda r: (str(r["chunk_start"]), order.get(r["stage"], 0)))
+	return ready
+
+
+def _enqueue_chunk(name: str) -> None:
+	try:
+		frappe.enqueue(
+			"shopee_bridge.jobs.backfill_fy.run_chunk",
+			queue="long",
+			timeout=CHUNK_JOB_TIMEOUT,
+			job_id=f"shopee_backfill:{name}",
+			deduplicate=True,
+			checkpoint=name,
+		)
+	except TypeError:  # older frappe without job_id/deduplicate
+		frappe.enqueue("shopee_bridge.jobs.backfill_fy.run_chunk", queue="long", timeout=CHUNK_JOB_TIMEOUT, checkpoint=name)
+
+
+def _enqueue_fanin(run_key: str) -> None:
+	try:
+		frappe.enqueue(
+			"shopee_bridge.jobs.backfill_fy.finalize",
+			queue="long",
+			job_id=f"shopee_backfill_fanin:{run_key}",
+			deduplicate=True,
+			run_key=run_key,
+		)
+	except TypeError:  # older frappe without job_id/deduplicate
+		frappe.enqueue("shopee_bridge.jobs.backfill_fy.finalize", queue="long", run_key=run_key)
+
+
+def dispatch_backfill(run_key: str) -> Dict[str, Any]:
+	"""Queue ready checkpoints of a run up to the concurrency cap.
+
+	The run's checkpoint rows are locked (FOR UPDATE) while deciding, so
+	chunk jobs finishing at the same time cannot over-dispatch or queue the
+	same chunk twice. When nothing is in flight and nothing more can start,
+	the fan-in job is enqueued (once, RQ job_id dedup).
+	"""
+	rows = frappe.db.sql(
+		f"""
+		SELECT name, stage, status, chunk_start
+		FROM `tab{CHECKPOINT_DOCTYPE}`
+		WHERE run_key = %(run_key)s
+		ORDER BY chunk_start, chunk_index
+		FOR UPDATE
+		""",
+		{"run_key": run_key},
+		as_dict=True,
+	)
+	in_flight = sum(1 for r in rows if r["status"] in ("queued", "running"))
+	take = _ready(rows)[: max(_fanout_concurrency() - in_flight, 0)]
+	names = [r["name"] for r in take]
+	if names:
+		frappe.db.sql(
+			f"UPDATE `tab{CHECKPOINT_DOCTYPE}` SET status = 'queued' WHERE name IN %(names)s",
+			{"names": tuple(names)},
+		)
+	frappe.db.commit()
+	for name in names:
+		_enqueue_chunk(name)
+	finished = bool(rows) and not in_flight and not names
+	if finished:
+		_enqueue_fanin(run_key)
+	return {"queued": len(names), "in_flight": in_flight + len(names), "finished": finished}
+
+
+def start_fiscal_year_fanout(
+	company: str,
+	fiscal_year_name: str,
+	resume: bool = True,
+	chunk_days: int = 7,
+) -> Dict[str, Any]:
+	"""Plan checkpoints for a fiscal year and fan them out as RQ jobs.
+
+	Same plan and checkpoints as `run_fiscal_year_full_sync`; done chunks are
+	kept when resuming, while failed, queued and running ones are reset to
+	pending (start a run only when none of its jobs is still alive). Returns
+	immediately; chunk jobs dispatch their successors and the last one
+	triggers `backfill_fanin`.
+	"""
+	try:
+		start, end = _fiscal_year_range(fiscal_year_name)
+	except Exception as exc:
+		return {"ok": False, "error": f"Fiscal Year lookup failed: {exc}"}
+	run_key = backfill_run_key(company, fiscal_year_name)
+	if not resume:
+		reset_backfill(run_key)
+	_ensure_checkpoints(run_key, plan_backfill(start, end, chunk_days))
+	frappe.db.sql(
+		f"""
+		UPDATE `tab{CHECKPOINT_DOCTYPE}` SET status = 'pending'
+		WHERE run_key = %(run_key)s AND status IN ('failed', 'queued', 'running')
+		""",
+		{"run_key": run_key},
+	)
+	dispatched = dispatch_backfill(run_key)
+	_log("fanout_started", {"run_key": run_key, **dispatched})
 	return {
 		"ok": True,
+		"mode": "fanout",
 		"company": company,
 		"fiscal_year": fiscal_year_name,
-		"orders": orders_summary,
-		"returns": returns_summary,
-		"shipping": shipping_summary,
-		"finance": finance_summary,
-		"reconcile": reconcile_summary,
+		"run_key": run_key,
+		"range_start": start,
+		"range_end": end,
+		"dispatched": dispatched["queued"],
+		"progress": backfill_progress(run_key),
+	}
+
+
+def run_backfill_chunk(checkpoint: str) -> Dict[str, Any]:
+	"""Run one fanned-out checkpoint, then dispatch whatever it unblocked."""
+	row = frappe.db.get_value(
+		CHECKPOINT_DOCTYPE,
+		checkpoint,
+		["name", "run_key", "stage", "status", "attempts", "chunk_start", "chunk_end"],
+		as_dict=True,
+	)
+	if not row:
+		return {"checkpoint": checkpoint, "error": "checkpoint not found"}
+	ok, error = True, None
+	if row["status"] != "done":
+		cs = _dt.date.fromisoformat(str(row["chunk_start"]))
+		ce = _dt.date.fromisoformat(str(row["chunk_end"]))
+		ok, _summary, error = _run_checkpoint(row, row["stage"], cs, ce)
+	dispatched = dispatch_backfill(row["run_key"])
+	return {"checkpoint": checkpoint, "stage": row["stage"], "ok": ok, "error": error, **dispatched}
+
+
+def backfill_fanin(run_key: str) -> Dict[str, Any]:
+	"""Aggregate a run's checkpoints into the final summary.
+
+	Per stage: chunk counts by status, ``blocked`` (pending chunks whose
+	dependencies failed), numeric totals summed over the chunk summaries and
+	up to `CHUNK_ERROR_LIMIT` error messages. The summary is also saved as a
+	private JSON File (``summary_file``: URL, None if saving failed) so it
+	outlives the fan-in job.
+	"""
+	rows = frappe.get_all(
+		CHECKPOINT_DOCTYPE,
+		filters={"run_key": run_key},
+		fields=["stage", "status", "error_message", "summary_json"],
+		order_by="chunk_start asc",
+		limit_page_length=0,
+	)
+	stages: Dict[str, Dict[str, Any]] = {
+		stage: {"chunks": 0, "done": 0, "failed": 0, "blocked": 0, "totals": {}, "errors": []} for stage in BACKFILL_STAGES
+	}
+	report_url = None
+	for row in rows:
+		st = stages.setdefault(row["stage"], {"chunks": 0, "done": 0, "failed": 0, "blocked": 0, "totals": {}, "errors": []})
+		st["chunks"] += 1
+		if row["status"] == "done":
+			st["done"] += 1
+		elif row["status"] == "failed":
+			st["failed"] += 1
+			if row.get("error_message") and len(st["errors"]) < CHUNK_ERROR_LIMIT:
+				st["errors"].append(row["error_message"])
+		else:
+			st["blocked"] += 1
+		try:
+			summary = json.loads(row.get("summary_json") or "{}")
+		except Exception:
+			summary = {}
+		for key, value in summary.items():
+			if isinstance(value, (int, float)) and not isinstance(value, bool) and key != "duration_s":
+				st["totals"][key] = st["totals"].get(key, 0) + value
+		if row["stage"] == "report" and summary.get("report"):
+			report_url = summary["report"]
+	result = {
+		"ok": bool(rows) and all(st["done"] == st["chunks"] for st in stages.values()),
+		"mode": "fanout",
+		"run_key": run_key,
+		"stages": stages,
 		"report": report_url,
+		"progress": backfill_progress(run_key),
+		"summary_file": None,
 	}
+	file_key = hashlib.sha1(run_key.encode("utf-8")).hexdigest()[:12]  # noqa: S324 (naming only)
+	try:
+		result["summary_file"] = _save_private_file(
+			f"shopee_backfill_{file_key}.json", json.dumps(result, default=str, indent=1)
+		)
+		frappe.db.commit()
+	except Exception as exc:
+		frappe.log_error(message=f"{run_key}: {exc}", title="Shopee Backfill Summary Error")
+	_log("fanin", {"run_key": run_key, "ok": result["ok"], "summary_file": result["summary_file"]})
+	return result
 
 
 __all__ = [
 	"run_fiscal_year_full_sync",
+	"backfill_run_key",
+	"plan_backfill",
+	"backfill_progress",
+	"reset_backfill",
+	"backfill_mode",
+	"start_fiscal_year_fanout",
+	"dispatch_backfill",
+	"run_backfill_chunk",
+	"backfill_fanin",
 	"backfill_orders_for_range",
 	"backfill_returns_for_range",
 	"backfill_shipping_for_range",
@@ -0,0 +1,379 @@
+"""Integrity report over Shopee-linked ERP documents.
+
+Discrepancy sets are computed in the database with anti-joins on the
+``shopee_order_sn`` custom fields (no per-document `get_all` loops):
+
+- ``orders_without_invoice``: submitted Sales Orders with no submitted
+  (non-return) Sales Invoice for the same order SN.
+- ``invoices_without_escrow``: submitted Sales Invoices whose escrow was never
+  synced (``escrow_synced != 1``).
+- ``returns_without_credit_note``: refunded Customer Issues (Shopee returns)
+  whose order invoice has no submitted credit note (``is_return`` Sales
+  Invoice with ``return_against`` pointing at it).
+
+Work is split per business day. Each day gets a fingerprint from cheap
+grouped aggregates (row count, docstatus sum, max ``modified`` per source
+table). A day's partial result (counts, discrepancy rows, digest) is cached
+under that fingerprint, so re-running a year only runs the anti-joins for
+days whose documents changed. Invoices are usually posted after their order,
+so a day's fingerprint also covers invoices posted up to ``link_days`` later;
+an invoice posted beyond that horizon is picked up when the order's day is
+next recomputed (any change on that day, cache expiry, ``use_cache=False``).
+
+The report carries a sha256 digest over its canonical JSON content (the
+``run`` block with timings / cache stats is excluded), so identical data
+always yields the same digest and any edit to the exported content is
+detectable.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Tuple
+import csv
+import datetime as _dt
+import hashlib
+import io
+import json
+import time
+import frappe
+
+REPORT_VERSION = 1
+CHECKS = ("orders_without_invoice", "invoices_without_escrow", "returns_without_credit_note")
+COUNT_SOURCES = ("orders", "invoices", "returns", "bank_transactions")
+
+# Shopee return statuses that settle a refund and therefore need a credit note.
+RETURN_REFUND_STATUSES = ("ACCEPTED", "REFUND_PAID")
+
+# Days an invoice may be posted after its order and still invalidate the
+# order day's cached result (site_config shopee_integrity_link_days).
+INTEGRITY_LINK_DAYS = 30
+# Lifetime of cached per-day partials (site_config shopee_integrity_cache_days).
+INTEGRITY_CACHE_DAYS = 90
+# Days per anti-join query (bounds the IN list).
+INTEGRITY_DAY_CHUNK = 92
+
+_CANON = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode
+
+# source -> (table, day expression, row filter, "counted" condition)
+_SOURCES = {
+	"orders": ("`tabSales Order`", "transaction_date", "IFNULL(shopee_order_sn, '') != ''", "docstatus = 1"),
+	"invoices": (
+		"`tabSales Invoice`",
+		"posting_date",
+		"(IFNULL(shopee_order_sn, '') != '' OR is_return = 1)",
+		"docstatus = 1 AND is_return = 0",
+	),
+	"returns": ("`tabCustomer Issue`", "DATE(creation)", "IFNULL(return_sn, '') != ''", "1 = 1"),
+	"bank_transactions": ("`tabBank Transaction`", "date", "deposit > 0", "docstatus = 1"),
+}
+
+
+def _log(event: str, data: Dict[str, Any]):  # light logging
+	try:
+		frappe.logger().info(f"[Shopee][integrity] {event} {data}")
+	except Exception:  # pragma: no cover
+		pass
+
+
+def _conf_int(key: str, default: int) -> int:
+	try:
+		return max(int(frappe.conf.get(key) or default), 0)
+	except (TypeError, ValueError):
+		return default
+
+
+def _to_date(value: str | _dt.date) -> _dt.date:
+	return value if isinstance(value, _dt.date) else _dt.date.fromisoformat(str(value)[:10])
+
+
+def _day_key(value: Any) -> str:
+	return _to_date(value).isoformat()
+
+
+def _date_range(start: _dt.date, end: _dt.date) -> List[str]:
+	return [(start + _dt.timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+	for i in range(0, len(items), max(size, 1)):
+		yield items[i : i + size]
+
+
+def sha256_digest(content: Any) -> str:
+	"""``"sha256:<hex>"`` over the canonical JSON encoding of `content`."""
+	return "sha256:" + hashlib.sha256(_CANON(content).encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Per-day fingerprints
+# ---------------------------------------------------------------------------
+
+def _source_aggregates(source: str, since: _dt.date, until: _dt.date) -> Dict[str, Dict[str, Any]]:
+	"""{day: {"rows", "counted", "docstatus", "modified"}} for one source table (one grouped query)."""
+	table, day_expr, row_filter, counted = _SOURCES[source]
+	account = frappe.conf.get("shopee_reconcile_bank_account") if source == "bank_transactions" else None
+	rows = frappe.db.sql(
+		f"""
+		SELECT {day_expr} AS day, COUNT(*) AS `rows`, SUM({counted}) AS counted,
+			SUM(docstatus) AS docstatus, MAX(modified) AS modified
+		FROM {table}
+		WHERE {row_filter} AND {day_expr} BETWEEN %(since)s AND %(until)s
+			{"AND bank_account = %(account)s" if account else ""}
+		GROUP BY {day_expr}
+		""",
+		{"since": since, "until": until, "account": account},
+		as_dict=True,
+	)
+	return {
+		_day_key(r["day"]): {
+			"rows": int(r["rows"] or 0),
+			"counted": int(r["counted"] or 0),
+			"docstatus": int(r["docstatus"] or 0),
+			"modified": str(r["modified"] or ""),
+		}
+		for r in rows
+	}
+
+
+def day_fingerprints(start: _dt.date, end: _dt.date, link_days: int) -> Tuple[Dict[str, str], Dict[str, Dict[str, int]]]:
+	"""(fingerprints, counts) per day in [start, end].
+
+	A day's fingerprint covers its own orders / returns / bank transactions and
+	the invoices (credit notes included) posted on that day and up to
+	`link_days` after it. Counts are the submitted documents per source.
+	"""
+	aggregates = {
+		source: _source_aggregates(source, start, end + _dt.timedelta(days=link_days) if source == "invoices" else end)
+		for source in COUNT_SOURCES
+	}
+	invoices = aggregates["invoices"]
+	config = [REPORT_VERSION, link_days, list(RETURN_REFUND_STATUSES), frappe.conf.get("shopee_reconcile_bank_account")]
+	fingerprints: Dict[str, str] = {}
+	counts: Dict[str, Dict[str, int]] = {}
+	day = start
+	while day <= end:
+		key = day.isoformat()
+		linked = [invoices.get((day + _dt.timedelta(days=i)).isoformat()) for i in range(link_days + 1)]
+		own = {source: aggregates[source].get(key) for source in COUNT_SOURCES if source != "invoices"}
+		fingerprints[key] = sha256_digest([config, own, linked])
+		counts[key] = {source: (aggregates[source].get(key) or {}).get("counted", 0) for source in COUNT_SOURCES}
+		day += _dt.timedelta(days=1)
+	return fingerprints, counts
+
+
+# ---------------------------------------------------------------------------
+# Anti-joins (only for days whose fingerprint changed)
+# ---------------------------------------------------------------------------
+
+def _orders_without_invoice(days: List[str]) -> List[Dict[str, Any]]:
+	return frappe.db.sql(
+		"""
+		SELECT so.transaction_date AS day, so.name, so.shopee_order_sn AS order_sn
+		FROM `tabSales Order` so
+		LEFT JOIN `tabSales Invoice` si
+			ON si.shopee_order_sn = so.shopee_order_sn AND si.docstatus = 1 AND si.is_return = 0
+		WHERE so.docstatus = 1 AND IFNULL(so.shopee_order_sn, '') != ''
+			AND so.transaction_date IN %(days)s
+			AND si.name IS NULL
+		""",
+		{"days": tuple(days)},
+		as_dict=True,
+	)
+
+
+def _invoices_without_escrow(days: List[str]) -> List[Dict[str, Any]]:
+	return frappe.db.sql(
+		"""
+		SELECT si.posting_date AS day, si.name, si.shopee_order_sn AS order_sn
+		FROM `tabSales Invoice` si
+		WHERE si.docstatus = 1 AND si.is_return = 0 AND IFNULL(si.shopee_order_sn, '') != ''
+			AND IFNULL(si.escrow_synced, 0) != 1
+			AND si.posting_date IN %(days)s
+		""",
+		{"days": tuple(days)},
+		as_dict=True,
+	)
+
+
+def _returns_without_credit_note(days: List[str]) -> List[Dict[str, Any]]:
+	return frappe.db.sql(
+		"""
+		SELECT ci.day, ci.name, ci.order_sn, ci.return_sn
+		FROM (
+			SELECT name, return_sn, DATE(creation) AS day,
+				JSON_UNQUOTE(JSON_EXTRACT(shopee_payload_json, '$.order_sn')) AS order_sn,
+				JSON_UNQUOTE(JSON_EXTRACT(shopee_payload_json, '$.status')) AS status
+			FROM `tabCustomer Issue`
+			WHERE IFNULL(return_sn, '') != '' AND DATE(creation) IN %(days)s
+		) ci
+		LEFT JOIN `tabSales Invoice` si
+			ON si.shopee_order_sn = ci.order_sn AND si.docstatus = 1 AND si.is_return = 0
+		LEFT JOIN `tabSales Invoice` cn
+			ON cn.return_against = si.name AND cn.is_return = 1 AND cn.docstatus = 1
+		WHERE ci.status IN %(statuses)s AND cn.name IS NULL
+		""",
+		{"days": tuple(days), "statuses": RETURN_REFUND_STATUSES},
+		as_dict=True,
+	)
+
+
+_CHECK_QUERIES = {
+	"orders_without_invoice": _orders_without_invoice,
+	"invoices_without_escrow": _invoices_without_escrow,
+	"returns_without_credit_note": _returns_without_credit_note,
+}
+
+
+def compute_discrepancies(days: List[str]) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+	"""{day: {check: [row, ...]}} for the given ISO days, rows sorted by document name."""
+	out: Dict[str, Dict[str, List[Dict[str, Any]]]] = {day: {check: [] for check in CHECKS} for day in days}
+	for chunk in _chunks(sorted(days), INTEGRITY_DAY_CHUNK):
+		for check in CHECKS:
+			for row in _CHECK_QUERIES[check](chunk):
+				item = {k: row.get(k) for k in ("name", "order_sn", "return_sn") if row.get(k) is not None}
+				out[_day_key(row["day"])][check].append(item)
+	for per_check in out.values():
+		for rows in per_check.values():
+			rows.sort(key=lambda r: r["name"])
+	return out
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def _cache_key(day: str) -> str:
+	return f"shopee_integrity|v{REPORT_VERSION}|{day}"
+
+
+def _day_partial(counts: Dict[str, int], discrepancies: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+	partial = {"counts": counts, "discrepancies": discrepancies}
+	partial["digest"] = sha256_digest(partial)
+	return partial
+
+
+def build_report(start: str | _dt.date, end: str | _dt.date, use_cache: bool = True) -> Dict[str, Any]:
+	"""Integrity report over the inclusive business-date range.
+
+	Args:
+		start: ISO date (YYYY-MM-DD) or date, inclusive.
+		end: ISO date or date, inclusive.
+		use_cache: Reuse cached per-day partials whose fingerprint is unchanged.
+	Returns:
+		Dict with ``range``, ``counts`` and ``discrepancy_counts`` totals,
+		``days`` (per-day counts, discrepancy counts, digest), ``discrepancies``
+		(check -> rows with ``day``), ``digest`` (sha256 over all of the above)
+		and ``run`` (``days``, ``recomputed``, ``cached``, ``duration_s``; not
+		digested).
+	"""
+	started = time.time()
+	sd, ed = _to_date(start), _to_date(end)
+	if ed < sd:
+		raise ValueError("end before start")
+	link_days = _conf_int("shopee_integrity_link_days", INTEGRITY_LINK_DAYS)
+	ttl = _conf_int("shopee_integrity_cache_days", INTEGRITY_CACHE_DAYS) * 86400
+	fingerprints, counts = day_fingerprints(sd, ed, link_days)
+	cache = frappe.cache()
+	partials: Dict[str, Dict[str, Any]] = {}
+	dirty: List[str] = []
+	for day in _date_range(sd, ed):
+		cached = cache.get_value(_cache_key(day)) if use_cache else None
+		if isinstance(cached, dict) and cached.get("fingerprint") == fingerprints[day]:
+			partials[day] = cached["partial"]
+		else:
+			dirty.append(day)
+	for day, discrepancies in compute_discrepancies(dirty).items():
+		partials[day] = _day_partial(counts[day], discrepancies)
+		cache.set_value(_cache_key(day), {"fingerprint": fingerprints[day], "partial": partials[day]}, expires_in_sec=ttl or None)
+	report = assemble_report(sd, ed, partials)
+	report["run"] = {
+		"days": len(partials),
+		"recomputed": len(dirty),
+		"cached": len(partials) - len(dirty),
+		"duration_s": round(time.time() - started, 3),
+	}
+	_log("report", {"range": report["range"], **report["run"], "digest": report["digest"]})
+	return report
+
+
+def assemble_report(start: _dt.date, end: _dt.date, partials: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+	"""Combine per-day partials (ISO day -> partial) into the digested report body."""
+	totals = {source: 0 for source in COUNT_SOURCES}
+	discrepancies: Dict[str, List[Dict[str, Any]]] = {check: [] for check in CHECKS}
+	days = []
+	for day in sorted(partials):
+		partial = partials[day]
+		for source in COUNT_SOURCES:
+			totals[source] += partial["counts"].get(source, 0)
+		for check in CHECKS:
+			discrepancies[check].extend({"day": day, **row} for row in partial["discrepancies"].get(check, []))
+		days.append({
+			"day": day,
+			"counts": partial["counts"],
+			"discrepancies": {check: len(partial["discrepancies"].get(check, [])) for check in CHECKS},
+			"digest": partial["digest"],
+		})
+	report: Dict[str, Any] = {
+		"report": "shopee_integrity",
+		"version": REPORT_VERSION,
+		"range": {"start": start.isoformat(), "end": end.isoformat()},
+		"counts": totals,
+		"discrepancy_counts": {check: len(rows) for check, rows in discrepancies.items()},
+		"days": days,
+		"discrepancies": discrepancies,
+	}
+	report["csv_sha256"] = hashlib.sha256(_csv_rows(report).encode("utf-8")).hexdigest()
+	report["digest"] = sha256_digest(report)
+	return report
+
+
+def verify_report(report: Dict[str, Any]) -> bool:
+	"""True when ``report["digest"]`` matches its content (``run`` excluded)."""
+	content = {k: v for k, v in report.items() if k not in ("digest", "run")}
+	return report.get("digest") == sha256_digest(content)
+
+
+_CSV_COLUMNS = ("check", "day", "name", "order_sn", "return_sn")
+
+
+def _csv_rows(report: Dict[str, Any]) -> str:
+	buf = io.StringIO()
+	writer = csv.writer(buf, lineterminator="\n")
+	writer.writerow(_CSV_COLUMNS)
+	for check in CHECKS:
+		for row in report["discrepancies"][check]:
+			writer.writerow([check] + [row.get(col) or "" for col in _CSV_COLUMNS[1:]])
+	return buf.getvalue()
+
+
+def render_csv(report: Dict[str, Any]) -> str:
+	"""Discrepancy rows as CSV; the last row carries the report digest.
+
+	Everything above the digest row hashes to ``report["csv_sha256"]``, which
+	is itself covered by the report digest.
+	"""
+	return _csv_rows(report) + f"digest,,{report['digest']},,\n"
+
+
+def render_json(report: Dict[str, Any]) -> str:
+	"""Pretty JSON of the full report (``run`` included)."""
+	return json.dumps(report, indent=1, sort_keys=True, ensure_ascii=False, default=str)
+
+
+__all__ = [
+	"REPORT_VERSION",
+	"CHECKS",
+	"COUNT_SOURCES",
+	"RETURN_REFUND_STATUSES",
+	"INTEGRITY_LINK_DAYS",
+	"INTEGRITY_CACHE_DAYS",
+	"INTEGRITY_DAY_CHUNK",
+	"sha256_digest",
+	"day_fingerprints",
+	"compute_discrepancies",
+	"build_report",
+	"assemble_report",
+	"verify_report",
+	"render_csv",
+	"render_json",
+]
@@ -17,6 +17,7 @@ import time
 import frappe
 
 from .. import clients
+from . import windows
 
 # Shopee API paths
 CHANNEL_LIST_PATH = "/api/v2/logistics/get_channel_list"
@@ -181,22 +182,31 @@ def update_tracking_status(dn_name: str, status_payload: Dict[str, Any]) -> bool
 	return True
 
 
-def sync_shipping_status(updated_since_minutes: int = 30) -> Dict[str, Any]:
+def sync_shipping_status(
+	updated_since_minutes: int = 30,
+	time_from: int | None = None,
+	time_to: int | None = None,
+) -> Dict[str, Any]:
 	"""Pull recent shipping status updates (stub pipeline).
 
+	Window is (now - minutes, now) unless explicit ``time_from`` / ``time_to``
+	epoch bounds are given (backfills); it is pre-split into <= 15 day slices
+	(``slices``) for the list calls to come.
+
 	Placeholder logic simply returns an empty summary ready for extension.
 	"""
-	now = int(time.time())
-	window_from = now - updated_since_minutes * 60
+	now = int(time.time()) if time_to is None else int(time_to)
+	window_from = now - updated_since_minutes * 60 if time_from is None else int(time_from)
 	summary = {
 		"window_from": window_from,
 		"window_to": now,
-		"minutes": updated_since_minutes,
+		"minutes": updated_since_minutes if time_from is None else None,
+		"slices": len(windows.split_window(window_from, now)),
 		"updates_found": 0,
 		"updates_processed": 0,
 		"errors": [],
 	}
-	# TODO: implement call to e.g. /logistics/get_tracking_info if available; iterate updates.
+	# TODO: implement call to e.g. /logistics/get_tracking_info per slice if available; iterate updates.
 	return summary
 
 
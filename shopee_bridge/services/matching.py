@@ -0,0 +1,456 @@
+"""Bank transaction <-> Sales Invoice matching engine for payout reconciliation.
+
+Pure Python (no frappe): `services.finance` loads rows and applies results.
+Invoices are indexed once, so matching a month of payouts costs one hash probe
+(plus a bisect over that amount's dates) per bank transaction instead of a
+scan over every invoice:
+
+ - ``(amount in minor units, value date ordinal) -> invoices`` for exact-day
+   matches;
+ - ``amount -> sorted date ordinals`` (with parallel invoice lists) for a
+   ``tolerance_days`` window found with `bisect`;
+ - ``payout_batch_id -> invoices``: a bank reference equal to a payout batch id
+   restricts candidates to that batch.
+
+Candidate edges form a bipartite graph. Connected components with exactly one
+transaction and one invoice are matches; larger components (one deposit fits
+several invoices, or several deposits fit one invoice) are reported as
+ambiguous groups and left for review. A transaction whose amount exists only
+outside the date window is reported as a date mismatch.
+
+Shopee usually settles many escrow nets in one deposit; `match_aggregated`
+matches one deposit to many invoices (payout batch totals first, then a
+time-bounded subset-sum over invoices in the window) and reports the residue.
+
+Row shapes:
+	bank: {"name", "date", "amount", "reference"?}
+	invoice: {"name", "date", "amount", "payout_batch_id"?}
+``date`` is a `datetime.date` / `datetime.datetime` or ISO string.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, Iterable, List, Tuple
+import datetime as _dt
+import time
+
+MINOR_UNITS = 100  # IDR amounts are whole, but ERPNext currency fields carry 2 decimals
+
+
+def to_minor(amount: Any, scale: int = MINOR_UNITS) -> int:
+	"""Amount -> integer minor units (half-up), so float noise never splits a key."""
+	return int((Decimal(str(amount or 0)) * scale).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def to_ordinal(value: Any) -> int:
+	if isinstance(value, _dt.datetime):
+		return value.date().toordinal()
+	if isinstance(value, _dt.date):
+		return value.toordinal()
+	return _dt.date.fromisoformat(str(value)[:10]).toordinal()
+
+
+class InvoiceIndex:
+	"""Hash / sorted-date indexes over invoice rows (see module docstring)."""
+
+	__slots__ = ("invoices", "amounts", "by_amount_date", "by_amount", "by_batch")
+
+	def __init__(self, invoices: Iterable[Dict[str, Any]]):
+		self.invoices: List[Dict[str, Any]] = []
+		self.amounts: List[int] = []
+		self.by_amount_date: Dict[Tuple[int, int], List[int]] = {}
+		self.by_batch: Dict[str, List[int]] = {}
+		dated: Dict[int, List[Tuple[int, int]]] = {}
+		for inv in invoices:
+			i = len(self.invoices)
+			amount, day = to_minor(inv["amount"]), to_ordinal(inv["date"])
+			self.invoices.append(inv)
+			self.amounts.append(amount)
+			self.by_amount_date.setdefault((amount, day), []).append(i)
+			dated.setdefault(amount, []).append((day, i))
+			batch = inv.get("payout_batch_id")
+			if batch:
+				self.by_batch.setdefault(str(batch), []).append(i)
+		# amount -> (sorted day ordinals, invoice positions in the same order)
+		self.by_amount: Dict[int, Tuple[List[int], List[int]]] = {}
+		for amount, pairs in dated.items():
+			pairs.sort()
+			self.by_amount[amount] = ([d for d, _ in pairs], [i for _, i in pairs])
+
+	def candidates(self, amount: int, day: int, tolerance_days: int = 0) -> List[int]:
+		"""Invoice positions with this amount dated within ``day +/- tolerance_days``."""
+		if tolerance_days <= 0:
+			return self.by_amount_date.get((amount, day), [])
+		entry = self.by_amount.get(amount)
+		if entry is None:
+			return []
+		days, positions = entry
+		return positions[bisect_left(days, day - tolerance_days) : bisect_right(days, day + tolerance_days)]
+
+	def batch_candidates(self, batch_id: str, amount: int) -> List[int]:
+		return [i for i in self.by_batch.get(batch_id, ()) if self.amounts[i] == amount]
+
+
+def _components(edges: Dict[int, List[int]]) -> List[Tuple[List[int], List[int]]]:
+	"""Connected components of the bank -> invoice candidate graph (union-find)."""
+	parent: Dict[Any, Any] = {}
+
+	def find(x):
+		parent.setdefault(x, x)
+		while parent[x] != x:
+			parent[x] = parent[parent[x]]
+			x = parent[x]
+		return x
+
+	for b, invs in edges.items():
+		rb = find(("b", b))
+		for i in invs:
+			ri = find(("i", i))
+			if ri != rb:
+				parent[ri] = rb
+	groups: Dict[Any, Tuple[List[int], List[int]]] = {}
+	for node in list(parent):
+		kind, idx = node
+		bucket = groups.setdefault(find(node), ([], []))
+		bucket[0 if kind == "b" else 1].append(idx)
+	return [(sorted(b), sorted(i)) for b, i in groups.values()]
+
+
+def match_strict(
+	bank_rows: List[Dict[str, Any]],
+	invoices: List[Dict[str, Any]] | InvoiceIndex,
+	tolerance_days: int = 0,
+) -> Dict[str, Any]:
+	"""One-to-one match of bank deposits to invoices by amount and value date.
+
+	A bank ``reference`` equal to an indexed payout_batch_id restricts the
+	candidates to that batch (rule ``batch``); otherwise amount + date window
+	(rule ``amount_date``).
+
+	Returns:
+		{"matches": [{"bank", "invoice", "rule"}],
+		 "ambiguous": [{"bank": [...], "invoices": [...]}],
+		 "date_mismatch": [bank names], "unmatched": [bank names],
+		 "stats": {"bank", "invoices", "edges"}}
+	"""
+	index = invoices if isinstance(invoices, InvoiceIndex) else InvoiceIndex(invoices)
+	edges: Dict[int, List[int]] = {}
+	rules: Dict[int, str] = {}
+	date_mismatch: List[str] = []
+	unmatched: List[str] = []
+	for b, row in enumerate(bank_rows):
+		amount = to_minor(row["amount"])
+		ref = str(row.get("reference") or "")
+		found = index.batch_candidates(ref, amount) if ref and ref in index.by_batch else []
+		rules[b] = "batch" if found else "amount_date"
+		if not found:
+			found = index.candidates(amount, to_ordinal(row["date"]), tolerance_days)
+		if found:
+			edges[b] = list(found)
+		elif amount in index.by_amount:
+			date_mismatch.append(row["name"])
+		else:
+			unmatched.append(row["name"])
+	matches: List[Dict[str, Any]] = []
+	ambiguous: List[Dict[str, Any]] = []
+	for banks, invs in _components(edges):
+		if len(banks) == 1 and len(invs) == 1:
+			matches.append({"bank": bank_rows[banks[0]]["name"], "invoice": index.invoices[invs[0]]["name"], "rule": rules[banks[0]]})
+		else:
+			ambiguous.append({
+				"bank": [bank_rows[b]["name"] for b in banks],
+				"invoices": [index.invoices[i]["name"] for i in invs],
+			})
+	return {
+		"matches": matches,
+		"ambiguous": ambiguous,
+		"date_mismatch": date_mismatch,
+		"unmatched": unmatched,
+		"stats": {"bank": len(bank_rows), "invoices": len(index.invoices), "edges": sum(len(v) for v in edges.values())},
+	}
+
+
+# Aggregated payouts: one deposit settles many escrow nets.
+AGGREGATE_WINDOW_DAYS = 7  # invoices up to this many days before the deposit
+SUBSET_MAX_CANDIDATES = 60  # nearest-dated invoices searched per deposit
+SUBSET_TIME_BUDGET_S = 0.2  # hard per-deposit search budget
+LOOSE_MAX_ITEMS = 4  # unlabelled invoices allowed to top up one batch
+_BUDGET_CHECK_EVERY = 512  # search nodes between clock reads
+
+
+class _BudgetExhausted(Exception):
+	pass
+
+
+def subset_sums(
+	values: List[int], target: int, deadline: float, max_items: int | None = None, max_solutions: int = 2
+) -> List[List[int]]:
+	"""Up to `max_solutions` index sets of `values` summing exactly to `target`.
+
+	Depth-first over values sorted descending with three bounds: the
+	remaining suffix, and the largest values that still fit under
+	`max_items`, must reach the target; no value may overshoot it. Equal values are tried
+	once per depth, so solutions differ in their multiset of values (see
+	`_swappable`). Searching for two solutions proves uniqueness when only one
+	comes back. Raises `_BudgetExhausted` once `time.perf_counter()` passes
+	`deadline` before the search finished.
+	"""
+	limit = len(values) if max_items is None else max_items
+	order = sorted(range(len(values)), key=lambda i: -values[i])
+	vals = [values[i] for i in order]
+	suffix = [0] * (len(vals) + 1)
+	for k in range(len(vals) - 1, -1, -1):
+		suffix[k] = suffix[k + 1] + vals[k]
+	n = len(vals)
+	found: List[List[int]] = []
+	if suffix[0] < target:
+		return found
+	chosen: List[int] = []
+	nodes = 0
+
+	def dfs(k: int, remaining: int) -> bool:
+		"""True once enough solutions are collected."""
+		nonlocal nodes
+		if remaining == 0:
+			found.append([order[j] for j in chosen])
+			return len(found) >= max_solutions
+		slots = limit - len(chosen)
+		if slots <= 0:
+			return False
+		nodes += 1
+		if nodes % _BUDGET_CHECK_EVERY == 0 and time.perf_counter() > deadline:
+			raise _BudgetExhausted
+		prev = None
+		for j in range(k, n):
+			# vals descending: the next `slots` values are the most reachable from j on
+			if suffix[j] - suffix[min(j + slots, n)] < remaining:
+				return False
+			v = vals[j]
+			if v > remaining or v == prev:  # overshoot, or same value already tried at this depth
+				continue
+			prev = v
+			chosen.append(j)
+			if dfs(j + 1, remaining - v):
+				return True
+			chosen.pop()
+		return False
+
+	dfs(0, target)
+	return found
+
+
+def _swappable(values: List[int], picked: List[int]) -> bool:
+	"""True when a picked value also occurs unpicked (an equally valid other invoice set)."""
+	counts: Dict[int, int] = {}
+	for v in values:
+		counts[v] = counts.get(v, 0) + 1
+	for k in picked:
+		counts[values[k]] -= 1
+	return any(counts[values[k]] > 0 for k in picked)
+
+
+def match_aggregated(
+	bank_rows: List[Dict[str, Any]],
+	invoices: List[Dict[str, Any]] | InvoiceIndex,
+	window_days: int = AGGREGATE_WINDOW_DAYS,
+	tolerance_days: int = 0,
+	time_budget_s: float = SUBSET_TIME_BUDGET_S,
+	max_candidates: int = SUBSET_MAX_CANDIDATES,
+	loose_max_items: int = LOOSE_MAX_ITEMS,
+) -> Dict[str, Any]:
+	"""Match each bank deposit to a set of invoices whose nets sum to it.
+
+	Invoices are grouped by payout_batch_id first: an open batch is one unit
+	(its total, dated by its latest invoice); invoices without a batch id are
+	units of their own. A unit is eligible for a deposit when dated within
+	``[deposit - window_days, deposit + tolerance_days]``.
+
+	Passes, each over the deposits still open, in date order:
+	 1. ``batch``: a bank reference naming a batch with the deposit's total,
+	    else the only eligible batch with that total (several make the
+	    deposit ``ambiguous``).
+	 2. ``batch_subset``: one batch plus at most `loose_max_items` loose
+	    invoices dated with it (within ``tolerance_days``) summing to the
+	    remainder - a batch some of whose invoices were synced without a batch
+	    id. The remainder may not exceed the batch total, and only one batch
+	    may explain the deposit.
+	 3. ``subset_sum``: a combination of the `max_candidates` nearest-dated
+	    loose invoices (a payout batch is never split or combined with another
+	    batch: one deposit settles one batch).
+	Passes 2 and 3 are bounded subset-sum searches sharing a hard budget of
+	`time_budget_s` per deposit. They deepen one invoice at a time, so the
+	smallest combination wins, and accept it only when it is unique at that
+	size (a second solution, or an equal-valued invoice left out, makes the
+	deposit ``ambiguous``). Units are consumed by the first deposit they
+	match; the structured passes run first so a loose combination cannot take
+	units a batch match needs.
+
+	Returns:
+		{"matches": [{"bank", "invoices": [...], "rule", "amount"}],
+		 "unmatched": [{"bank", "amount", "reason"}] (reason: no_candidates,
+		 no_subset, ambiguous, budget_exhausted), "residue_invoices": [names],
+		 "residue_amount": float, "stats": {...}}
+	"""
+	index = invoices if isinstance(invoices, InvoiceIndex) else InvoiceIndex(invoices)
+	# units: (total, day, invoice positions); batches first, then loose invoices
+	units: List[Tuple[int, int, List[int]]] = []
+	batch_unit: Dict[str, int] = {}
+	for batch, positions in index.by_batch.items():
+		batch_unit[batch] = len(units)
+		units.append((sum(index.amounts[i] for i in positions), max(to_ordinal(index.invoices[i]["date"]) for i in positions), positions))
+	n_batches = len(units)  # units[:n_batches] are batches
+	for i, inv in enumerate(index.invoices):
+		if not inv.get("payout_batch_id"):
+			units.append((index.amounts[i], to_ordinal(inv["date"]), [i]))
+	used = [False] * len(units)
+	by_total: Dict[int, List[int]] = {}
+	for u in batch_unit.values():
+		by_total.setdefault(units[u][0], []).append(u)
+	by_day = sorted(range(len(units)), key=lambda u: units[u][1])
+	sorted_days = [units[u][1] for u in by_day]
+	matches: List[Dict[str, Any]] = []
+	pending: List[Tuple[int, int, int]] = []  # (day, amount, bank position)
+
+	def _eligible(u: int, day: int) -> bool:
+		return not used[u] and day - window_days <= units[u][1] <= day + tolerance_days
+
+	def _take(row: Dict[str, Any], chosen: List[int], rule: str) -> None:
+		positions: List[int] = []
+		for u in chosen:
+			used[u] = True
+			positions.extend(units[u][2])
+		matches.append({"bank": row["name"], "invoices": [index.invoices[i]["name"] for i in sorted(positions)], "rule": rule, "amount": row["amount"]})
+
+	spent: Dict[int, float] = {}  # bank position -> search seconds used
+	exhausted: set = set()
+	ambiguous: set = set()
+	for day, amount, b in sorted((to_ordinal(row["date"]), to_minor(row["amount"]), b) for b, row in enumerate(bank_rows)):
+		row = bank_rows[b]
+		ref = str(row.get("reference") or "")
+		named = batch_unit.get(ref)
+		if named is not None and units[named][0] == amount and _eligible(named, day):
+			_take(row, [named], "batch")  # the reference identifies the batch
+			continue
+		fits = [u for u in by_total.get(amount, []) if _eligible(u, day)]
+		if len(fits) == 1:
+			_take(row, fits, "batch")
+		elif fits:  # several open batches total the deposit
+			ambiguous.add(b)
+			pending.append((day, amount, b))
+		else:
+			pending.append((day, amount, b))
+
+	def _search(b: int, cands: List[int], target: int, max_items: int | None = None) -> List[int] | None:
+		"""The unique combination of `cands` summing to `target`, else None (ambiguity / budget recorded)."""
+		started = time.perf_counter()
+		values = [units[u][0] for u in cands]
+		deadline = started + time_budget_s - spent.get(b, 0.0)
+		solutions: List[List[int]] = []
+		try:
+			# iterative deepening: the fewest invoices that reach the target win
+			for depth in range(1, min(max_items or len(values), len(values)) + 1):
+				solutions = subset_sums(values, target, deadline, depth)
+				if solutions:
+					break
+		except _BudgetExhausted:
+			exhausted.add(b)
+			solutions = []
+		spent[b] = spent.get(b, 0.0) + time.perf_counter() - started
+		if len(solutions) > 1 or (solutions and _swappable(values, solutions[0])):
+			ambiguous.add(b)
+			return None
+		return [cands[k] for k in solutions[0]] if solutions else None
+
+	def _window(day: int, cap: int, loose_only: bool = False, batches_only: bool = False) -> List[int]:
+		lo, hi = bisect_left(sorted_days, day - window_days), bisect_right(sorted_days, day + tolerance_days)
+		found = [
+			u for u in by_day[lo:hi]
+			if not used[u] and not (loose_only and u < n_batches) and not (batches_only and u >= n_batches)
+		]
+		if len(found) > max_candidates:
+			found.sort(key=lambda u: abs(units[u][1] - day))
+			found = found[:max_candidates]
+		return [u for u in found if units[u][0] <= cap]
+
+	searched = 0
+	still: List[Tuple[int, int, int]] = []
+	for day, amount, b in sorted(pending):  # pass 2: batch + loose remainder
+		if b in ambiguous:
+			still.append((day, amount, b))
+			continue
+		options: List[List[int]] = []
+		# smallest remainder first: the deposit's own batch leaves only its few unlabelled invoices
+		for u in sorted(_window(day, amount, batches_only=True), key=lambda u: amount - units[u][0]):
+			rest = amount - units[u][0]
+			if rest > units[u][0]:  # mostly loose: not a batch with a few unlabelled invoices
+				break
+			loose = [v for v in _window(day, rest, loose_only=True) if abs(units[v][1] - units[u][1]) <= tolerance_days]
+			top = sorted((units[v][0] for v in loose), reverse=True)[:loose_max_items]
+			if not rest or sum(top) < rest:  # cannot reach the remainder within the item cap
+				continue
+			searched += 1
+			picked = _search(b, loose, rest, loose_max_items)
+			if b in exhausted or b in ambiguous:
+				break
+			if picked:
+				options.append([u] + picked)
+				if len(options) > 1:  # two batches explain the deposit
+					ambiguous.add(b)
+					break
+		if len(options) == 1 and b not in exhausted and b not in ambiguous:
+			_take(bank_rows[b], options[0], "batch_subset")
+		else:
+			still.append((day, amount, b))
+	unmatched: List[Dict[str, Any]] = []
+	for day, amount, b in still:  # pass 3: loose invoices only
+		row = bank_rows[b]
+		cands = _window(day, amount, loose_only=True)
+		picked = None
+		if cands and b not in exhausted and b not in ambiguous:
+			searched += 1
+			picked = _search(b, cands, amount)
+		if picked:
+			_take(row, picked, "subset_sum")
+			continue
+		if b in exhausted:
+			reason = "budget_exhausted"
+		elif b in ambiguous:
+			reason = "ambiguous"
+		else:
+			reason = "no_subset" if cands else "no_candidates"
+		unmatched.append({"bank": row["name"], "amount": row["amount"], "reason": reason})
+	residue = sorted(i for u, flag in enumerate(used) if not flag for i in units[u][2])
+	return {
+		"matches": matches,
+		"unmatched": unmatched,
+		"residue_invoices": [index.invoices[i]["name"] for i in residue],
+		"residue_amount": sum(index.amounts[i] for i in residue) / MINOR_UNITS,
+		"stats": {
+			"bank": len(bank_rows),
+			"invoices": len(index.invoices),
+			"units": len(units),
+			"by_batch": sum(1 for m in matches if m["rule"] == "batch"),
+			"by_batch_subset": sum(1 for m in matches if m["rule"] == "batch_subset"),
+			"by_subset": sum(1 for m in matches if m["rule"] == "subset_sum"),
+			"searched": searched,
+			"ambiguous": len(ambiguous),
+			"budget_exhausted": len(exhausted),
+		},
+	}
+
+
+__all__ = [
+	"MINOR_UNITS",
+	"AGGREGATE_WINDOW_DAYS",
+	"SUBSET_MAX_CANDIDATES",
+	"SUBSET_TIME_BUDGET_S",
+	"LOOSE_MAX_ITEMS",
+	"to_minor",
+	"to_ordinal",
+	"InvoiceIndex",
+	"match_strict",
+	"subset_sums",
+	"match_aggregated",
+]
@@ -18,16 +18,37 @@ Functions return JSON-serializable types for easy logging and testing.
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterator, List, Tuple
+import json
 import time
 import math
 import frappe
 
-from .. import clients
+from .. import clients, mappers, records
+from . import windows
 
 ORDER_LIST_PATH = "/api/v2/order/get_order_list"
 ORDER_DETAIL_PATH = "/api/v2/order/get_order_detail"
 
+DETAIL_CHUNK_SIZE = 50  # Shopee get_order_detail accepts up to 50 order_sn per call
+DETAIL_CONCURRENCY = 4  # parallel detail chunks in flight
+DETAIL_RATE_PER_SEC = 8.0  # global send budget for detail chunks
+
+# doctype -> (state key for the document name, ((column, state key), ...))
+_EXISTING_DOCTYPES: Dict[str, Tuple[str, Tuple[Tuple[str, str], ...]]] = {
+	"Sales Order": ("so", (("shopee_sync_hash", "sync_hash"), ("last_pushed_update_time", "so_last_pushed"))),
+	"Sales Invoice": ("si", (("last_pushed_update_time", "si_last_pushed"),)),
+	"Delivery Note": ("dn", ()),
+}
+
+# Adaptive list windows: a window whose first page reports more is
+# bisected (down to LIST_MIN_SPLIT_SECONDS) and the halves listed concurrently.
+LIST_MIN_SPLIT_SECONDS = 600
+LIST_CONCURRENCY = 4
+
+RESUME_CACHE_KEY = "shopee_bridge:sync_orders:resume"
+RESUME_TTL_SECONDS = 3 * 24 * 3600
+
 
 def _log_sync(event: str, data: Dict[str, Any]):  # small centralized log helper
 	try:
@@ -36,16 +57,17 @@ def _log_sync(event: str, data: Dict[str, Any]):  # small centralized log helper
 		pass
 
 
-def get_order_list(time_from: int, time_to: int, status: str | None, page_size: int = 100) -> List[str]:
-	"""Fetch list of order_sn within time window.
+def iter_order_list_pages(
+	time_from: int,
+	time_to: int,
+	status: str | None = None,
+	page_size: int = 100,
+	cursor: str | None = None,
+) -> Iterator[Tuple[List[str], str | None]]:
+	"""Yield order_sn pages lazily as ``(order_sns, next_cursor)``.
 
-	Args:
-		time_from: Unix epoch (seconds) inclusive lower bound.
-		time_to: Unix epoch (seconds) inclusive upper bound.
-		status: Optional Shopee order status filter.
-		page_size: Page size (Shopee max typically 100).
-	Returns:
-		List of order_sn strings.
+	``next_cursor`` is None on the last page. Passing a previously yielded
+	cursor resumes the same window from that page.
 	"""
 	params: Dict[str, Any] = {
 		"time_range_field": "update_time",
@@ -54,45 +76,217 @@ def get_order_list(time_from: int, time_to: int, status: str | None, page_size:
 		"page_size": min(max(int(page_size), 1), 100),
 		"order_status": status or "",  # Shopee may treat empty as all
 	}
-	order_sns: List[str] = []
-	more = True
-	cursor = None
-	while more:
+	while True:
 		if cursor:
 			params["cursor"] = cursor
 		resp = clients.http_get(ORDER_LIST_PATH, params)
 		data = resp.get("response") or resp  # adapt to actual API structure once known
 		# Expect data like { 'order_list': [ { 'order_sn': '...' }, ... ], 'more': True, 'next_cursor': '...' }
-		for row in (data.get("order_list") or []):
-			sn = row.get("order_sn")
-			if sn:
-				order_sns.append(sn)
+		page = [row.get("order_sn") for row in (data.get("order_list") or []) if row.get("order_sn")]
 		more = bool(data.get("more")) and bool(data.get("next_cursor"))
-		cursor = data.get("next_cursor")
+		cursor = data.get("next_cursor") if more else None
+		yield page, cursor
 		if not more:
 			break
-	return order_sns
 
 
-def get_order_detail(order_sn_list: List[str]) -> List[Dict[str, Any]]:
+def get_order_list(time_from: int, time_to: int, status: str | None, page_size: int = 100) -> List[str]:
+	"""Fetch list of order_sn within time window.
+
+	Dense windows are bisected instead of followed through deep cursors (see
+	`collect_order_sns`).
+
+	Args:
+		time_from: Unix epoch (seconds) inclusive lower bound.
+		time_to: Unix epoch (seconds) inclusive upper bound.
+		status: Optional Shopee order status filter.
+		page_size: Page size (Shopee max typically 100).
+	Returns:
+		List of order_sn strings.
+	Raises:
+		frappe.ValidationError: A list page still failed after retries; no
+			partial list is returned.
+	"""
+	report = collect_order_sns(time_from, time_to, status=status, page_size=page_size)
+	if report["errors"]:
+		raise frappe.ValidationError("; ".join(report["errors"])[:1000])
+	return report["order_sns"]
+
+
+def _list_conf(key: str, default: int) -> int:
+	try:
+		return max(int(frappe.conf.get(key) or default), 1)
+	except Exception:
+		return default
+
+
+def collect_order_sns(
+	time_from: int,
+	time_to: int,
+	status: str | None = None,
+	page_size: int = 100,
+	concurrency: int | None = None,
+) -> Dict[str, Any]:
+	"""List order_sn for a window, bisecting windows that hold more than a page.
+
+	Windows are paged breadth-first: each round sends the next page of every
+	open window through `clients.http_get_many` (bounded concurrency). A window
+	whose first page reports more and that spans at least
+	2 x `LIST_MIN_SPLIT_SECONDS` is replaced by its two halves
+	(``[from, mid]``, ``[mid + 1, to]``). The split is decided on the first
+	page so a dense window costs one extra request rather than a run of pages
+	that the halves would list again; its SNs are kept and duplicates across
+	boundaries are dropped. Windows too short to split are paged to the end
+	through their cursor. Shopee's list response has no total count and its
+	rows carry no update_time, so the remaining time range of a partly paged
+	window is unknown and bisection has to start from the first page.
+
+	Args:
+		time_from / time_to: Inclusive epoch bounds.
+		status: Optional Shopee order status filter.
+		page_size: Page size (Shopee max 100).
+		concurrency: Requests in flight (``shopee_order_list_concurrency``,
+			default `LIST_CONCURRENCY`).
+	Returns:
+		{"order_sns": [...], "windows": int, "splits": int, "pages": int,
+		 "errors": [...], "duration_s": float}. ``errors`` lists pages that
+		still failed; callers must treat a non-empty list as incomplete.
+	"""
+	started = time.time()
+	concurrency = concurrency or _list_conf("shopee_order_list_concurrency", LIST_CONCURRENCY)
+	base: Dict[str, Any] = {
+		"time_range_field": "update_time",
+		"page_size": min(max(int(page_size), 1), 100),
+		"order_status": status or "",
+	}
+	seen: Dict[str, None] = {}
+	# open windows: [time_from, time_to, cursor, pages fetched]
+	frontier: List[List[Any]] = [[int(time_from), int(time_to), None, 0]]
+	summary: Dict[str, Any] = {"windows": 1, "splits": 0, "pages": 0, "errors": []}
+	while frontier:
+		params_list = []
+		for w_from, w_to, cursor, _pages in frontier:
+			params = {**base, "time_from": w_from, "time_to": w_to}
+			if cursor:
+				params["cursor"] = cursor
+			params_list.append(params)
+		outcomes = clients.http_get_many(ORDER_LIST_PATH, params_list, max_workers=concurrency)
+		next_frontier: List[List[Any]] = []
+		for (w_from, w_to, _cursor, pages), outcome in zip(frontier, outcomes):
+			if not outcome["ok"]:
+				summary["errors"].append(f"list {w_from}..{w_to} page {pages + 1}: {outcome['error']}"[:500])
+				continue
+			summary["pages"] += 1
+			data = outcome["data"].get("response") or outcome["data"]
+			for row in data.get("order_list") or []:
+				if row.get("order_sn"):
+					seen[row["order_sn"]] = None
+			if not (data.get("more") and data.get("next_cursor")):
+				continue
+			pages += 1
+			if pages == 1 and w_to - w_from + 1 >= 2 * LIST_MIN_SPLIT_SECONDS:
+				mid = (w_from + w_to) // 2
+				next_frontier.append([w_from, mid, None, 0])
+				next_frontier.append([mid + 1, w_to, None, 0])
+				summary["splits"] += 1
+				summary["windows"] += 2
+			else:
+				next_frontier.append([w_from, w_to, data["next_cursor"], pages])
+		frontier = next_frontier
+	summary["order_sns"] = list(seen)
+	summary["duration_s"] = round(time.time() - started, 2)
+	_log_sync("list_collect", {k: summary[k] for k in ("windows", "splits", "pages", "duration_s")} | {"orders": len(seen)})
+	return summary
+
+
+def _detail_chunks(order_sn_list: List[str], chunk_size: int = DETAIL_CHUNK_SIZE) -> List[List[str]]:
+	return [order_sn_list[i : i + chunk_size] for i in range(0, len(order_sn_list), chunk_size)]
+
+
+def _detail_orders(resp: Dict[str, Any]) -> List[records.OrderRecord]:
+	"""Order details of one response as compact `records.OrderRecord`s (raw dicts are dropped here)."""
+	data = resp.get("response") or resp
+	return records.order_records(data.get("order_list") or data.get("orders") or [])
+
+
+def get_order_detail(order_sn_list: List[str], concurrency: int = 1) -> List[records.OrderRecord]:
 	"""Fetch detailed order objects.
 
 	Batches list into chunks to respect API size limits (assume <= 50 per call).
+	Orders are returned as compact `records.OrderRecord`s (read-only mappings).
+
+	Args:
+		order_sn_list: Order serials to fetch.
+		concurrency: >1 fetches chunks in parallel via `fetch_order_details`;
+			failed chunks are then logged and omitted instead of raising.
 	"""
-	results: List[Dict[str, Any]] = []
+	if concurrency > 1:
+		report = fetch_order_details(order_sn_list, concurrency=concurrency)
+		for err in report["errors"]:
+			frappe.log_error(message=err, title="Shopee Order Detail Chunk Error")
+		return report["orders"]
+	results: List[records.OrderRecord] = []
 	if not order_sn_list:
 		return results
-	chunk_size = 50
-	for i in range(0, len(order_sn_list), chunk_size):
-		chunk = order_sn_list[i : i + chunk_size]
+	for chunk in _detail_chunks(order_sn_list):
 		params = {"order_sn_list": ",".join(chunk)}
 		resp = clients.http_get(ORDER_DETAIL_PATH, params)
-		data = resp.get("response") or resp
-		for od in (data.get("order_list") or data.get("orders") or []):
-			results.append(od)
+		results.extend(_detail_orders(resp))
 	return results
 
 
+def fetch_order_details(
+	order_sn_list: List[str],
+	concurrency: int = DETAIL_CONCURRENCY,
+	rate_per_sec: float | None = DETAIL_RATE_PER_SEC,
+) -> Dict[str, Any]:
+	"""Fetch order details with bounded concurrency and per-chunk reporting.
+
+	Chunks are issued in parallel (at most `concurrency` in flight, sends paced
+	to `rate_per_sec` across all workers). Orders are returned in input chunk
+	order; a failing chunk is reported and skipped without aborting the batch.
+
+	Returns:
+		{"orders": [...], "chunks": [{"index", "size", "ok", "orders", "duration_s", "error"?}],
+		 "errors": [...], "duration_s": float}
+	"""
+	started = time.time()
+	chunks = _detail_chunks(order_sn_list or [])
+	outcomes = clients.http_get_many(
+		ORDER_DETAIL_PATH,
+		[{"order_sn_list": ",".join(chunk)} for chunk in chunks],
+		max_workers=concurrency,
+		rate_per_sec=rate_per_sec,
+	)
+	orders: List[records.OrderRecord] = []
+	chunk_rows: List[Dict[str, Any]] = []
+	errors: List[str] = []
+	for chunk, outcome in zip(chunks, outcomes):
+		row: Dict[str, Any] = {
+			"index": outcome["index"],
+			"size": len(chunk),
+			"ok": outcome["ok"],
+			"orders": 0,
+			"duration_s": outcome["duration_s"],
+		}
+		if outcome["ok"]:
+			found = _detail_orders(outcome["data"])
+			orders.extend(found)
+			row["orders"] = len(found)
+		else:
+			row["error"] = outcome["error"]
+			errors.append(f"chunk {outcome['index']} ({chunk[0]}..{chunk[-1]}): {outcome['error']}"[:500])
+		chunk_rows.append(row)
+	summary = {
+		"orders": orders,
+		"chunks": chunk_rows,
+		"errors": errors,
+		"duration_s": round(time.time() - started, 2),
+	}
+	_log_sync("detail_fetch", {"chunks": len(chunks), "orders": len(orders), "failed": len(errors), "duration_s": summary["duration_s"]})
+	return summary
+
+
 def ensure_customer_and_addresses(order: Dict[str, Any]) -> Tuple[str, str]:
 	"""Ensure ERPNext Customer & Address for order.
 
@@ -113,26 +307,109 @@ def ensure_customer_and_addresses(order: Dict[str, Any]) -> Tuple[str, str]:
 	return customer_name, address_name
 
 
-def upsert_sales_order(order: Dict[str, Any]) -> str:
+def _empty_state() -> Dict[str, Any]:
+	return {"so": None, "si": None, "dn": None, "sync_hash": None, "so_last_pushed": None, "si_last_pushed": None}
+
+
+def lookup_existing(order_sns: List[str]) -> Dict[str, Dict[str, Any]]:
+	"""Resolve existing ERPNext documents for a chunk of orders in bulk.
+
+	Runs one ``shopee_order_sn IN (...)`` query per doctype (Sales Order,
+	Sales Invoice, Delivery Note) instead of one lookup per order and doctype.
+	Cancelled documents are ignored; if several match, the newest wins.
+
+	Args:
+		order_sns: Order serials of one detail chunk.
+	Returns:
+		order_sn -> state dict with keys ``so``, ``si``, ``dn`` (names or None),
+		``sync_hash`` and ``so_last_pushed`` (Sales Order) and ``si_last_pushed``
+		(Sales Invoice). Every requested SN gets an entry.
+	"""
+	sns = tuple(dict.fromkeys(sn for sn in order_sns if sn))
+	index: Dict[str, Dict[str, Any]] = {sn: _empty_state() for sn in sns}
+	if not sns:
+		return index
+	for doctype, (key, extra) in _EXISTING_DOCTYPES.items():
+		for row in _existing_rows(doctype, extra, sns):
+			state = index.get(row.get("shopee_order_sn"))
+			if state is None:
+				continue
+			state[key] = row.get("name")
+			for column, state_key in extra:
+				state[state_key] = row.get(column)
+	return index
+
+
+def _existing_rows(doctype: str, extra: Tuple[Tuple[str, str], ...], sns: Tuple[str, ...]) -> List[Dict[str, Any]]:
+	"""Fetch name + shopee_order_sn (+ extra columns) for `sns`; tolerate missing custom fields."""
+	for columns in ((c for c, _ in extra), ()):
+		select = ", ".join(["name", "shopee_order_sn", *columns])
+		try:
+			return frappe.db.sql(
+				f"""
+				SELECT {select}
+				FROM `tab{doctype}`
+				WHERE shopee_order_sn IN %(sns)s AND docstatus < 2
+				ORDER BY creation
+				""",
+				{"sns": sns},
+				as_dict=True,
+			)
+		except Exception as exc:  # custom field not created yet on this site
+			_log_sync("existing_lookup_error", {"doctype": doctype, "error": str(exc)[:200]})
+			if not extra:
+				break
+	return []
+
+
+def upsert_sales_order(order: Dict[str, Any], existing: Dict[str, Any] | None = None) -> str:
 	"""Create or update Sales Order for Shopee order.
 
-	Idempotency via custom field `shopee_order_sn`.
-	Returns Sales Order name (mocked if not implemented).
+	Idempotency via custom field `shopee_order_sn`. ``shopee_sync_hash`` is
+	not set here: `process_order` stores it once the dependent documents exist.
+
+	Args:
+		order: Order detail payload.
+		existing: Pre-resolved state from `lookup_existing` (skips the per-order lookup).
+	Returns:
+		Sales Order name (mocked if not implemented).
 	"""
 	order_sn = order.get("order_sn") or "UNKNOWN"
-	# TODO: search Sales Order by shopee_order_sn and update / create accordingly.
+	if existing is None:
+		existing = lookup_existing([order_sn]).get(order_sn) or {}
+	if existing.get("so"):
+		# TODO: update the existing Sales Order in place.
+		return existing["so"]
+	# TODO: create Sales Order.
 	so_name = f"SO-{order_sn}"
 	return so_name
 
 
-def ensure_sales_invoice_for_paid(so_name: str, order: Dict[str, Any]) -> str:
-	"""If order is paid, ensure a Sales Invoice exists (mocked)."""
+def store_sync_hash(so_name: str, sync_hash: str, existing: Dict[str, Any] | None = None) -> None:
+	"""Record `sync_hash` on the Sales Order (skip marker for unchanged re-pulls)."""
+	if not sync_hash or (existing or {}).get("sync_hash") == sync_hash:
+		return
+	frappe.db.set_value("Sales Order", so_name, "shopee_sync_hash", sync_hash, update_modified=False)
+
+
+def ensure_sales_invoice_for_paid(so_name: str, order: Dict[str, Any], existing: Dict[str, Any] | None = None) -> str:
+	"""If order is paid, ensure a Sales Invoice exists (mocked).
+
+	``existing`` (from `lookup_existing`) short-circuits when an invoice is already linked.
+	"""
+	if existing and existing.get("si"):
+		return existing["si"]
 	# TODO: implement state check & invoice creation.
 	return f"SI-{so_name}"
 
 
-def ensure_delivery_note_for_ready(so_or_si: str, order: Dict[str, Any]) -> str:
-	"""If order status indicates ready to ship, ensure Delivery Note exists."""
+def ensure_delivery_note_for_ready(so_or_si: str, order: Dict[str, Any], existing: Dict[str, Any] | None = None) -> str:
+	"""If order status indicates ready to ship, ensure Delivery Note exists.
+
+	``existing`` (from `lookup_existing`) short-circuits when a note is already linked.
+	"""
+	if existing and existing.get("dn"):
+		return existing["dn"]
 	# TODO: implement shipping readiness logic.
 	return f"DN-{so_or_si}"  # use base name for determinism
 
@@ -143,71 +420,313 @@ def on_completed(order_sn: str) -> None:
 	_log_sync("completed", {"order_sn": order_sn})
 
 
-def sync_incremental_orders(updated_since_minutes: int = 15) -> Dict[str, Any]:
-	"""High-level incremental sync pipeline.
+def process_order(od: Dict[str, Any], existing: Dict[str, Any] | None = None) -> Dict[str, Any]:
+	"""Upsert ERPNext documents for one order detail; returns created names.
 
-	Steps:
-		1. Calculate time window (now - minutes, now).
-		2. Pull order_sn list.
-		3. Pull detailed orders.
-		4. Upsert ERPNext docs per order.
-		5. Aggregate results & per-order errors.
+	Orders whose `mappers.compute_order_sync_hash` matches the stored Sales
+	Order ``shopee_sync_hash`` are not written again (``skipped`` is True).
+	The hash is stored last, after the invoice / delivery note steps, so an
+	order whose downstream step failed is retried on the next pull.
 
-	Returns summary dict.
+	Args:
+		od: Order detail payload.
+		existing: This order's entry from `lookup_existing` (looked up alone when omitted).
 	"""
-	started = int(time.time())
-	window_to = started
-	window_from = window_to - (updated_since_minutes * 60)
-	summary = {
-		"window_from": window_from,
-		"window_to": window_to,
-		"minutes": updated_since_minutes,
-		"orders_found": 0,
-		"orders_processed": 0,
-		"errors": [],
-		"duration_s": 0,
-	}
+	if existing is None:
+		sn = od.get("order_sn")
+		existing = lookup_existing([sn]).get(sn) if sn else _empty_state()
+	sync_hash = mappers.compute_order_sync_hash(od)
+	if existing.get("so") and existing.get("sync_hash") == sync_hash:
+		# Mapped content unchanged since the last write: skip all document writes.
+		return {
+			"order_sn": od.get("order_sn"),
+			"so": existing["so"],
+			"si": existing.get("si"),
+			"dn": existing.get("dn"),
+			"skipped": True,
+		}
+	so = upsert_sales_order(od, existing)
+	status = (od.get("order_status") or "").lower()
+	si = None
+	dn = None
+	if status in {"paid", "ready_to_ship", "completed"}:
+		si = ensure_sales_invoice_for_paid(so, od, existing)
+	if status in {"ready_to_ship", "completed"}:
+		dn = ensure_delivery_note_for_ready(si or so, od, existing)  # prefer invoice if created
+	if status == "completed":
+		on_completed(od.get("order_sn"))
+	store_sync_hash(so, sync_hash, existing)
+	return {"order_sn": od.get("order_sn"), "so": so, "si": si, "dn": dn, "skipped": False}
+
+
+def iter_order_detail_chunks(order_sn_list: List[str], concurrency: int = 1) -> Iterator[List[Dict[str, Any]]]:
+	"""Yield detail lists one chunk (<= 50 orders) at a time.
+
+	With ``concurrency > 1`` the page is fetched in parallel first and then
+	yielded chunk by chunk (memory stays bounded by one list page). Chunks
+	that failed are raised as `frappe.ValidationError` after the fetched ones
+	are yielded, as the serial path raises on its failing chunk, so callers
+	never move past a page with orders missing.
+	"""
+	if concurrency > 1:
+		report = fetch_order_details(order_sn_list, concurrency=concurrency)
+		orders = report["orders"]
+		for i in range(0, len(orders), DETAIL_CHUNK_SIZE):
+			yield orders[i : i + DETAIL_CHUNK_SIZE]
+		if report["errors"]:
+			raise frappe.ValidationError("; ".join(report["errors"])[:1000])
+		return
+	for chunk in _detail_chunks(order_sn_list):
+		resp = clients.http_get(ORDER_DETAIL_PATH, {"order_sn_list": ",".join(chunk)})
+		yield _detail_orders(resp)
+
+
+def _load_resume_state() -> Dict[str, Any] | None:
 	try:
-		order_sn_list = get_order_list(window_from, window_to, status=None)
-		summary["orders_found"] = len(order_sn_list)
-		details = get_order_detail(order_sn_list)
+		raw = frappe.cache().get_value(RESUME_CACHE_KEY)
+		return json.loads(raw) if raw else None
+	except Exception:
+		return None
+
+
+def _save_resume_state(state: Dict[str, Any] | None) -> None:
+	try:
+		if state is None:
+			frappe.cache().delete_value(RESUME_CACHE_KEY)
+		else:
+			frappe.cache().set_value(RESUME_CACHE_KEY, json.dumps(state), expires_in_sec=RESUME_TTL_SECONDS)
+	except Exception:  # pragma: no cover - cache outage must not fail the sync
+		pass
+
+
+def _process_sns(order_sns: List[str], summary: Dict[str, Any], concurrency: int = 1) -> None:
+	"""Detail-fetch and upsert `order_sns` chunk by chunk, committing per chunk.
+
+	Each order runs in its own savepoint; a failing order's partial writes are
+	rolled back so the chunk commit keeps only complete orders. Updates ``orders_found`` / ``orders_processed`` / ``orders_written`` /
+	``orders_skipped`` / ``errors`` of `summary` in place.
+	"""
+	summary["orders_found"] += len(order_sns)
+	for details in iter_order_detail_chunks(order_sns, concurrency=concurrency):
+		existing = lookup_existing([od.get("order_sn") for od in details])
 		for od in details:
+			savepoint = f"shopee_order_{od.get('order_sn')}"[:60]
+			frappe.db.savepoint(savepoint)
 			try:
-				so = upsert_sales_order(od)
-				status = (od.get("order_status") or "").lower()
-				if status in {"paid", "ready_to_ship", "completed"}:
-					si = ensure_sales_invoice_for_paid(so, od)
-				else:
-					si = None
-				if status in {"ready_to_ship", "completed"}:
-					dn = ensure_delivery_note_for_ready(si or so, od)  # prefer invoice if created
-				else:
-					dn = None
-				if status == "completed":
-					on_completed(od.get("order_sn"))
+				res = process_order(od, existing.get(od.get("order_sn")) or _empty_state())
 				summary["orders_processed"] += 1
-				_log_sync("order_processed", {"order_sn": od.get("order_sn"), "so": so, "si": si, "dn": dn})
+				summary["orders_skipped" if res["skipped"] else "orders_written"] += 1
+				if not res["skipped"]:
+					_log_sync("order_processed", res)
 			except Exception as per_exc:  # record per-order error, continue
+				frappe.db.rollback(save_point=savepoint)
 				err_msg = f"{od.get('order_sn')}: {per_exc}"[:500]
 				summary["errors"].append(err_msg)
 				frappe.log_error(message=err_msg, title="Shopee Order Sync Error")
+		frappe.db.commit()
+
+
+def stream_orders_window(
+	time_from: int,
+	time_to: int,
+	cursor: str | None = None,
+	concurrency: int = 1,
+	checkpoint: bool = True,
+) -> Dict[str, Any]:
+	"""Streaming list -> detail -> upsert pipeline for one time window.
+
+	Upserts start after the first list page; at most one page of SNs and one
+	detail chunk are held in memory. Completed orders are committed after every
+	detail chunk. After each fully processed page the next list cursor is saved
+	(`RESUME_CACHE_KEY`), so a fatal error mid-window can be resumed with
+	``cursor=summary["resume_cursor"]`` (re-processing at most one page,
+	which is safe as upserts are idempotent). The saved state is cleared once
+	the window completes.
+
+	Returns summary dict with ``orders_found``, ``orders_processed`` (split into
+	``orders_written`` / ``orders_skipped`` as unchanged), ``errors``, ``pages``,
+	``completed``, ``fatal`` (window-level error) and ``resume_cursor``.
+	"""
+	started = time.time()
+	summary: Dict[str, Any] = {
+		"window_from": int(time_from),
+		"window_to": int(time_to),
+		"orders_found": 0,
+		"orders_processed": 0,
+		"orders_written": 0,
+		"orders_skipped": 0,
+		"pages": 0,
+		"errors": [],
+		"completed": False,
+		"fatal": None,
+		"resume_cursor": cursor,
+		"duration_s": 0,
+	}
+	state = {"window_from": int(time_from), "window_to": int(time_to), "cursor": cursor}
+	try:
+		for page, next_cursor in iter_order_list_pages(time_from, time_to, status=None, cursor=cursor):
+			summary["pages"] += 1
+			_process_sns(page, summary, concurrency)
+			summary["resume_cursor"] = next_cursor
+			if checkpoint and next_cursor:
+				state["cursor"] = next_cursor
+				_save_resume_state(state)
+		summary["completed"] = True
+		if checkpoint:
+			_save_resume_state(None)
+	except clients.RetryDeferred:
+		# Throttled inside clients.deferrable(): keep the cursor, let the job re-enqueue itself.
+		if checkpoint:
+			_save_resume_state(state)
+		raise
 	except Exception as exc:
 		main_err = str(exc)
 		summary["errors"].append(main_err)
+		summary["fatal"] = main_err
 		frappe.log_error(message=main_err, title="Shopee Order Sync Fatal")
+		if checkpoint:
+			_save_resume_state(state)
 	finally:
 		summary["duration_s"] = round(time.time() - started, 2)
 	return summary
 
 
+def _merge_window(summary: Dict[str, Any], res: Dict[str, Any]) -> None:
+	"""Fold one `stream_orders_window` result into an aggregate summary."""
+	for key in ("orders_found", "orders_processed", "orders_written", "orders_skipped"):
+		summary[key] += res[key]
+	summary["errors"].extend(res["errors"])
+	summary["fatal"] = res["fatal"] or summary["fatal"]
+
+
+def sync_orders_range(time_from: int, time_to: int, concurrency: int = 1) -> Dict[str, Any]:
+	"""Sync orders updated within explicit epoch bounds (backfills).
+
+	The inclusive window is split into <= 15 day slices (Shopee list limit).
+	Each slice is listed with `collect_order_sns` (dense sub-windows are
+	bisected and listed concurrently, SNs de-duplicated), then detailed and
+	upserted chunk by chunk. The incremental resume cursor is not touched;
+	callers that need resumability checkpoint whole ranges (see
+	`services.fiscal`).
+
+	Returns summary dict like `sync_incremental_orders` plus ``slices``,
+	``list_windows`` and ``list_splits``.
+	"""
+	started = time.time()
+	summary: Dict[str, Any] = {
+		"window_from": int(time_from),
+		"window_to": int(time_to),
+		"slices": 0,
+		"list_windows": 0,
+		"list_splits": 0,
+		"orders_found": 0,
+		"orders_processed": 0,
+		"orders_written": 0,
+		"orders_skipped": 0,
+		"errors": [],
+		"completed": True,
+		"fatal": None,
+		"duration_s": 0,
+	}
+	try:
+		for slice_from, slice_to in windows.split_window(time_from, time_to):
+			listed = collect_order_sns(slice_from, slice_to)
+			summary["slices"] += 1
+			summary["list_windows"] += listed["windows"]
+			summary["list_splits"] += listed["splits"]
+			summary["errors"].extend(listed["errors"])
+			if listed["errors"]:
+				summary["completed"] = False  # some sub-window pages are missing
+			_process_sns(listed["order_sns"], summary, concurrency)
+	except clients.RetryDeferred:
+		raise
+	except Exception as exc:
+		summary["errors"].append(str(exc))
+		summary["fatal"] = str(exc)
+		summary["completed"] = False
+		frappe.log_error(message=str(exc), title="Shopee Order Sync Fatal")
+	summary["duration_s"] = round(time.time() - started, 2)
+	return summary
+
+
+def sync_incremental_orders(
+	updated_since_minutes: int = 15,
+	resume: bool = True,
+	concurrency: int = 1,
+	time_from: int | None = None,
+	time_to: int | None = None,
+) -> Dict[str, Any]:
+	"""High-level incremental sync pipeline.
+
+	Steps:
+		1. If a previous run stopped mid-window, finish that window from its cursor.
+		2. Calculate time window (now - minutes, now).
+		3. Stream list pages -> detail chunks -> upsert ERPNext docs per order.
+		4. Aggregate results & per-order errors.
+
+	Passing ``time_from`` (and optionally ``time_to``, default now) syncs that
+	exact window instead via `sync_orders_range`.
+
+	Returns summary dict.
+	"""
+	if time_from is not None:
+		return sync_orders_range(time_from, int(time.time()) if time_to is None else time_to, concurrency=concurrency)
+	started = int(time.time())
+	window_to = started
+	window_from = window_to - (updated_since_minutes * 60)
+	summary: Dict[str, Any] = {
+		"window_from": window_from,
+		"window_to": window_to,
+		"minutes": updated_since_minutes,
+		"orders_found": 0,
+		"orders_processed": 0,
+		"orders_written": 0,
+		"orders_skipped": 0,
+		"errors": [],
+		"completed": False,
+		"fatal": None,
+		"resumed": None,
+		"duration_s": 0,
+	}
+	pending = _load_resume_state() if resume else None
+	if pending:
+		prev = stream_orders_window(
+			pending["window_from"], pending["window_to"], cursor=pending.get("cursor"), concurrency=concurrency
+		)
+		summary["resumed"] = {k: prev[k] for k in ("window_from", "window_to", "orders_processed", "completed")}
+		_merge_window(summary, prev)
+		if not prev["completed"]:
+			summary["duration_s"] = round(time.time() - started, 2)
+			return summary
+	res: Dict[str, Any] = {"completed": True, "fatal": None, "resume_cursor": None}
+	for slice_from, slice_to in windows.split_window(window_from, window_to):
+		res = stream_orders_window(slice_from, slice_to, concurrency=concurrency)
+		_merge_window(summary, res)
+		if not res["completed"]:
+			break
+	summary["completed"] = res["completed"]
+	summary["resume_cursor"] = res["resume_cursor"]
+	summary["duration_s"] = round(time.time() - started, 2)
+	return summary
+
+
 __all__ = [
+	"iter_order_list_pages",
 	"get_order_list",
+	"collect_order_sns",
 	"get_order_detail",
+	"fetch_order_details",
 	"ensure_customer_and_addresses",
+	"lookup_existing",
 	"upsert_sales_order",
+	"store_sync_hash",
 	"ensure_sales_invoice_for_paid",
 	"ensure_delivery_note_for_ready",
 	"on_completed",
+	"process_order",
+	"iter_order_detail_chunks",
+	"stream_orders_window",
+	"sync_orders_range",
 	"sync_incremental_orders",
 ]
 
@@ -18,6 +18,7 @@ import time
 import frappe
 
 from .. import clients
+from . import windows
 
 RETURN_LIST_PATH = "/api/v2/returns/get_return_list"
 RETURN_DETAIL_PATH = "/api/v2/returns/get_return_detail"
@@ -37,31 +38,36 @@ def _log(event: str, data: Dict[str, Any]):
 
 
 def get_return_list(time_from: int, time_to: int, status: str | None) -> List[str]:
-	"""Return list of return_sn within window."""
-	params: Dict[str, Any] = {
-		"time_range_field": "update_time",
-		"time_from": int(time_from),
-		"time_to": int(time_to),
-	}
-	if status:
-		params["status"] = status
+	"""Return list of return_sn within window.
+
+	Windows longer than Shopee's 15 day limit are split into consecutive
+	slices (`windows.split_window`); duplicates across slices are dropped.
+	"""
 	ret_sns: List[str] = []
-	more = True
-	cursor = None
-	while more:
-		if cursor:
-			params["cursor"] = cursor
-		resp = clients.http_get(RETURN_LIST_PATH, params)
-		data = resp.get("response") or resp
-		for row in (data.get("returns") or data.get("return_list") or []):
-			sn = row.get("return_sn") or row.get("returnsn")
-			if sn:
-				ret_sns.append(sn)
-		more = bool(data.get("more")) and bool(data.get("next_cursor"))
-		cursor = data.get("next_cursor")
-		if not more:
-			break
-	return ret_sns
+	for slice_from, slice_to in windows.split_window(time_from, time_to):
+		params: Dict[str, Any] = {
+			"time_range_field": "update_time",
+			"time_from": slice_from,
+			"time_to": slice_to,
+		}
+		if status:
+			params["status"] = status
+		more = True
+		cursor = None
+		while more:
+			if cursor:
+				params["cursor"] = cursor
+			resp = clients.http_get(RETURN_LIST_PATH, params)
+			data = resp.get("response") or resp
+			for row in (data.get("returns") or data.get("return_list") or []):
+				sn = row.get("return_sn") or row.get("returnsn")
+				if sn:
+					ret_sns.append(sn)
+			more = bool(data.get("more")) and bool(data.get("next_cursor"))
+			cursor = data.get("next_cursor")
+			if not more:
+				break
+	return list(dict.fromkeys(ret_sns))
 
 
 def get_return_detail(return_sn: str) -> Dict[str, Any]:
@@ -135,21 +141,26 @@ def close_return_case(issue_name: str) -> None:
 	_log("close_case", {"issue": issue_name})
 
 
-def sync_returns_incremental(updated_since_minutes: int = 30) -> Dict[str, Any]:
+def sync_returns_incremental(
+	updated_since_minutes: int = 30,
+	time_from: int | None = None,
+	time_to: int | None = None,
+) -> Dict[str, Any]:
 	"""Incremental sync pipeline for returns (stub).
 
 	Steps:
-		1. Determine time window.
+		1. Determine time window (now - minutes, now) unless explicit
+		   ``time_from`` / ``time_to`` epoch bounds are given (backfills).
 		2. Pull list of return_sn.
 		3. Fetch detail & upsert Issue (mock) per return.
 		4. Summarize results.
 	"""
-	now = int(time.time())
-	window_from = now - updated_since_minutes * 60
+	now = int(time.time()) if time_to is None else int(time_to)
+	window_from = now - updated_since_minutes * 60 if time_from is None else int(time_from)
 	summary = {
 		"window_from": window_from,
 		"window_to": now,
-		"minutes": updated_since_minutes,
+		"minutes": updated_since_minutes if time_from is None else None,
 		"returns_found": 0,
 		"returns_processed": 0,
 		"errors": [],
@@ -0,0 +1,65 @@
+"""Time window helpers shared by the list-based sync services.
+
+Shopee list endpoints (get_order_list, get_return_list, ...) take
+``time_from`` / ``time_to`` as UTC epoch seconds, both inclusive, and reject
+ranges longer than 15 days. Backfills work in business-local dates
+(Asia/Jakarta), so chunks are converted to exact epoch bounds here and long
+windows are split into consecutive slices that cover every second once.
+"""
+
+from __future__ import annotations
+
+from typing import List, Tuple
+import datetime as _dt
+from zoneinfo import ZoneInfo
+
+BUSINESS_TZ = "Asia/Jakarta"
+MAX_WINDOW_SECONDS = 15 * 24 * 3600  # Shopee: time_to - time_from <= 15 days
+
+
+def split_window(time_from: int, time_to: int, max_seconds: int = MAX_WINDOW_SECONDS) -> List[Tuple[int, int]]:
+	"""Split an inclusive epoch window into slices no longer than `max_seconds`.
+
+	Slices are consecutive and non-overlapping (``next_from = prev_to + 1``),
+	so each second of the input is fetched exactly once.
+
+	Args:
+		time_from: Inclusive lower bound (epoch seconds).
+		time_to: Inclusive upper bound (epoch seconds).
+		max_seconds: Maximum ``time_to - time_from`` per slice.
+	Returns:
+		List of ``(slice_from, slice_to)``; empty when ``time_to < time_from``.
+	"""
+	time_from, time_to = int(time_from), int(time_to)
+	step = max(int(max_seconds), 1)
+	slices: List[Tuple[int, int]] = []
+	cur = time_from
+	while cur <= time_to:
+		end = min(cur + step, time_to)
+		slices.append((cur, end))
+		cur = end + 1
+	return slices
+
+
+def local_dates_to_epochs(start: str | _dt.date, end: str | _dt.date, tz: str = BUSINESS_TZ) -> Tuple[int, int]:
+	"""Inclusive local date range -> inclusive UTC epoch bounds.
+
+	``start`` 00:00:00 and ``end`` 23:59:59 are taken in `tz` (business
+	timezone by default) and converted to UTC epoch seconds.
+
+	Args:
+		start: ISO date (YYYY-MM-DD) or date, inclusive.
+		end: ISO date or date, inclusive.
+		tz: IANA timezone name of the dates.
+	"""
+	zone = ZoneInfo(tz)
+	sd = start if isinstance(start, _dt.date) else _dt.date.fromisoformat(start)
+	ed = end if isinstance(end, _dt.date) else _dt.date.fromisoformat(end)
+	if ed < sd:
+		raise ValueError("end before start")
+	lower = _dt.datetime.combine(sd, _dt.time.min, tzinfo=zone)
+	upper = _dt.datetime.combine(ed + _dt.timedelta(days=1), _dt.time.min, tzinfo=zone)
+	return int(lower.timestamp()), int(upper.timestamp()) - 1
+
+
+__all__ = ["BUSINESS_TZ", "MAX_WINDOW_SECONDS", "split_window", "local_dates_to_epochs"]
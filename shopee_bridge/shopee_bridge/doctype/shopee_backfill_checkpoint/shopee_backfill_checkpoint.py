@@ -0,0 +1,18 @@
+from frappe.model.document import Document
+import frappe
+
+class ShopeeBackfillCheckpoint(Document):
+    """
+    Controller for Shopee Backfill Checkpoint doctype.
+    One row per (backfill run, stage, date chunk); written by
+    shopee_bridge.services.fiscal so a fiscal-year backfill can resume.
+    """
+
+    def make_summary(self) -> str:
+        """
+        Returns a short status summary for listview display.
+
+        Returns:
+            str: Summary text including stage, chunk range, status and attempts.
+        """
+        return f"{self.stage or ''} {self.chunk_start or ''}..{self.chunk_end or ''} | {self.status or 'pending'} | attempts: {self.attempts or 0}"
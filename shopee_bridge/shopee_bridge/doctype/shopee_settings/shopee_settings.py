@@ -26,6 +26,11 @@ class ShopeeSettings(Document):
             except Exception as e:
                 frappe.msgprint(f"Gagal membaca expiry token: {e}")
 
+    def on_update(self):
+        # Credentials / tokens may have changed: drop cached signing context in all workers.
+        from shopee_bridge import auth
+        auth.invalidate_settings_cache()
+
 @frappe.whitelist()
 def connect_to_shopee(scopes: list[str] | None = None) -> dict:
     try:
@@ -11,15 +11,13 @@ class ShopeeWebhookInbox(Document):
         """
         Enqueue async processing of this webhook inbox entry.
 
-        Enqueues shopee_bridge.jobs.process_webhook.run with inbox=self.name on 'short' queue.
+        Follows the configured dispatch mode: a deduplicated batch drain job, or
+        shopee_bridge.jobs.process_webhook.run with inbox=self.name ('per_event').
 
         Idempotency: Only enqueues, does not process.
         """
-        frappe.enqueue(
-            "shopee_bridge.jobs.process_webhook.run",
-            inbox=self.name,
-            queue="short"
-        )
+        from shopee_bridge.jobs import process_webhook
+        process_webhook.enqueue_processing(self.name)
 
     def make_summary(self) -> str:
         """
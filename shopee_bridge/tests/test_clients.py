@@ -0,0 +1,102 @@
+"""Unit tests for `clients.RetryPolicy` and the retry loop (no network)."""
+
+import unittest
+from unittest import mock
+
+import frappe
+
+from shopee_bridge import clients
+
+PATH = "/api/v2/order/get_order_list"
+
+
+class TestBackoff(unittest.TestCase):
+	def test_steps_double_up_to_cap(self):
+		policy = clients.RetryPolicy(base_delay=1.0, max_delay=5.0, jitter="none")
+		self.assertEqual([policy.backoff(n) for n in (1, 2, 3, 4)], [1.0, 2.0, 4.0, 5.0])
+
+	def test_equal_jitter_keeps_half_step_floor(self):
+		policy = clients.RetryPolicy(base_delay=4.0, jitter="equal")
+		with mock.patch.object(clients.random, "uniform", side_effect=lambda a, b: (a, b)):
+			self.assertEqual(policy.backoff(1), (2.0, 4.0))
+
+	def test_full_jitter_starts_at_zero(self):
+		policy = clients.RetryPolicy(base_delay=4.0, jitter="full")
+		with mock.patch.object(clients.random, "uniform", side_effect=lambda a, b: (a, b)):
+			self.assertEqual(policy.backoff(1), (0, 4.0))
+
+	def test_default_is_equal_jitter(self):
+		self.assertEqual(clients.RetryPolicy().jitter, "equal")
+
+
+class TestServerHint(unittest.TestCase):
+	def setUp(self):
+		self.policy = clients.RetryPolicy(max_delay=30.0)
+
+	def test_retry_after_seconds(self):
+		self.assertEqual(self.policy.server_hint({"Retry-After": "7"}), 7.0)
+
+	def test_reset_delta_and_epoch(self):
+		self.assertEqual(self.policy.server_hint({"X-RateLimit-Reset": "3"}), 3.0)
+		with mock.patch.object(clients.time, "time", return_value=2_000_000_000):
+			self.assertEqual(self.policy.server_hint({"X-RateLimit-Reset": "2000000012"}), 12.0)
+
+	def test_hint_wins_but_is_capped(self):
+		self.assertEqual(self.policy.delay_for(1, {"Retry-After": "120"}), 30.0)
+		self.assertIsNone(self.policy.server_hint({"Retry-After": "soon"}))
+
+
+class TestBudget(unittest.TestCase):
+	def test_rolling_minute(self):
+		policy = clients.RetryPolicy(budget_per_minute=2)
+		with mock.patch.object(clients.time, "monotonic", return_value=100.0):
+			self.assertEqual([policy.take_budget("k") for _ in range(3)], [True, True, False])
+			self.assertTrue(policy.take_budget("other"))
+		with mock.patch.object(clients.time, "monotonic", return_value=161.0):
+			self.assertTrue(policy.take_budget("k"))
+
+
+class TestRetryLoop(unittest.TestCase):
+	def setUp(self):
+		self.policy = clients.RetryPolicy(max_retries=2, base_delay=1.0, jitter="none", budget_per_minute=10, defer_after=5.0)
+		self.responses = []
+		self.addCleanup(mock.patch.stopall)
+		mock.patch.dict(clients.RETRY_POLICIES, {PATH: self.policy}).start()
+		mock.patch.object(clients.ratelimit, "acquire").start()
+		mock.patch.object(clients.auth, "get_signing_context").start()
+		mock.patch.object(clients.auth, "sign_request", return_value={"url": "u", "headers": {}}).start()
+		mock.patch.object(clients, "_do_request", side_effect=lambda *a, **kw: self.responses.pop(0)).start()
+		mock.patch.object(clients.frappe, "log_error").start()
+		self.sleep = mock.patch.object(clients.time, "sleep").start()
+
+	def test_retries_then_succeeds(self):
+		self.responses = [(503, "", {}), (429, "", {"Retry-After": "2"}), (200, '{"ok": 1}', {})]
+		data = clients._execute_with_retry("GET", PATH, {}, None, None)
+		self.assertEqual(data["ok"], 1)
+		self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [1.0, 2.0])
+		self.assertEqual(len(self.policy._spent[PATH]), 2)
+
+	def test_gives_up_after_max_retries(self):
+		self.responses = [(500, "boom", {})] * 3
+		with self.assertRaises(frappe.ValidationError):
+			clients._execute_with_retry("GET", PATH, {}, None, None)
+		self.assertEqual(self.sleep.call_count, 2)
+
+	def test_spent_budget_stops_retrying(self):
+		self.policy.budget_per_minute = 0
+		self.responses = [(503, "", {})]
+		with self.assertRaises(frappe.ValidationError):
+			clients._execute_with_retry("GET", PATH, {}, None, None)
+		self.sleep.assert_not_called()
+
+	def test_deferred_retry_does_not_spend_budget(self):
+		self.responses = [(429, "", {"Retry-After": "20"})]
+		with clients.deferrable(), self.assertRaises(clients.RetryDeferred) as ctx:
+			clients._execute_with_retry("GET", PATH, {}, None, None)
+		self.assertEqual(ctx.exception.retry_after, 20.0)
+		self.assertFalse(self.policy._spent.get(PATH))
+		self.sleep.assert_not_called()
+
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,96 @@
+"""Unit tests for the webhook ingest stream materializer (no Redis / DB)."""
+
+import json
+import time
+import unittest
+from unittest import mock
+
+import frappe
+
+from shopee_bridge import auth
+from shopee_bridge.jobs import ingest_webhook
+
+PUSH_KEY = "push-key"
+BODY = b'{"event_type": "order.status_update", "order_sn": "A1", "update_time": 1735689600}'
+
+
+def _legacy_fields(received_at, sent_at=None):
+	headers = {
+		auth.WEBHOOK_SIGNATURE_HEADER: auth.hmac_sha256(BODY, PUSH_KEY, raw=True),
+		auth.WEBHOOK_TIMESTAMP_HEADER: str(int(received_at if sent_at is None else sent_at)),
+	}
+	return {
+		"env": b"live",
+		"body": BODY,
+		"headers": json.dumps(headers).encode(),
+		"path": b"/api/method/shopee_bridge.api.webhook_live",
+		"url": b"https://erp.example.com/api/method/shopee_bridge.api.webhook_live",
+		"ts": f"{received_at:.3f}".encode(),
+	}
+
+
+class TestDelayedVerification(unittest.TestCase):
+	def _row(self, fields):
+		return ingest_webhook._build_row("1-0", fields, {"live": PUSH_KEY}, None, None)
+
+	def test_materialized_after_drift_window_is_still_valid(self):
+		row = self._row(_legacy_fields(time.time() - 3600))
+		self.assertEqual(row[9], 1)
+		self.assertIsNone(row[13])
+
+	def test_drift_is_measured_against_receive_time(self):
+		received = time.time() - 3600
+		row = self._row(_legacy_fields(received, sent_at=received - 900))
+		self.assertEqual(row[9], 0)
+		self.assertIn("drift", row[13])
+
+	def test_entry_without_receive_time_uses_now(self):
+		fields = _legacy_fields(time.time())
+		del fields["ts"]
+		self.assertEqual(self._row(fields)[9], 1)
+
+
+class _FakeStream:
+	def __init__(self, entries):
+		self.entries = entries
+		self.acked = []
+
+	def xlen(self, key):
+		return len(self.entries)
+
+	def xgroup_create(self, *args, **kwargs):
+		pass
+
+	def xautoclaim(self, *args, **kwargs):
+		entries, self.entries = self.entries, []
+		return ["0-0", entries]
+
+	def xreadgroup(self, *args, **kwargs):
+		return []
+
+	def xack(self, key, group, *ids):
+		self.acked.extend(ids)
+
+	def xdel(self, key, *ids):
+		pass
+
+
+class TestMaterializeCounts(unittest.TestCase):
+	def test_redelivered_committed_entry_counts_as_duplicate(self):
+		now = time.time()
+		stream = _FakeStream([(b"1-0", _legacy_fields(now)), (b"2-0", _legacy_fields(now))])
+		db = mock.MagicMock()
+		# 1-0 was committed before a crash; the INSERT IGNORE only adds 2-0.
+		db.sql.side_effect = [[[1]], [[2]]]
+		with mock.patch.object(ingest_webhook, "_stream", return_value=(stream, "k")), \
+			mock.patch.object(frappe, "db", db), \
+			mock.patch.object(frappe, "get_cached_doc", side_effect=Exception("no settings"), create=True), \
+			mock.patch("shopee_bridge.jobs.process_webhook.enqueue_processing"):
+			counts = ingest_webhook.materialize(max_batches=1)
+		self.assertEqual((counts["read"], counts["inserted"], counts["duplicates"]), (2, 1, 1))
+		self.assertEqual(stream.acked, ["1-0", "2-0"])
+		db.bulk_insert.assert_called_once()
+
+
+if __name__ == "__main__":
+	unittest.main()
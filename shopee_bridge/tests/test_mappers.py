@@ -0,0 +1,94 @@
+"""Unit tests for `mappers` (pure Python, no site needed)."""
+
+import unittest
+
+from shopee_bridge import mappers
+
+ORDERS = [
+	{
+		"order_sn": "A1",
+		"items": [
+			{"model_sku": " sku  a1 ", "item_name": "Kaos", "model_quantity_purchased": 2, "model_original_price": "15000"},
+			{"item_sku": "B-2", "model_sku": "", "product_name": "Topi", "quantity": "x", "item_price": 5000},
+		],
+	},
+	{"order_sn": "A2", "order_items": [{"model_name": "Merah", "quantity": 0, "price": None}]},
+	{"order_sn": "A3"},
+	{"order_sn": "A4", "items": [{}, {"sku": "sku a1", "name": "", "variation_name": "L", "order_item_price": "bad"}]},
+	{"order_sn": "A5", "items": [{"model_sku": " SKU A1", "model_quantity": 3, "item_price": 0, "model_original_price": 9}]},
+]
+
+
+class TestItemBatch(unittest.TestCase):
+	def test_batch_matches_per_order(self):
+		expected = [mappers.map_order_items(od) for od in ORDERS]
+		columns = mappers.map_orders_items_batch(ORDERS)
+		self.assertEqual(mappers.rows_from_columns(columns, len(ORDERS)), expected)
+
+	def test_order_index_points_at_source_order(self):
+		columns = mappers.map_orders_items_batch(ORDERS)
+		self.assertEqual(columns["order_index"], [0, 0, 1, 3, 3, 4])
+
+	def test_empty_input(self):
+		columns = mappers.map_orders_items_batch([])
+		self.assertEqual(mappers.rows_from_columns(columns), [])
+		self.assertEqual(set(columns), {"order_index", *mappers.map_order_items(ORDERS[0])[0]})
+
+
+PAYLOAD = {
+	"order_sn": "2501015ABCD",
+	"order_status": "COMPLETED",
+	"total_amount": 125000.5,
+	"currency": "IDR",
+	"note": "",
+	"buyer_username": None,
+	"items": [{"model_sku": "Kaos-Merah", "qty": 2, "price": 50000}],
+	"recipient_address": {"name": "Budi Ñandú", "city": "Jakarta"},
+	"update_time": 1735689600,
+}
+
+
+class TestCanonicalHash(unittest.TestCase):
+	# Format v1 digests; a change here breaks every stored shopee_sync_hash.
+	def test_known_digests(self):
+		self.assertEqual(mappers.canonical_hash(PAYLOAD), "1.sha1.87a869d1a202a1655c798a1c304ce0de9d2c6614")
+		self.assertEqual(
+			mappers.canonical_hash(PAYLOAD, algo="blake2b"), "1.blake2b.949ae4cd408549c07096f1fa5a72be367874bddd"
+		)
+		self.assertEqual(mappers.canonical_hash({}), "1.sha1.8fc095b9addf370219c1e4bfaf2cb42fe810b423")
+		self.assertEqual(
+			mappers.compute_order_sync_hash(PAYLOAD), "1.sha1.720c264b8a32d4363d7a6f8e789e3632b2e0c07c"
+		)
+		self.assertEqual(mappers.digest_bytes(b'{"a":1}'), "1.sha1.85bac1e2b388dcc5ef39d2a81e271b0c7a78ee5a")
+
+	def test_equals_compact_sorted_json(self):
+		import hashlib
+		import json
+
+		subset = {k: v for k, v in PAYLOAD.items() if v not in (None, "")}
+		text = json.dumps(subset, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+		expected = hashlib.sha1(b"shopee-canon/1\n" + text.encode("utf-8")).hexdigest()
+		self.assertEqual(mappers.canonical_hash(PAYLOAD), f"1.sha1.{expected}")
+
+	def test_key_order_and_empty_fields_do_not_matter(self):
+		reordered = dict(reversed(list(PAYLOAD.items())))
+		reordered["extra_note"] = ""
+		self.assertEqual(mappers.canonical_hash(reordered), mappers.canonical_hash(PAYLOAD))
+
+	def test_fields_subset(self):
+		fields = ("order_status", "total_amount", "missing")
+		self.assertEqual(
+			mappers.canonical_hash(PAYLOAD, fields),
+			mappers.canonical_hash({"order_status": "COMPLETED", "total_amount": 125000.5}),
+		)
+		self.assertEqual(mappers.canonical_hash(PAYLOAD, fields + fields), mappers.canonical_hash(PAYLOAD, fields))
+
+	def test_sync_hash_ignores_unmapped_fields(self):
+		changed = dict(PAYLOAD, update_time=1735700000)
+		self.assertEqual(mappers.compute_order_sync_hash(changed), mappers.compute_order_sync_hash(PAYLOAD))
+		changed = dict(PAYLOAD, order_status="CANCELLED")
+		self.assertNotEqual(mappers.compute_order_sync_hash(changed), mappers.compute_order_sync_hash(PAYLOAD))
+
+	def test_unknown_algo(self):
+		with self.assertRaises(ValueError):
+			mappers.canonical_hash(PAYLOAD, algo="md5")
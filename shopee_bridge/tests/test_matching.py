@@ -0,0 +1,97 @@
+"""Unit tests for `services.matching` (pure Python, no site needed)."""
+
+import datetime as _dt
+import unittest
+
+from shopee_bridge.services import matching
+
+DAY = _dt.date(2025, 1, 5)
+
+
+def _inv(name, amount, batch=None, day=DAY):
+	return {"name": name, "date": day, "amount": amount, "payout_batch_id": batch}
+
+
+def _bank(name, amount, reference="", day=DAY):
+	return {"name": name, "date": day, "amount": amount, "reference": reference}
+
+
+class TestToMinor(unittest.TestCase):
+	def test_rounds_half_up(self):
+		self.assertEqual(matching.to_minor("10.005"), 1001)
+		self.assertEqual(matching.to_minor(0.1 + 0.2), matching.to_minor("0.3"))
+
+
+class TestMatchStrict(unittest.TestCase):
+	def test_unique_amount_matches(self):
+		res = matching.match_strict([_bank("BT1", 150)], [_inv("A", 150), _inv("B", 90)])
+		self.assertEqual([(m["bank"], m["invoice"]) for m in res["matches"]], [("BT1", "A")])
+
+	def test_duplicate_amount_is_ambiguous(self):
+		res = matching.match_strict([_bank("BT1", 150)], [_inv("A", 150), _inv("B", 150)])
+		self.assertEqual(res["matches"], [])
+		self.assertEqual(len(res["ambiguous"]), 1)
+
+	def test_reference_selects_batch(self):
+		res = matching.match_strict([_bank("BT1", 150, "PB1")], [_inv("A", 150, "PB1"), _inv("B", 150, "PB2")])
+		self.assertEqual([m["invoice"] for m in res["matches"]], ["A"])
+
+	def test_date_outside_tolerance(self):
+		res = matching.match_strict([_bank("BT1", 150, day=DAY + _dt.timedelta(days=3))], [_inv("A", 150)], tolerance_days=1)
+		self.assertEqual(res["matches"], [])
+
+
+class TestSubsetSums(unittest.TestCase):
+	def test_finds_combination(self):
+		found = matching.subset_sums([5, 3, 7, 2], 10, deadline=float("inf"), max_items=4)
+		self.assertTrue(found)
+		self.assertTrue(all(sum([5, 3, 7, 2][k] for k in sol) == 10 for sol in found))
+
+	def test_respects_item_cap(self):
+		self.assertEqual(matching.subset_sums([1, 1, 1, 1], 4, deadline=float("inf"), max_items=3), [])
+
+
+class TestMatchAggregated(unittest.TestCase):
+	def test_whole_batch(self):
+		res = matching.match_aggregated([_bank("BT1", 150)], [_inv("A", 100, "B1"), _inv("B", 50, "B1"), _inv("C", 70, "B2")])
+		self.assertEqual(res["matches"][0]["invoices"], ["A", "B"])
+		self.assertEqual(res["matches"][0]["rule"], "batch")
+
+	def test_two_batches_with_same_total_are_ambiguous(self):
+		invoices = [_inv("A", 100, "B1"), _inv("B", 50, "B1"), _inv("C", 150, "B2")]
+		res = matching.match_aggregated([_bank("BT1", 150)], invoices)
+		self.assertEqual(res["matches"], [])
+		self.assertEqual([u["reason"] for u in res["unmatched"]], ["ambiguous"])
+		self.assertEqual(res["stats"]["ambiguous"], 1)
+
+	def test_reference_resolves_same_total(self):
+		invoices = [_inv("A", 100, "B1"), _inv("B", 50, "B1"), _inv("C", 150, "B2")]
+		res = matching.match_aggregated([_bank("BT1", 150, "B2")], invoices)
+		self.assertEqual(res["matches"][0]["invoices"], ["C"])
+
+	def test_batch_topped_up_by_loose_invoice(self):
+		invoices = [_inv("A", 1000, "B1"), _inv("B", 800, "B1"), _inv("C", 35), _inv("D", 990)]
+		res = matching.match_aggregated([_bank("BT1", 1835)], invoices)
+		self.assertEqual(res["matches"][0]["invoices"], ["A", "B", "C"])
+		self.assertEqual(res["matches"][0]["rule"], "batch_subset")
+
+	def test_loose_subset_must_be_unique(self):
+		invoices = [_inv("A", 30), _inv("B", 70), _inv("C", 40), _inv("D", 60)]
+		res = matching.match_aggregated([_bank("BT1", 100)], invoices)
+		self.assertEqual(res["matches"], [])
+		self.assertEqual(res["unmatched"][0]["reason"], "ambiguous")
+
+	def test_equal_values_are_ambiguous(self):
+		res = matching.match_aggregated([_bank("BT1", 50)], [_inv("A", 50), _inv("B", 50)])
+		self.assertEqual(res["unmatched"][0]["reason"], "ambiguous")
+
+	def test_unique_loose_subset(self):
+		invoices = [_inv("A", 30), _inv("B", 70), _inv("C", 45)]
+		res = matching.match_aggregated([_bank("BT1", 100)], invoices)
+		self.assertEqual(res["matches"][0]["invoices"], ["A", "B"])
+		self.assertEqual(res["residue_invoices"], ["C"])
+
+	def test_outside_window_not_candidates(self):
+		old = DAY - _dt.timedelta(days=30)
+		res = matching.match_aggregated([_bank("BT1", 100)], [_inv("A", 100, day=old)], window_days=7)
+		self.assertEqual(res["unmatched"][0]["reason"], "no_candidates")
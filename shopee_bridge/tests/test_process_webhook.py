@@ -0,0 +1,81 @@
+"""Unit tests for webhook coalescing in `jobs.process_webhook` (no DB access)."""
+
+import unittest
+
+from shopee_bridge.jobs import process_webhook
+
+
+def _row(name, event_type, update_time=None, **payload):
+	payload["event_type"] = event_type
+	if update_time is not None:
+		payload["update_time"] = update_time
+	return {"name": name, "payload": payload}
+
+
+class TestCoalesceKey(unittest.TestCase):
+	def test_families(self):
+		key = process_webhook.coalesce_key
+		self.assertEqual(key({"event_type": "order.status_update", "order_sn": "A"}), ("order", "A"))
+		self.assertEqual(key({"event_type": "Returns.update", "returnsn": "R1"}), ("returns", "R1"))
+		self.assertEqual(key({"event_type": "logistics.tracking", "tracking_no": "T9"}), ("logistics", "T9"))
+
+	def test_not_coalescible(self):
+		key = process_webhook.coalesce_key
+		self.assertIsNone(key({"event_type": "order.status_update"}))
+		self.assertIsNone(key({"event_type": "shop_update", "order_sn": "A"}))
+		self.assertIsNone(key({"event_type": "promotion.update", "order_sn": "A"}))
+
+
+class TestCoalesce(unittest.TestCase):
+	def test_newest_update_time_wins(self):
+		rows = [
+			_row("WH1", "order.status_update", 300, order_sn="A"),
+			_row("WH2", "order.status_update", 100, order_sn="A"),
+			_row("WH3", "order.status_update", 200, order_sn="A"),
+		]
+		keep, superseded = process_webhook._coalesce(rows)
+		self.assertEqual([r["name"] for r in keep], ["WH1"])
+		self.assertEqual([s["name"] for s in superseded], ["WH2", "WH3"])
+		self.assertEqual(
+			superseded[0], {"name": "WH2", "status": "skipped", "error_message": "superseded by WH1"}
+		)
+
+	def test_tie_goes_to_later_row(self):
+		rows = [_row("WH1", "order.status_update", 100, order_sn="A"), _row("WH2", "order.status_update", 100, order_sn="A")]
+		keep, superseded = process_webhook._coalesce(rows)
+		self.assertEqual([r["name"] for r in keep], ["WH2"])
+		self.assertEqual(superseded[0]["error_message"], "superseded by WH2")
+
+	def test_keys_are_independent(self):
+		rows = [
+			_row("WH1", "order.status_update", 100, order_sn="A"),
+			_row("WH2", "returns.update", 50, return_sn="A"),
+			_row("WH3", "order.status_update", 90, order_sn="B"),
+			_row("WH4", "order.status_update", 101, order_sn="A"),
+		]
+		keep, superseded = process_webhook._coalesce(rows)
+		self.assertEqual([r["name"] for r in keep], ["WH2", "WH3", "WH4"])
+		self.assertEqual([s["name"] for s in superseded], ["WH1"])
+
+	def test_uncoalescible_rows_are_always_kept(self):
+		rows = [
+			_row("WH1", "shop_update", 10, order_sn="A"),
+			_row("WH2", "order.status_update", 5, order_sn="A"),
+			_row("WH3", "order.status_update", None),
+		]
+		keep, superseded = process_webhook._coalesce(rows)
+		self.assertEqual([r["name"] for r in keep], ["WH1", "WH3", "WH2"])
+		self.assertEqual(superseded, [])
+
+	def test_missing_or_bad_update_time_counts_as_oldest(self):
+		rows = [_row("WH1", "order.status_update", 7, order_sn="A"), _row("WH2", "order.status_update", "x", order_sn="A")]
+		keep, superseded = process_webhook._coalesce(rows)
+		self.assertEqual([r["name"] for r in keep], ["WH1"])
+		self.assertEqual([s["name"] for s in superseded], ["WH2"])
+
+	def test_empty(self):
+		self.assertEqual(process_webhook._coalesce([]), ([], []))
+
+
+if __name__ == "__main__":
+	unittest.main()